@@ -0,0 +1,209 @@
+"""
+Approximate nearest-neighbour search over L2-normalized TF-IDF vectors,
+as an inverted-file (IVF) index in plain NumPy/SciPy.
+
+Documents are grouped by spherical k-means into n_clusters clusters. A
+query is compared with the cluster centroids only, and the documents of the
+n_probe closest clusters are re-ranked with the exact cosine similarity, so
+a query reads about n_probe / n_clusters of the corpus.
+
+Trade-offs:
+    n_clusters  more clusters -> fewer candidates per probe (default sqrt(n_rows))
+    n_probe     more probed clusters -> higher recall, slower queries; can be
+                changed per query without rebuilding
+
+The vectors are stored grouped by cluster, so a probe reads one contiguous
+slice. The index is saved as plain .npy files and loaded with
+np.load(mmap_mode='r'), so a large index is paged in on demand instead of
+read at start-up.
+"""
+import os
+import json
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+DEFAULT_PROBE = 8
+KMEANS_ITERATIONS = 10
+# k-means is trained on at most this many rows; the rest are only assigned
+KMEANS_SAMPLE_ROWS = 50000
+# Rows scored against the centroids at a time, to bound the dense buffer
+ASSIGN_BLOCK_ROWS = 65536
+
+_META_FILE = 'ivf.json'
+_ARRAYS = ('centroids', 'offsets', 'ids', 'data', 'indices', 'indptr')
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k largest scores, best first. np.argpartition selects them
+    in O(n) and only those k are sorted, instead of sorting every document.
+    """
+    if k <= 0 or scores.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < scores.size:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def _assign(vectors, centroids: np.ndarray) -> np.ndarray:
+    """Closest centroid of every row"""
+    assignment = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], ASSIGN_BLOCK_ROWS):
+        block = vectors[start:start + ASSIGN_BLOCK_ROWS]
+        assignment[start:start + block.shape[0]] = np.asarray(block @ centroids.T).argmax(axis=1)
+    return assignment
+
+
+def train_centroids(vectors, n_clusters: int, n_iter: int = KMEANS_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (unit length, float32) of the rows of a sparse matrix"""
+    rng = np.random.default_rng(seed)
+    if vectors.shape[0] > KMEANS_SAMPLE_ROWS:
+        vectors = vectors[np.sort(rng.choice(vectors.shape[0], KMEANS_SAMPLE_ROWS, replace=False))]
+    n_clusters = min(n_clusters, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)].toarray()
+
+    for _ in range(n_iter):
+        assignment = _assign(vectors, centroids)
+        membership = sp.csr_matrix(
+            (np.ones(vectors.shape[0]), (assignment, np.arange(vectors.shape[0]))),
+            shape=(n_clusters, vectors.shape[0]))
+        sums = np.asarray((membership @ vectors).todense())
+        empty = np.asarray(membership.sum(axis=1)).ravel() == 0
+        # Empty clusters keep their previous centroid
+        sums[empty] = centroids[empty]
+        centroids = normalize(sums)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Inverted-file ANN index over the rows of a sparse, L2-normalized matrix (row number = id)"""
+
+    def __init__(self, n_clusters: Optional[int] = None, n_probe: int = DEFAULT_PROBE, seed: int = 0):
+        self.n_clusters = n_clusters
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids = None
+        self.offsets = np.zeros(1, dtype=np.int64)   # cluster c holds sorted rows offsets[c]:offsets[c + 1]
+        self.ids = np.zeros(0, dtype=np.int64)       # sorted row -> original row id
+        self.vectors = sp.csr_matrix((0, 0), dtype=np.float32)
+        self.trained_rows = 0
+
+    def __len__(self):
+        return self.ids.size
+
+    def build(self, vectors, centroids: Optional[np.ndarray] = None) -> 'IVFIndex':
+        """
+        Index every row of vectors. Passing the centroids of a previous build
+        skips k-means and only assigns the rows, which is much cheaper when
+        the corpus has grown a little.
+        """
+        vectors = sp.csr_matrix(vectors, dtype=np.float32)
+        if centroids is None:
+            n_clusters = self.n_clusters or max(1, int(np.sqrt(vectors.shape[0])))
+            centroids = train_centroids(vectors, n_clusters, seed=self.seed)
+            self.trained_rows = vectors.shape[0]
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+
+        assignment = _assign(vectors, self.centroids)
+        self.ids = np.argsort(assignment, kind='stable')
+        self.offsets = np.searchsorted(assignment[self.ids], np.arange(self.centroids.shape[0] + 1))
+        self.vectors = vectors[self.ids]
+        return self
+
+    def _probe(self, dense_query: np.ndarray, n_probe: Optional[int]) -> np.ndarray:
+        similarities = (self.centroids @ dense_query).ravel()
+        return top_k_indices(similarities, self.n_probe if n_probe is None else n_probe)
+
+    def query(self, query_vector, top_k: int = 10, n_probe: Optional[int] = None,
+              exclude: Optional[set] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row ids, cosine similarities) of the top_k rows in the probed clusters, best first"""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        dense_query = query_vector.T.toarray().astype(np.float32)
+        rows, scores = [], []
+        for cluster in self._probe(dense_query, n_probe):
+            start, end = self.offsets[cluster], self.offsets[cluster + 1]
+            if end > start:
+                rows.append(self.ids[start:end])
+                scores.append(np.asarray(self.vectors[start:end] @ dense_query).ravel())
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        if exclude:
+            keep = ~np.isin(rows, list(exclude))
+            rows, scores = rows[keep], scores[keep]
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best]
+
+    def save(self, directory: str, metadata: Optional[dict] = None):
+        """
+        Write the index as .npy files plus a small JSON header (holding
+        metadata, for the caller to check before loading). Every file is
+        written next to its target and renamed over it, so an index mapped
+        from the same directory keeps reading its old files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, _META_FILE)
+        # Without the header a half-written index is never loaded
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        arrays = {
+            'centroids': self.centroids,
+            'offsets': self.offsets,
+            'ids': self.ids,
+            'data': self.vectors.data,
+            'indices': self.vectors.indices,
+            'indptr': self.vectors.indptr,
+        }
+        for name, array in arrays.items():
+            path = os.path.join(directory, f'{name}.npy')
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, array)
+            os.replace(path + '.tmp', path)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({
+                'n_clusters': self.n_clusters,
+                'n_probe': self.n_probe,
+                'seed': self.seed,
+                'trained_rows': self.trained_rows,
+                'shape': list(self.vectors.shape),
+                'metadata': metadata or {},
+            }, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    @staticmethod
+    def read_header(directory: str) -> Optional[dict]:
+        """JSON header of a saved index, or None if there is no complete index in directory"""
+        try:
+            with open(os.path.join(directory, _META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def load_centroids(directory: str) -> np.ndarray:
+        """Memory-mapped centroids of a saved index, to build a new index without k-means"""
+        return np.load(os.path.join(directory, 'centroids.npy'), mmap_mode='r')
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'IVFIndex':
+        """Open a saved index; with mmap=True the arrays stay on disk and are paged in as queries touch them"""
+        with open(os.path.join(directory, _META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+            for name in _ARRAYS
+        }
+        index = cls(meta['n_clusters'], meta['n_probe'], meta['seed'])
+        index.trained_rows = meta['trained_rows']
+        index.centroids = arrays['centroids']
+        index.offsets = arrays['offsets']
+        index.ids = arrays['ids']
+        index.vectors = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                      shape=tuple(meta['shape']), copy=False)
+        return index
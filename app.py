@@ -2,16 +2,44 @@ import streamlit as st
 import os
 from PIL import Image
 import pandas as pd
-import numpy as np
 import torch
 from torchvision import transforms
-from local_utils import load_data_from_folders, preprocess_image, save_uploaded_file, CulturalClassifier, TextClassifier, load_text_content
-import json
-from datetime import datetime
-from sklearn.metrics.pairwise import cosine_similarity
+from local_utils import CATEGORIES, DEFAULT_SCAN_WORKERS, preprocess_image, get_text_content, get_csv_row, entry_key
+from classifiers import CulturalClassifier, TextClassifier
 import joblib
 import base64
+import html
+import re
 from swecha_api import get_swecha_search_results, upload_to_swecha, swecha_client
+from corpus import CONTENT_TYPES, CulturalCorpus, CorpusWatcher
+from semantic_index import SemanticIndex, default_ann_dir
+from search_index import InvertedIndex
+from search_engine import SearchEngine
+from image_hash import MAX_DISTANCE, ImageHashIndex
+from suggest import PrefixSuggester
+from upload_store import store_upload
+from cache_utils import ByteLRUCache, TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from telugu_text import normalize
+
+# Search results cached per (category, type, query, corpus version, API toggle)
+QUERY_CACHE_MAX_ENTRIES = 512
+QUERY_CACHE_TTL_SECONDS = 300
+# Results rendered per page; the next page is loaded in the background
+RESULTS_PAGE_SIZE = 10
+PAGE_SIZE_OPTIONS = [5, 10, 20, 50]
+MEDIA_CACHE_MAX_BYTES = 128 * 1024 * 1024
+SNIPPET_CACHE_MAX_ENTRIES = 1024
+PREFETCH_WORKERS = 2
+# Query-by-image: closest archive images shown, and the largest phash + dhash
+# distance (out of 128) still treated as similar
+IMAGE_QUERY_TOP_K = 12
+IMAGE_QUERY_MAX_DISTANCE = 40
+# Categories with more items than this get a text box with suggestions instead of a dropdown
+DROPDOWN_MAX_ITEMS = 200
+SUGGESTION_LIMIT = 10
+# Text results show the best-matching passage; the full text is only sent once the reader asks for it
+SHOW_FULL_TEXT_LABEL = "పూర్తి పాఠ్యం చూపించు"
 
 # Set page configuration
 st.set_page_config(
@@ -151,6 +179,17 @@ st.markdown("""
     }
 
     /* UPDATED: Sub header styling - transparent background */
+    .result-snippet {
+        color: #3E2723;
+        line-height: 1.7;
+    }
+
+    .result-snippet mark {
+        background-color: #FFE082;
+        padding: 0 2px;
+        border-radius: 3px;
+    }
+
     .sub-header {
         font-size: 1.8rem !important;
         color: #5D4037 !important;
@@ -1078,6 +1117,18 @@ if 'use_swecha_api' not in st.session_state:
     st.session_state.use_swecha_api = True
 if 'show_api_status' not in st.session_state:
     st.session_state.show_api_status = False
+if 'results_cursor' not in st.session_state:
+    st.session_state.results_cursor = 0
+if 'results_page_size' not in st.session_state:
+    st.session_state.results_page_size = RESULTS_PAGE_SIZE
+if 'results_key' not in st.session_state:
+    st.session_state.results_key = None
+if 'fuzzy_search' not in st.session_state:
+    st.session_state.fuzzy_search = True
+if 'show_search_all' not in st.session_state:
+    st.session_state.show_search_all = False
+if 'search_all_query' not in st.session_state:
+    st.session_state.search_all_query = ""
 
 # --- Riddles Data ---
 riddles = [
@@ -1205,7 +1256,53 @@ riddles = [
 # --- Data Loading and Model Functions ---
 @st.cache_resource
 def load_cultural_data():
-    return load_data_from_folders('data')
+    # One corpus shared by every session; the watcher applies new, changed and
+    # deleted files to it without rescanning the whole folder. The indexes are
+    # fed in the same pass, so every text is decoded once for all of them.
+    indexes = [load_search_index(), load_image_hash_index(), load_suggester(), load_semantic_index()]
+    corpus = CulturalCorpus.load('data', workers=DEFAULT_SCAN_WORKERS, fast_video_probe=True,
+                                 listeners=[index for index in indexes if index is not None])
+    CorpusWatcher(corpus).start()
+    return corpus
+
+@st.cache_resource
+def load_search_index():
+    # Token postings for names and text content, filled and kept in sync by load_cultural_data()
+    return InvertedIndex()
+
+@st.cache_resource
+def load_search_engine():
+    # Keyword, semantic and Swecha API search over the shared indexes
+    return SearchEngine(load_cultural_data(), load_search_index(), load_semantic_index())
+
+@st.cache_resource
+def load_image_hash_index():
+    # Perceptual hashes are computed at ingestion; this only packs them into flat arrays
+    return ImageHashIndex(CATEGORIES)
+
+@st.cache_resource
+def load_suggester():
+    # Sorted prefix arrays over names and terms, kept in sync with the corpus
+    return PrefixSuggester(limit=SUGGESTION_LIMIT)
+
+@st.cache_resource
+def load_query_cache():
+    # Process-wide, so every session shares the results of popular queries
+    return TTLCache(max_entries=QUERY_CACHE_MAX_ENTRIES, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
+
+@st.cache_resource
+def load_media_cache():
+    # Image bytes of the current and next result pages, shared by all sessions
+    return ByteLRUCache(MEDIA_CACHE_MAX_BYTES, sizeof=len)
+
+@st.cache_resource
+def load_snippet_cache():
+    # Matching passages of the current and next result pages, shared by all sessions
+    return TTLCache(max_entries=SNIPPET_CACHE_MAX_ENTRIES, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
+
+@st.cache_resource
+def load_prefetch_pool():
+    return ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="result-prefetch")
 
 @st.cache_resource
 def load_image_model():
@@ -1245,6 +1342,14 @@ def load_text_assets():
 
     return text_model, text_vectorizer
 
+@st.cache_resource
+def load_semantic_index():
+    # Document vectors are computed once per text and kept up to date as the corpus changes
+    _, text_vectorizer = load_text_assets()
+    if text_vectorizer is None:
+        return None
+    return SemanticIndex(text_vectorizer, ann_dir=default_ann_dir('data'))
+
 # Function to classify content
 def classify_content(image):
     model = load_image_model()
@@ -1273,99 +1378,212 @@ def classify_content(image):
     return category_map[predicted.item()]
 
 # --- Search Functions ---
+def cached_search(scope, search_query, compute):
+    """
+    Run compute(use_api, fuzzy) -> (payload, notices) through the process-wide query
+    cache. Results are shared across sessions until the corpus changes or
+    they expire; notices are replayed on every hit.
+    """
+    use_api = bool(st.session_state.use_swecha_api)
+    fuzzy = bool(st.session_state.fuzzy_search)
+    corpus_version = load_cultural_data().version
+    normalized_query = ' '.join(normalize(search_query or '').split())
+    cache_key = (scope, normalized_query, corpus_version, use_api, fuzzy)
+
+    query_cache = load_query_cache()
+    cached = query_cache.get(cache_key)
+    if cached is None:
+        # Results of older corpus versions can never be hit again
+        query_cache.purge(lambda key: key[2] != corpus_version)
+        cached = compute(use_api, fuzzy)
+        query_cache.put(cache_key, cached)
+
+    payload, notices = cached
+    for level, message in notices:
+        getattr(st, level)(message)
+    return payload
+
 def get_search_results(category, content_type, search_query):
     """
     This function interfaces with both local data and Swecha API to get relevant results
     based on the search query.
     """
-    results = []
-    
-    # First, try to get results from local data
-    if st.session_state.cultural_data and category in st.session_state.cultural_data:
-        category_data = st.session_state.cultural_data[category]
-        
-        if content_type in category_data:
-            # Simple text match for direct results
-            local_results = [
-                item for item in category_data[content_type]
-                if search_query.lower() in item['name'].lower() or
-                   (content_type == 'texts' and search_query.lower() in item.get('content', '').lower())
-            ]
-            results.extend(local_results)
-            
-            # If no results found with simple matching and a query exists, try semantic search
-            if not local_results and search_query:
-                semantic_results = get_semantic_search_results(category, content_type, search_query)
-                results.extend(semantic_results)
-    
-    # If we have a search query and API is enabled, also try to get results from Swecha API
-    if search_query and search_query.strip() and st.session_state.use_swecha_api:
-        try:
-            # Check if Swecha API is accessible
-            if swecha_client.health_check():
-                swecha_results = get_swecha_search_results(
-                    query=search_query,
-                    category=category,
-                    content_type=content_type,
-                    limit=10
-                )
-                
-                # Add source indicator to Swecha results
-                for result in swecha_results:
-                    result['source'] = 'swecha_api'
-                
-                results.extend(swecha_results)
-                
-                # Show info about API results
-                if swecha_results:
-                    st.info(f"Found {len(swecha_results)} additional results from Swecha API")
-            else:
-                st.warning("Swecha API is currently unavailable. Showing only local results.")
-        except Exception as e:
-            st.warning(f"Could not fetch results from Swecha API: {str(e)}")
-    
-    return results
+    return list(cached_search(
+        (category, content_type), search_query,
+        lambda use_api, fuzzy: load_search_engine().search(category, content_type, search_query, use_api, fuzzy)))
 
-def get_semantic_search_results(category, content_type, search_query):
+def get_search_all_results(search_query, categories, content_types):
     """
-    This function performs a semantic search for text content.
+    One search over every category and content type, narrowed by the facet filters (empty = all).
+    Returns: ([(category, content_type, item)], facet counts)
     """
-    if content_type == 'texts':
-        if st.session_state.text_model is None or st.session_state.text_vectorizer is None:
-            return []
-
-        text_data = st.session_state.cultural_data[category].get('texts', [])
-        if not text_data:
-            return []
+    scope = ('*', tuple(sorted(categories)), tuple(sorted(content_types)))
+    hits, facets = cached_search(
+        scope, search_query,
+        lambda use_api, fuzzy: load_search_engine().search_all(search_query, categories, content_types, use_api, fuzzy))
+    return list(hits), facets
+
+def read_image_bytes(path):
+    """Image file contents through the shared media cache"""
+    def load():
+        with open(path, 'rb') as f:
+            return f.read()
+    return load_media_cache().get_or_load(path, load)
+
+def get_result_snippet(item, category, search_query, fuzzy):
+    """The matching passage of a text result, through the shared snippet cache (keyed by file version)"""
+    key = (search_query, fuzzy, category, entry_key(item), item.get('size'), item.get('mtime_ns'))
+    return load_snippet_cache().get_or_load(
+        key, lambda: load_search_index().snippet(search_query, item, category, 'texts', fuzzy=fuzzy))
+
+def load_result_content(item, category, content_type, search_query, fuzzy):
+    """
+    Load what rendering a local result needs into the caches: image bytes,
+    or the matching passage of a text. Full text bodies and CSV rows are
+    only read when shown, so they are not fetched ahead.
+    """
+    if item.get('source') == 'swecha_api':
+        return
+    if content_type == 'images':
+        read_image_bytes(item['path'])
+    elif content_type == 'texts' and 'row' not in item and search_query:
+        get_result_snippet(item, category, search_query, fuzzy)
+
+def prefetch_results(hits, search_query):
+    """
+    Warm the caches for the next page in the background, so paging forward
+    does not wait on disk. hits are (category, content type, result) triples.
+    """
+    fuzzy = bool(st.session_state.fuzzy_search)
+    def prefetch():
+        for category, content_type, item in hits:
+            try:
+                load_result_content(item, category, content_type, search_query, fuzzy)
+            except Exception as e:
+                print(f"Prefetch failed for {item.get('path')}: {e}")
+    load_prefetch_pool().submit(prefetch)
 
-        # Extract all text content and file data
-        all_text_content = [item['content'] for item in text_data]
+def get_result_page(results, results_key):
+    """
+    The slice of results the cursor in session state points at. The cursor
+    goes back to the first page whenever the search itself changes.
+    """
+    if st.session_state.results_key != results_key:
+        st.session_state.results_key = results_key
+        st.session_state.results_cursor = 0
+    page_size = st.session_state.results_page_size
+    cursor = min(st.session_state.results_cursor, max(0, (len(results) - 1) // page_size * page_size))
+    st.session_state.results_cursor = cursor
+    return results[cursor:cursor + page_size]
+
+def display_pagination(total):
+    """Previous/next buttons, page indicator and page size for the results page"""
+    page_size = st.session_state.results_page_size
+    cursor = st.session_state.results_cursor
+    page_count = max(1, -(-total // page_size))
+
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+    with col1:
+        if st.button("← మునుపటి", key="previous_page", disabled=cursor == 0, use_container_width=True):
+            st.session_state.results_cursor = max(0, cursor - page_size)
+            st.rerun()
+    with col2:
+        st.markdown(f'<div style="text-align: center;">పేజీ {cursor // page_size + 1} / {page_count} ({total} ఫలితాలు)</div>',
+                    unsafe_allow_html=True)
+    with col3:
+        if st.button("తరువాతి →", key="next_page", disabled=cursor + page_size >= total, use_container_width=True):
+            st.session_state.results_cursor = cursor + page_size
+            st.rerun()
+    with col4:
+        options = sorted(set(PAGE_SIZE_OPTIONS) | {page_size})
+        st.selectbox("ఒక్కో పేజీకి", options, index=options.index(page_size),
+                     key="page_size_select", on_change=change_page_size)
+
+def change_page_size():
+    # Keep the first visible result on the new page
+    page_size = st.session_state.page_size_select
+    st.session_state.results_page_size = page_size
+    st.session_state.results_cursor = st.session_state.results_cursor // page_size * page_size
+
+def render_snippet(snippet):
+    """A search index snippet as HTML, with the matched words marked"""
+    text, parts, last = snippet['text'], [], 0
+    for start, end in snippet['highlights']:
+        parts.append(html.escape(text[last:start]))
+        parts.append(f'<mark>{html.escape(text[start:end])}</mark>')
+        last = end
+    parts.append(html.escape(text[last:]))
+    # One line, so markdown never treats part of the passage as a new block
+    body = re.sub(r'\s+', ' ', ''.join(parts)).strip()
+    before = '… ' if snippet['start'] > 0 else ''
+    after = ' …' if snippet['end'] < snippet['length'] else ''
+    return f'<div class="result-snippet">{before}{body}{after}</div>'
+
+def display_text_snippet(item, category, search_query, position=None):
+    """
+    The passage of a text result that matches the query, with the full text
+    behind a toggle (keyed by the result's position, as Swecha API texts have no path)
+    """
+    snippet = get_result_snippet(item, category, search_query, bool(st.session_state.fuzzy_search))
+    st.markdown(render_snippet(snippet), unsafe_allow_html=True)
+    if snippet['start'] > 0 or snippet['end'] < snippet['length']:
+        if st.toggle(SHOW_FULL_TEXT_LABEL, key=f"full_text_{position}_{entry_key(item)}"):
+            st.write(get_text_content(item))
 
-        # Transform the search query into a vector
+def display_result_item(item, content_type, category=None, search_query=None, position=None):
+    """
+    Render one search result (local or Swecha API) with its source indicator.
+    Texts found by a search_query are shown as their matching passage.
+    position is the result's place in the result list, for unique widget keys.
+    """
+    # Display images in a centered layout
+    if content_type == 'images':
         try:
-            query_vector = st.session_state.text_vectorizer.transform([search_query])
-        except ValueError as e:
-            return []
-
-        # Get vectors for all documents
-        document_vectors = st.session_state.text_vectorizer.transform(all_text_content)
-
-        # Calculate cosine similarity
-        similarities = cosine_similarity(query_vector, document_vectors).flatten()
-
-        # Get the indices of the most similar documents (top 5)
-        top_indices = similarities.argsort()[-5:][::-1]
-
-        # Filter for results with a similarity score > 0 (or a small threshold)
-        top_results = [
-            text_data[i]
-            for i in top_indices
-            if similarities[i] > 0
-        ]
-
-        return top_results
-    else:
-        return []
+            # Create a centered container for each image
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col2:
+                st.image(
+                    item['path'] if item.get('source') == 'swecha_api' else read_image_bytes(item['path']),
+                    use_column_width=True
+                )
+                # Show source indicator
+                if item.get('source') == 'swecha_api':
+                    st.info("🌐 Swecha API నుండి")
+                else:
+                    st.info("💾 లోకల్ డేటా నుండి")
+        except Exception as e:
+            st.error(f"చిత్రాన్ని ప్రదర్శించడంలో లోపం: {e}")
+
+    # Display texts
+    elif content_type == 'texts':
+        # Center text content
+        col1, col2, col3 = st.columns([1, 3, 1])
+        with col2:
+            if 'row' in item:
+                # CSV row: show the matching row with its column names
+                st.caption(item['name'])
+                st.table(pd.DataFrame([get_csv_row(item)]))
+            elif search_query:
+                display_text_snippet(item, category, search_query, position)
+            else:
+                st.write(get_text_content(item))
+            # Show source indicator
+            if item.get('source') == 'swecha_api':
+                st.info("🌐 Swecha API నుండి")
+            else:
+                st.info("💾 లోకల్ డేటా నుండి")
+
+    # Display videos
+    elif content_type == 'videos':
+        # Center video content
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.video(item['path'])
+            # Show source indicator
+            if item.get('source') == 'swecha_api':
+                st.info("🌐 Swecha API నుండి")
+            else:
+                st.info("💾 లోకల్ డేటా నుండి")
 
 # --- Display Functions ---
 def display_content_selection_page():
@@ -1403,23 +1621,16 @@ def display_content_selection_page():
         horizontal=True,
         label_visibility="collapsed"
     )
-    # Get available content names for dropdown if culture or folktales
-    content_options = [""]
-    if st.session_state.current_category in ["culture", "folktales"] and st.session_state.cultural_data:
-        content_type_en = "images" if st.session_state.selected_content_type == "చిత్రాలు" else \
-                        "videos" if st.session_state.selected_content_type == "వీడియోలు" else "texts"
-        
-        if st.session_state.current_category in st.session_state.cultural_data:
-            category_data = st.session_state.cultural_data[st.session_state.current_category]
-            if content_type_en in category_data:
-                # Remove file extensions from the names for display
-                content_options.extend([os.path.splitext(item['name'])[0] for item in category_data[content_type_en]])
+    content_type_en = "images" if st.session_state.selected_content_type == "చిత్రాలు" else \
+                    "videos" if st.session_state.selected_content_type == "వీడియోలు" else "texts"
+    category_items = (st.session_state.cultural_data or {}).get(st.session_state.current_category, {}).get(content_type_en, [])
 
     # Search bar with dropdown for culture and folktales
     st.markdown('<div class="search-container">', unsafe_allow_html=True)
     
-    if st.session_state.current_category in ["culture", "folktales"]:
-        # Use dropdown for culture and folktales
+    if st.session_state.current_category in ["culture", "folktales"] and len(category_items) <= DROPDOWN_MAX_ITEMS:
+        # Use dropdown for culture and folktales (file extensions removed for display)
+        content_options = [""] + [os.path.splitext(item['name'])[0] for item in category_items]
         search_query = st.selectbox(
             "వెతకండి:",
             options=content_options,
@@ -1428,16 +1639,35 @@ def display_content_selection_page():
         index=0
         )
     else:
-        # Use text input for other categories
+        # Use text input for other categories and for categories too large for a dropdown
         search_query = st.text_input(
             "వెతకండి:",
             value=st.session_state.search_query,
             placeholder="మీరు కోరుకునేది ఇక్కడ టైప్ చేయండి...",
             key="search_input"
         )
+        # Completions of what was typed, from names and frequent terms
+        suggestions = load_suggester().suggest(search_query, st.session_state.current_category, content_type_en)
+        if suggestions and normalize(search_query.strip()) not in [normalize(s) for s in suggestions]:
+            suggestion = st.selectbox(
+                "సూచనలు:",
+                options=[""] + suggestions,
+                key="suggestion_select",
+                format_func=lambda x: x if x else "సూచనను ఎంచుకోండి ...",
+                index=0
+            )
+            if suggestion:
+                search_query = suggestion
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+    st.session_state.fuzzy_search = st.checkbox(
+        "అక్షర దోషాలతో కూడా వెతకండి",
+        value=st.session_state.fuzzy_search,
+        key="fuzzy_checkbox",
+        help="వేరే స్పెల్లింగ్‌లు మరియు చిన్న అక్షర దోషాలు ఉన్న పదాలను కూడా కనుగొంటుంది"
+    )
+
     # UPDATED: Button row with smaller buttons
     st.markdown('<div class="button-row">', unsafe_allow_html=True)
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -1448,6 +1678,12 @@ def display_content_selection_page():
             st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)
 
+    # Query by image: archive images that look like an uploaded photo
+    if st.session_state.selected_content_type == "చిత్రాలు":
+        query_image = st.file_uploader("లేదా ఫోటోతో వెతకండి:", type=['png', 'jpg', 'jpeg'], key="image_query_upload")
+        if query_image is not None:
+            display_image_query_results(query_image, st.session_state.current_category)
+
     # UPDATED: Back button - smaller
     st.markdown('<div class="centered-button">', unsafe_allow_html=True)
     if st.button("← వెనక్కి", key="back_button", use_container_width=True):
@@ -1460,6 +1696,23 @@ def display_content_selection_page():
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+def display_image_query_results(query_image, category):
+    """Visually similar images of the category, nearest first"""
+    try:
+        image = Image.open(query_image)
+        matches = load_image_hash_index().search(
+            image, top_k=IMAGE_QUERY_TOP_K, category=category, max_distance=IMAGE_QUERY_MAX_DISTANCE)
+    except Exception as e:
+        st.error(f"చిత్రాన్ని చదవడంలో లోపం: {e}")
+        return
+
+    if not matches:
+        st.warning("ఇలాంటి చిత్రాలు కనుగొనబడలేదు.")
+        return
+    for _, item, distance in matches:
+        st.caption(f"{item['name']} - సారూప్యత {100 * (1 - distance / MAX_DISTANCE):.0f}%")
+        display_result_item(item, 'images')
+
 def display_search_results_page():
     # Map Telugu to English for internal logic
     telugu_to_english = {
@@ -1501,52 +1754,20 @@ def display_search_results_page():
     st.markdown(f'<div class="page-header">{category_names[st.session_state.current_category]}</div>', unsafe_allow_html=True)
     st.markdown(f'<div class="sub-header">{content_type_names[content_type_en]} - శోధన: "{st.session_state.search_query}"</div>', unsafe_allow_html=True)
 
-    # Display results
+    # Display results one page at a time
     if search_results:
-        # Display images in a centered layout
-        if content_type_en == 'images':
-            for img_data in search_results:
-                try:
-                    # Create a centered container for each image
-                    col1, col2, col3 = st.columns([1, 2, 1])
-                    with col2:
-                        st.image(
-                            img_data['path'],
-                            use_column_width=True
-                        )
-                        # Show source indicator
-                        if img_data.get('source') == 'swecha_api':
-                            st.info("🌐 Swecha API నుండి")
-                        else:
-                            st.info("💾 లోకల్ డేటా నుండి")
-                except Exception as e:
-                    st.error(f"చిత్రాన్ని ప్రదర్శించడంలో లోపం: {e}")
-
-        # Display texts
-        elif content_type_en == 'texts':
-            for text_data in search_results:
-                # Center text content
-                col1, col2, col3 = st.columns([1, 3, 1])
-                with col2:
-                    st.write(text_data['content'])
-                    # Show source indicator
-                    if text_data.get('source') == 'swecha_api':
-                        st.info("🌐 Swecha API నుండి")
-                    else:
-                        st.info("💾 లోకల్ డేటా నుండి")
-
-        # Display videos
-        elif content_type_en == 'videos':
-            for video_data in search_results:
-                # Center video content
-                col1, col2, col3 = st.columns([1, 2, 1])
-                with col2:
-                    st.video(video_data['path'])
-                    # Show source indicator
-                    if video_data.get('source') == 'swecha_api':
-                        st.info("🌐 Swecha API నుండి")
-                    else:
-                        st.info("💾 లోకల్ డేటా నుండి")
+        results_key = (st.session_state.current_category, content_type_en, st.session_state.search_query)
+        page_results = get_result_page(search_results, results_key)
+        next_cursor = st.session_state.results_cursor + st.session_state.results_page_size
+        prefetch_results([(st.session_state.current_category, content_type_en, item) for item in
+                          search_results[next_cursor:next_cursor + st.session_state.results_page_size]],
+                         st.session_state.search_query)
+
+        for position, item in enumerate(page_results, st.session_state.results_cursor):
+            display_result_item(item, content_type_en, st.session_state.current_category, st.session_state.search_query,
+                                position)
+
+        display_pagination(len(search_results))
     else:
         st.warning(f"'{st.session_state.search_query}' కోసం {category_names[st.session_state.current_category]}లో {content_type_names[content_type_en]} కనుగొనబడలేదు.")
 
@@ -1557,6 +1778,93 @@ def display_search_results_page():
         st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)
 
+def display_search_all_page():
+    # Map English categories and content types to Telugu
+    category_names = {
+        "monuments": "స్మారకాలు",
+        "culture": "సంస్కృతి",
+        "traditions": "సంప్రదాయాలు",
+        "folktales": "జానపద కథలు"
+    }
+
+    content_type_names = {
+        "images": "చిత్రాలు",
+        "videos": "వీడియోలు",
+        "texts": "టెక్స్ట్ ఫైల్స్"
+    }
+
+    set_background_image(r"C:\Users\DELL\OneDrive\Desktop\streamlit app\background\background_image.jpg")
+
+    st.markdown('<div class="page-header">అన్నిటిలో శోధన</div>', unsafe_allow_html=True)
+
+    st.markdown('<div class="search-container">', unsafe_allow_html=True)
+    search_query = st.text_input(
+        "వెతకండి:",
+        value=st.session_state.search_all_query,
+        placeholder="అన్ని విభాగాలు మరియు కంటెంట్ రకాలలో వెతకండి...",
+        key="search_all_input"
+    )
+    st.markdown('</div>', unsafe_allow_html=True)
+    st.session_state.fuzzy_search = st.checkbox(
+        "అక్షర దోషాలతో కూడా వెతకండి",
+        value=st.session_state.fuzzy_search,
+        key="search_all_fuzzy_checkbox",
+        help="వేరే స్పెల్లింగ్‌లు మరియు చిన్న అక్షర దోషాలు ఉన్న పదాలను కూడా కనుగొంటుంది"
+    )
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        if st.button("శోధన", use_container_width=True, key="search_all_button"):
+            st.session_state.search_all_query = search_query
+            st.rerun()
+
+    if st.session_state.search_all_query.strip():
+        # Facet filters from the previous run narrow the search; an empty selection means all
+        categories = st.session_state.get("facet_categories", [])
+        content_types = st.session_state.get("facet_content_types", [])
+        hits, facets = get_search_all_results(st.session_state.search_all_query, categories, content_types)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.multiselect(
+                "విభాగాలు",
+                CATEGORIES,
+                format_func=lambda category: f"{category_names[category]} ({facets['category'].get(category, 0)})",
+                key="facet_categories",
+                placeholder="అన్ని విభాగాలు"
+            )
+        with col2:
+            st.multiselect(
+                "కంటెంట్ రకాలు",
+                CONTENT_TYPES,
+                format_func=lambda content_type: f"{content_type_names[content_type]} ({facets['content_type'].get(content_type, 0)})",
+                key="facet_content_types",
+                placeholder="అన్ని రకాలు"
+            )
+
+        if hits:
+            results_key = ('*', st.session_state.search_all_query, tuple(categories), tuple(content_types))
+            page_hits = get_result_page(hits, results_key)
+            next_cursor = st.session_state.results_cursor + st.session_state.results_page_size
+            prefetch_results(hits[next_cursor:next_cursor + st.session_state.results_page_size],
+                             st.session_state.search_all_query)
+
+            for position, (category, content_type, item) in enumerate(page_hits, st.session_state.results_cursor):
+                st.markdown(f'<div class="sub-header">{category_names.get(category, "Swecha API")} - '
+                            f'{content_type_names[content_type]}: {item["name"]}</div>', unsafe_allow_html=True)
+                display_result_item(item, content_type, category, st.session_state.search_all_query, position)
+
+            display_pagination(len(hits))
+        else:
+            st.warning(f"'{st.session_state.search_all_query}' కోసం ఫలితాలు కనుగొనబడలేదు.")
+
+    st.markdown('<div class="centered-button">', unsafe_allow_html=True)
+    if st.button("← వెనక్కి", key="back_from_search_all", use_container_width=True):
+        st.session_state.show_search_all = False
+        st.session_state.search_all_query = ""
+        st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+
 def display_riddles_page():
     # Set background for riddles page
     set_background_image(r"C:\Users\DELL\OneDrive\Desktop\streamlit app\background\background_image.jpg")
@@ -1638,6 +1946,14 @@ def display_api_status():
     # API URL
     st.text_input("API URL", value=swecha_client.base_url, disabled=True)
     
+    # Query cache counters
+    st.markdown('<h3 style="text-align: center; color: #5D4037; margin-bottom: 20px;">శోధన కాష్</h3>', unsafe_allow_html=True)
+    st.json(load_query_cache().stats())
+    
+    # Request, retry, timeout and connection pool counters of the API client
+    st.markdown('<h3 style="text-align: center; color: #5D4037; margin-bottom: 20px;">API అభ్యర్థనల గణాంకాలు</h3>', unsafe_allow_html=True)
+    st.json(swecha_client.metrics())
+    
     # Toggle API usage
     st.session_state.use_swecha_api = st.checkbox(
         "Swecha API ని ఉపయోగించండి",
@@ -1652,12 +1968,15 @@ def display_api_status():
     
     with col1:
         if st.button("🔍 శోధన టెస్ట్", use_container_width=True):
-            test_results = get_swecha_search_results("telugu", limit=5)
-            if test_results:
-                st.success(f"శోధన టెస్ట్ విజయవంతం! {len(test_results)} ఫలితాలు కనుగొనబడ్డాయి")
-                st.json(test_results[:2])  # Show first 2 results
-            else:
-                st.warning("శోధన టెస్ట్ విఫలం")
+            try:
+                test_results = get_swecha_search_results("telugu", limit=5)
+                if test_results:
+                    st.success(f"శోధన టెస్ట్ విజయవంతం! {len(test_results)} ఫలితాలు కనుగొనబడ్డాయి")
+                    st.json(test_results[:2])  # Show first 2 results
+                else:
+                    st.warning("శోధన టెస్ట్ విఫలం")
+            except Exception as e:
+                st.error(f"శోధన టెస్ట్ లోపం: {str(e)}")
     
     with col2:
         if st.button("📤 అప్‌లోడ్ టెస్ట్", use_container_width=True):
@@ -1825,55 +2144,55 @@ def display_upload_section():
         # Upload button
         st.markdown('<div class="centered-button">', unsafe_allow_html=True)
         if st.button("అప్‌లోడ్ చేయండి", key="upload_confirm_button", use_container_width=True):
-            # Create directory if it doesn't exist
+            # Map the selections to the data/ folder names
             category_en = category_map[upload_category]
             content_type_en = "images" if upload_content_type == "చిత్రాలు" else \
                             "videos" if upload_content_type == "వీడియోలు" else "texts"
             
-            os.makedirs(f"data/{category_en}/{content_type_en}", exist_ok=True)
-            
-            # Save file with timestamp to avoid name conflicts
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_extension = uploaded_file.name.split('.')[-1]
-            file_name = f"{timestamp}.{file_extension}"
-            file_path = os.path.join(f"data/{category_en}/{content_type_en}", file_name)
-            
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Store one copy per distinct content (named by its SHA-256); the
+            # original file name is kept as an alias
+            file_path, already_archived = store_upload(uploaded_file, category_en, content_type_en)
+
+            if already_archived:
+                # Same content is already stored: skip indexing and the Swecha upload
+                st.info(f"ఈ ఫైల్ ఇప్పటికే ఆర్కైవ్‌లో ఉంది (already archived): {os.path.basename(file_path)}")
+            else:
+                # Make the new file searchable right away
+                load_cultural_data().ingest_file(file_path)
             
-            # Also try to upload to Swecha API if enabled
-            if st.session_state.use_swecha_api:
-                try:
-                    if swecha_client.health_check():
-                        # Prepare metadata for Swecha API
-                        metadata = {
-                            "title": uploaded_file.name,
-                            "description": f"Uploaded content for {upload_category} - {upload_content_type}",
-                            "language": "te",  # Telugu
-                            "tags": [upload_category, upload_content_type, "telugu", "cultural_heritage"]
-                        }
+                # Also try to upload to Swecha API if enabled
+                if st.session_state.use_swecha_api:
+                    try:
+                        if swecha_client.health_check():
+                            # Prepare metadata for Swecha API
+                            metadata = {
+                                "title": uploaded_file.name,
+                                "description": f"Uploaded content for {upload_category} - {upload_content_type}",
+                                "language": "te",  # Telugu
+                                "tags": [upload_category, upload_content_type, "telugu", "cultural_heritage"]
+                            }
                         
-                        # Upload to Swecha API
-                        swecha_success = upload_to_swecha(
-                            file_path=file_path,
-                            category=category_en,
-                            content_type=content_type_en,
-                            metadata=metadata
-                        )
+                            # Upload to Swecha API
+                            swecha_success = upload_to_swecha(
+                                file_path=file_path,
+                                category=category_en,
+                                content_type=content_type_en,
+                                metadata=metadata
+                            )
                         
-                        if swecha_success:
-                            st.success("ఫైల్ విజయవంతంగా అప్‌లోడ్ చేయబడింది (లోకల్ మరియు Swecha API)")
+                            if swecha_success:
+                                st.success("ఫైల్ విజయవంతంగా అప్‌లోడ్ చేయబడింది (లోకల్ మరియు Swecha API)")
+                            else:
+                                st.warning("ఫైల్ లోకల్‌గా అప్‌లోడ్ చేయబడింది, కానీ Swecha API కి అప్‌లోడ్ చేయలేకపోయాము")
                         else:
-                            st.warning("ఫైల్ లోకల్‌గా అప్‌లోడ్ చేయబడింది, కానీ Swecha API కి అప్‌లోడ్ చేయలేకపోయాము")
-                    else:
-                        st.warning("Swecha API అందుబాటులో లేదు. ఫైల్ లోకల్‌గా మాత్రమే అప్‌లోడ్ చేయబడింది.")
-                except Exception as e:
-                    st.warning(f"ఫైల్ లోకల్‌గా అప్‌లోడ్ చేయబడింది, కానీ Swecha API కి అప్‌లోడ్ చేయలేకపోయాము: {str(e)}")
-            else:
-                st.info("Swecha API నిష్క్రియం చేయబడింది. ఫైల్ లోకల్‌గా మాత్రమే అప్‌లోడ్ చేయబడింది.")
+                            st.warning("Swecha API అందుబాటులో లేదు. ఫైల్ లోకల్‌గా మాత్రమే అప్‌లోడ్ చేయబడింది.")
+                    except Exception as e:
+                        st.warning(f"ఫైల్ లోకల్‌గా అప్‌లోడ్ చేయబడింది, కానీ Swecha API కి అప్‌లోడ్ చేయలేకపోయాము: {str(e)}")
+                else:
+                    st.info("Swecha API నిష్క్రియం చేయబడింది. ఫైల్ లోకల్‌గా మాత్రమే అప్‌లోడ్ చేయబడింది.")
             
-            # Show success message
-            st.markdown('<div class="success-message">ఫైల్ విజయవంతంగా అప్‌లోడ్ చేయబడింది!</div>', unsafe_allow_html=True)
+                # Show success message
+                st.markdown('<div class="success-message">ఫైల్ విజయవంతంగా అప్‌లోడ్ చేయబడింది!</div>', unsafe_allow_html=True)
             
             # Add a back button after successful upload
             st.markdown('<div class="centered-button">', unsafe_allow_html=True)
@@ -1944,7 +2263,7 @@ def display_main_page():
 
     # Upload, Riddles, and API Status buttons below the category buttons
     st.markdown('<div class="upload-button-container">', unsafe_allow_html=True)
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         if st.button("ఫైల్ అప్‌లోడ్ చేయండి", key="upload_button", use_container_width=True):
             st.session_state.show_upload = True
@@ -1957,6 +2276,10 @@ def display_main_page():
         if st.button("🔌 API స్థితి", key="api_status_button", use_container_width=True):
             st.session_state.show_api_status = True
             st.rerun()
+    with col4:
+        if st.button("🔎 అన్నిటిలో శోధన", key="search_all_page_button", use_container_width=True):
+            st.session_state.show_search_all = True
+            st.rerun()
     st.markdown('</div>', unsafe_allow_html=True)  # Close upload-button-container
 
     st.markdown('</div>', unsafe_allow_html=True)  # Close button-grid-container
@@ -1966,10 +2289,13 @@ def main():
     # Load data and models
     if not st.session_state.data_loaded:
         with st.spinner("డేటా మరియు మోడల్స్ లోడ్ అవుతున్నాయి..."):
-            st.session_state.cultural_data = load_cultural_data()
+            load_cultural_data()
             st.session_state.text_model, st.session_state.text_vectorizer = load_text_assets()
             st.session_state.data_loaded = True
 
+    # Take this rerun's snapshot of the shared corpus (includes files added since the last rerun)
+    st.session_state.cultural_data = load_cultural_data().snapshot()
+
     # Display appropriate page based on session state
     if st.session_state.show_upload:
         display_upload_section()
@@ -1977,6 +2303,8 @@ def main():
         display_riddles_page()
     elif st.session_state.show_api_status:
         display_api_status()
+    elif st.session_state.show_search_all:
+        display_search_all_page()
     elif st.session_state.content_page:
         if st.session_state.show_results:
             display_search_results_page()
@@ -0,0 +1,509 @@
+"""
+Micro-benchmarks for the corpus loading and search paths.
+
+Run one benchmark at a time, e.g.:
+
+    python benchmarks.py scan --files 40 --workers 4
+
+Each benchmark builds its own synthetic corpus in a temporary folder, so
+nothing under data/ is touched.
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import unicodedata
+
+import numpy as np
+
+from local_utils import CATEGORIES
+
+
+def _best_time(fn, repeat=3):
+    """Best wall-clock time of fn() over repeat runs, plus the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def build_synthetic_corpus(base_path, files_per_folder, video_frames=48, seed=0):
+    """Write a categories x (images, texts, videos) tree of small synthetic files"""
+    import cv2
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    for category in CATEGORIES:
+        for folder in ('images', 'texts', 'videos'):
+            os.makedirs(os.path.join(base_path, category, folder), exist_ok=True)
+
+        for i in range(files_per_folder):
+            pixels = rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(os.path.join(base_path, category, 'images', f'image_{i}.png'))
+
+            with open(os.path.join(base_path, category, 'texts', f'text_{i}.txt'), 'w', encoding='utf-8') as f:
+                f.write(f"{category} కథ సంఖ్య {i} తెలుగు సాంస్కృతిక వారసత్వం\n" * 200)
+
+            writer = cv2.VideoWriter(
+                os.path.join(base_path, category, 'videos', f'video_{i}.mp4'),
+                cv2.VideoWriter_fourcc(*'mp4v'), 24, (64, 48)
+            )
+            for _ in range(video_frames):
+                writer.write(rng.integers(0, 255, (48, 64, 3), dtype=np.uint8))
+            writer.release()
+
+
+def bench_scan(args):
+    """Serial vs parallel cold scan of a 4-category x 3-type tree"""
+    from local_utils import scan_corpus
+
+    base_path = tempfile.mkdtemp(prefix='liora_bench_')
+    try:
+        build_synthetic_corpus(base_path, args.files)
+        total = len(CATEGORIES) * 3 * args.files
+        print(f"Corpus: {total} files in {base_path}")
+
+        serial_time, serial_data = _best_time(
+            lambda: scan_corpus(base_path, use_manifest=False, workers=1)[0], args.repeat)
+        parallel_time, parallel_data = _best_time(
+            lambda: scan_corpus(base_path, use_manifest=False, workers=args.workers)[0], args.repeat)
+
+        parallel_label = f"parallel ({args.workers} workers)"
+        print(f"{'serial':<22}: {serial_time * 1000:8.1f} ms")
+        print(f"{parallel_label:<22}: {parallel_time * 1000:8.1f} ms")
+        print(f"{'speedup':<22}: {serial_time / parallel_time:8.2f}x")
+        print(f"{'identical results':<22}: {serial_data == parallel_data}")
+    finally:
+        shutil.rmtree(base_path, ignore_errors=True)
+
+
+def bench_video_probe(args):
+    """OpenCV probe vs header-only MP4 probe per video"""
+    from video_probe import probe_video, probe_mp4_header
+
+    base_path = tempfile.mkdtemp(prefix='liora_bench_')
+    try:
+        build_synthetic_corpus(base_path, args.files, video_frames=args.frames)
+        videos = [
+            os.path.join(base_path, category, 'videos', name)
+            for category in CATEGORIES
+            for name in sorted(os.listdir(os.path.join(base_path, category, 'videos')))
+        ]
+
+        opencv_time, opencv_meta = _best_time(lambda: [probe_video(path) for path in videos], args.repeat)
+        header_time, header_meta = _best_time(lambda: [probe_mp4_header(path) for path in videos], args.repeat)
+
+        print(f"{len(videos)} videos, {args.frames} frames each")
+        print(f"{'opencv':<22}: {opencv_time / len(videos) * 1e6:8.1f} us/video")
+        print(f"{'header-only':<22}: {header_time / len(videos) * 1e6:8.1f} us/video")
+        print(f"{'speedup':<22}: {opencv_time / header_time:8.2f}x")
+        print(f"{'identical results':<22}: {opencv_meta == header_meta}")
+    finally:
+        shutil.rmtree(base_path, ignore_errors=True)
+
+
+def _claim_unique_path(directory, file_name):
+    """
+    Atomically create an empty file named file_name (or name_1, name_2, ...)
+    in directory and return its path, the per-upload name claim timed below
+    """
+    os.makedirs(directory, exist_ok=True)
+    base_name, extension = os.path.splitext(file_name)
+    counter = 0
+    while True:
+        candidate = file_name if counter == 0 else f"{base_name}_{counter}{extension}"
+        path = os.path.join(directory, candidate)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            counter += 1
+
+
+def bench_layout(args):
+    """Flat vs hash-sharded folder: full listing and per-upload name claiming"""
+    from local_utils import _list_folder
+    from storage_layout import shard_dir
+
+    for count in [int(size) for size in args.sizes.split(',')]:
+        base_path = tempfile.mkdtemp(prefix='liora_bench_')
+        try:
+            names = [f"{i:08d}.jpg" for i in range(count)]
+            flat_dir = os.path.join(base_path, 'flat')
+            sharded_dir = os.path.join(base_path, 'sharded')
+            os.makedirs(flat_dir)
+            for name in names:
+                open(os.path.join(flat_dir, name), 'wb').close()
+                target_dir = shard_dir(sharded_dir, name)
+                os.makedirs(target_dir, exist_ok=True)
+                open(os.path.join(target_dir, name), 'wb').close()
+
+            flat_list, flat_files = _best_time(lambda: _list_folder(flat_dir, ('.jpg',)), args.repeat)
+            sharded_list, sharded_files = _best_time(lambda: _list_folder(sharded_dir, ('.jpg',)), args.repeat)
+
+            # Claim names that already exist, as repeated uploads of the same name do
+            probes = names[:args.claims]
+            flat_claim, _ = _best_time(
+                lambda: [os.remove(_claim_unique_path(flat_dir, name)) for name in probes], 1)
+            sharded_claim, _ = _best_time(
+                lambda: [os.remove(_claim_unique_path(shard_dir(sharded_dir, name), name)) for name in probes], 1)
+
+            assert len(flat_files) == len(sharded_files) == count
+            print(f"{count:>9} files | list flat {flat_list * 1000:9.1f} ms  sharded {sharded_list * 1000:9.1f} ms"
+                  f" | claim flat {flat_claim / len(probes) * 1e6:7.1f} us  sharded {sharded_claim / len(probes) * 1e6:7.1f} us")
+        finally:
+            shutil.rmtree(base_path, ignore_errors=True)
+
+
+def build_telugu_documents(count, words_per_doc=200, seed=0, topics=0):
+    """
+    Synthetic Telugu documents: random stems (with conjuncts) plus case
+    suffixes. With topics > 0 every document also draws half of its words
+    from the stems of one topic, so documents have real neighbours.
+    """
+    rng = np.random.default_rng(seed)
+    consonants = [chr(code) for code in range(0x0C15, 0x0C3A) if unicodedata.category(chr(code)) == 'Lo']
+    vowel_signs = ['', '\u0C3E', '\u0C3F', '\u0C40', '\u0C41', '\u0C46', '\u0C47', '\u0C4A', '\u0C02']
+    suffixes = ['', '', 'లో', 'కు', 'ని', 'లు', 'తో', 'ల్లో']
+
+    def akshara():
+        cluster = rng.choice(consonants)
+        if rng.random() < 0.2:
+            cluster += '\u0C4D' + rng.choice(consonants)
+        return cluster + rng.choice(vowel_signs)
+
+    stems = [''.join(akshara() for _ in range(rng.integers(2, 5))) for _ in range(2000)]
+    # Zipf-like stem frequencies, as in natural text
+    weights = 1.0 / np.arange(1, len(stems) + 1)
+    weights /= weights.sum()
+    if not topics:
+        return [
+            ' '.join(stems[stem] + rng.choice(suffixes) for stem in rng.choice(len(stems), words_per_doc, p=weights))
+            for _ in range(count)
+        ]
+
+    topic_stems = np.array_split(rng.permutation(len(stems)), topics)
+    documents = []
+    for _ in range(count):
+        topic_words = rng.choice(topic_stems[rng.integers(topics)], words_per_doc // 2)
+        background_words = rng.choice(len(stems), words_per_doc - topic_words.size, p=weights)
+        chosen = np.concatenate([topic_words, background_words])
+        rng.shuffle(chosen)
+        documents.append(' '.join(stems[stem] + rng.choice(suffixes) for stem in chosen))
+    return documents
+
+
+def bench_analyzer(args):
+    """Default \\w\\w+ token pattern vs the Telugu analyzer: vocabulary, nnz, throughput"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from telugu_text import TeluguAnalyzer
+
+    if args.data:
+        from local_utils import get_text_content, scan_corpus
+        data_dict, _ = scan_corpus(args.data, use_manifest=False)
+        documents = [get_text_content(item) for content in data_dict.values() for item in content['texts']]
+    else:
+        documents = build_telugu_documents(args.docs)
+    megabytes = sum(len(document.encode('utf-8')) for document in documents) / 1e6
+    print(f"{len(documents)} documents, {megabytes:.1f} MB")
+
+    variants = [
+        ('default \\w\\w+', lambda: TfidfVectorizer()),
+        ('telugu words', lambda: TfidfVectorizer(analyzer=TeluguAnalyzer())),
+        ('telugu words+akshara 2-3', lambda: TfidfVectorizer(analyzer=TeluguAnalyzer(grapheme_ngram_range=(2, 3)))),
+    ]
+    for label, make_vectorizer in variants:
+        seconds, matrix = _best_time(lambda: make_vectorizer().fit_transform(documents), args.repeat)
+        vocabulary = matrix.shape[1]
+        print(f"{label:<26}: vocab {vocabulary:>8}  nnz {matrix.nnz:>10}  {megabytes / seconds:7.2f} MB/s")
+
+
+def bench_ann(args):
+    """Exact semantic search vs the IVF index: recall@k, QPS, build time, mmap reload"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import normalize
+    from ann_index import IVFIndex, top_k_indices
+    from telugu_text import TeluguAnalyzer
+
+    documents = build_telugu_documents(args.docs, words_per_doc=args.doc_words, topics=args.topics)
+    rng = np.random.default_rng(1)
+    queries = []
+    for i in rng.choice(len(documents), args.queries, replace=False):
+        words = documents[i].split()
+        start = rng.integers(0, max(1, len(words) - args.query_words))
+        queries.append(' '.join(words[start:start + args.query_words]))
+
+    vectorizer = TfidfVectorizer(analyzer=TeluguAnalyzer(), max_features=args.features).fit(documents)
+    matrix = normalize(vectorizer.transform(documents)).astype(np.float32).tocsr()
+    query_vectors = normalize(vectorizer.transform(queries)).astype(np.float32).tocsr()
+    columns = matrix.tocsc()
+    print(f"{args.docs} documents, {matrix.shape[1]} features, {args.queries} queries of {args.query_words} words")
+
+    def exact(query_vector):
+        scores = np.asarray(columns[:, query_vector.indices] @ query_vector.data).ravel()
+        return top_k_indices(scores, args.k)
+
+    exact_time, truth = _best_time(lambda: [exact(query_vectors[i]) for i in range(args.queries)], args.repeat)
+    print(f"{'exact':<16}: {args.queries / exact_time:9.1f} QPS")
+
+    def recall(results):
+        return np.mean([len(set(found) & set(expected)) / max(1, len(expected))
+                        for found, expected in zip(results, truth)])
+
+    build_time, index = _best_time(lambda: IVFIndex(args.clusters).build(matrix), 1)
+    print(f"{'ivf build':<16}: {build_time:9.2f} s, {index.centroids.shape[0]} clusters")
+    for n_probe in [int(value) for value in args.probes.split(',')]:
+        query_time, results = _best_time(
+            lambda: [index.query(query_vectors[i], args.k, n_probe=n_probe)[0] for i in range(args.queries)],
+            args.repeat)
+        label = f"ivf probe {n_probe}"
+        print(f"{label:<16}: {args.queries / query_time:9.1f} QPS  recall@{args.k} {recall(results):.3f}"
+              f"  speedup {exact_time / query_time:5.2f}x")
+
+    save_dir = tempfile.mkdtemp(prefix='liora_bench_')
+    try:
+        index.save(save_dir)
+        load_time, mapped = _best_time(lambda: IVFIndex.load(save_dir, mmap=True), 1)
+        mapped_results = [mapped.query(query_vectors[i], args.k, n_probe=n_probe)[0] for i in range(args.queries)]
+        same = all(np.array_equal(a, b) for a, b in zip(results, mapped_results))
+        print(f"{'mmap reload':<16}: {load_time * 1000:9.1f} ms  identical results: {same}")
+    finally:
+        shutil.rmtree(save_dir, ignore_errors=True)
+
+
+def bench_image_hash(args):
+    """Query-by-image: hashing cost per image, index build, vectorized vs per-image Hamming scan"""
+    from PIL import Image
+    from image_hash import ImageHashIndex, compute_hashes, hamming_distances
+
+    rng = np.random.default_rng(0)
+    image_dir = tempfile.mkdtemp(prefix='liora_bench_')
+    try:
+        paths = []
+        for i in range(args.sample):
+            pixels = rng.integers(0, 255, (12, 16, 3), dtype=np.uint8)
+            path = os.path.join(image_dir, f'image_{i}.jpg')
+            Image.fromarray(pixels).resize((640, 480), Image.BICUBIC).save(path, quality=85)
+            paths.append(path)
+        hash_time, _ = _best_time(lambda: [compute_hashes(path) for path in paths], args.repeat)
+        print(f"{'hash at ingest':<20}: {hash_time / len(paths) * 1000:8.2f} ms/image (640x480 JPEG)")
+        with Image.open(paths[0]) as query_image:
+            query_image.load()
+    finally:
+        shutil.rmtree(image_dir, ignore_errors=True)
+
+    # The archive itself only needs hashes, so it is synthetic
+    hashes = rng.integers(0, 2 ** 63, (args.images, 2), dtype=np.int64).view(np.uint64)
+    entries = [{'path': f'image_{i}.jpg', 'name': f'image_{i}.jpg',
+                'phash': f'{int(p):016x}', 'dhash': f'{int(d):016x}'} for i, (p, d) in enumerate(hashes)]
+    index = ImageHashIndex(CATEGORIES)
+    build_time, _ = _best_time(lambda: [index.add_entry(CATEGORIES[i % len(CATEGORIES)], 'images', entry)
+                                        for i, entry in enumerate(entries)], 1)
+    print(f"{args.images} images: index build {build_time:.2f} s, "
+          f"{(index._phash.nbytes + index._dhash.nbytes) / 1e6:.1f} MB of hashes")
+
+    queries = [(int(p), int(d)) for p, d in hashes[rng.choice(args.images, args.queries)]]
+    phashes, dhashes = [int(h) for h in hashes[:, 0]], [int(h) for h in hashes[:, 1]]
+
+    def python_scan(query):
+        query_phash, query_dhash = query
+        return sorted(range(len(phashes)), key=lambda i: bin(phashes[i] ^ query_phash).count('1') +
+                      bin(dhashes[i] ^ query_dhash).count('1'))[:args.k]
+
+    def numpy_scan(query):
+        distances = hamming_distances(hashes[:, 0], query[0]) + hamming_distances(hashes[:, 1], query[1])
+        return np.argpartition(distances, args.k)[:args.k]
+
+    loop_queries = queries[:max(1, args.queries // 20)]
+    loop_time, _ = _best_time(lambda: [python_scan(query) for query in loop_queries], 1)
+    print(f"{'python loop':<20}: {loop_time / len(loop_queries) * 1000:8.2f} ms/query")
+    scan_time, _ = _best_time(lambda: [numpy_scan(query) for query in queries], args.repeat)
+    print(f"{'xor + popcount':<20}: {scan_time / len(queries) * 1000:8.2f} ms/query  "
+          f"speedup {loop_time / len(loop_queries) / (scan_time / len(queries)):6.1f}x")
+    search_time, _ = _best_time(lambda: [index.search(query_image, args.k) for _ in range(args.queries)], args.repeat)
+    print(f"{'search (with query hash)':<20}: {search_time / args.queries * 1000:8.2f} ms/query")
+
+
+def bench_fuzzy(args):
+    """Fuzzy keyword search: exact vs misspelled query latency, trigram pruning vs a vocabulary scan"""
+    from fuzzy_index import edit_distance, max_edits
+    from search_index import InvertedIndex
+    from telugu_text import graphemes, phonetic_key
+
+    documents = build_telugu_documents(args.docs)
+    index = InvertedIndex()
+    build_time, _ = _best_time(lambda: [
+        index.add_entry('culture', 'texts', {'path': f'text_{i}.txt', 'name': f'text_{i}.txt', 'content': document})
+        for i, document in enumerate(documents)], 1)
+    stats = index.stats()
+    print(f"{args.docs} documents: index build {build_time:.2f} s, {stats['phonetic_keys']} phonetic keys")
+
+    # Typical spelling slips: a vowel sign swapped, an anusvara added or dropped, one letter lost
+    rng = np.random.default_rng(2)
+    vocabulary = sorted({word for document in documents[:200] for word in document.split()
+                         if len(graphemes(word)) >= 4})
+    originals = [vocabulary[i] for i in rng.choice(len(vocabulary), args.queries, replace=False)]
+    vowel_signs = [chr(code) for code in range(0x0C3E, 0x0C4D) if unicodedata.category(chr(code)) in ('Mn', 'Mc')]
+    misspelled = []
+    for word in originals:
+        characters = list(word)
+        position = rng.integers(len(characters))
+        slip = rng.integers(3)
+        if slip == 0 and characters[position] in vowel_signs:
+            characters[position] = vowel_signs[rng.integers(len(vowel_signs))]
+        elif slip == 1:
+            characters.insert(position + 1, '\u0C02')
+        else:
+            del characters[position]
+        misspelled.append(''.join(characters))
+
+    exact_time, _ = _best_time(lambda: [index.rank(word, top_k=args.k) for word in originals], args.repeat)
+    print(f"{'exact':<20}: {exact_time / args.queries * 1000:8.3f} ms/query")
+    fuzzy_time, _ = _best_time(lambda: [index.rank(word, top_k=args.k, fuzzy=True) for word in misspelled],
+                               args.repeat)
+    print(f"{'fuzzy, misspelled':<20}: {fuzzy_time / args.queries * 1000:8.3f} ms/query")
+
+    keys = list(index._variants)
+
+    def scan(word):
+        key = phonetic_key(word)
+        return [other for other in keys if edit_distance(key, other, max_edits(key)) <= max_edits(key)]
+
+    scan_queries = misspelled[:max(1, args.queries // 10)]
+    scan_time, _ = _best_time(lambda: [scan(word) for word in scan_queries], 1)
+    print(f"{'vocabulary scan':<20}: {scan_time / len(scan_queries) * 1000:8.3f} ms/query (lookup only)")
+
+    found = sum(original in index.query_variants(word, fuzzy=True) or phonetic_key(original) == phonetic_key(word)
+                for original, word in zip(originals, misspelled))
+    print(f"misspelled queries reaching the original word: {found}/{args.queries}")
+
+
+def bench_suggest(args):
+    """Prefix suggestions: build time and lookup latency by prefix length vs filtering the name list"""
+    from suggest import PrefixSuggester
+    from telugu_text import normalize
+
+    documents = build_telugu_documents(args.items, words_per_doc=args.doc_words)
+    names = [' '.join(document.split()[:3]) for document in documents]
+    suggester = PrefixSuggester()
+    build_time, _ = _best_time(lambda: [
+        suggester.add_entry('culture', 'texts', {'path': f'text_{i}.txt', 'name': f'{name}.txt', 'content': document})
+        for i, (name, document) in enumerate(zip(names, documents))], 1)
+    first_time, _ = _best_time(lambda: suggester.suggest('x', 'culture', 'texts'), 1)
+    print(f"{args.items} items, {suggester.stats()['suggestions']} suggestions: "
+          f"listener {build_time:.2f} s, sorted arrays {first_time:.2f} s")
+
+    rng = np.random.default_rng(3)
+    samples = [names[i] for i in rng.choice(len(names), args.queries)]
+    for length in (1, 2, 3, 5, 8):
+        prefixes = [name[:length] for name in samples]
+        lookup_time, _ = _best_time(lambda: [suggester.suggest(prefix, 'culture', 'texts') for prefix in prefixes],
+                                    args.repeat)
+        print(f"prefix of {length} chars  : {lookup_time / len(prefixes) * 1000:8.3f} ms/lookup")
+
+    scan_prefixes = [name[:3] for name in samples[:20]]
+    scan_time, _ = _best_time(lambda: [[name for name in names if normalize(name).startswith(prefix)]
+                                       for prefix in scan_prefixes], 1)
+    print(f"{'name list scan':<20}: {scan_time / len(scan_prefixes) * 1000:8.3f} ms/lookup")
+
+
+def bench_snippet(args):
+    """Result snippets: bytes rendered and time per hit vs the full text, index build cost of the passage offsets"""
+    from search_index import InvertedIndex, analyze_content
+    from telugu_text import word_tokens
+
+    documents = build_telugu_documents(args.docs, words_per_doc=args.doc_words)
+    entries = [{'path': f'text_{i}.txt', 'name': f'text_{i}.txt', 'content': document}
+               for i, document in enumerate(documents)]
+    index = InvertedIndex()
+    build_time, _ = _best_time(lambda: [index.add_entry('culture', 'texts', entry) for entry in entries], 1)
+    print(f"{args.docs} documents of {args.doc_words} words: index build {build_time:.2f} s, "
+          f"{index.stats()['passages']} passages")
+    tokens_time, _ = _best_time(lambda: [word_tokens(document) for document in documents], args.repeat)
+    analyze_time, _ = _best_time(lambda: [analyze_content(document) for document in documents], args.repeat)
+    print(f"tokenizing: {tokens_time:.2f} s tokens only, {analyze_time:.2f} s with passage offsets")
+
+    rng = np.random.default_rng(4)
+    queries = [' '.join(rng.choice(documents[i].split(), 2)) for i in rng.choice(len(documents), args.queries)]
+    hits = [[entry for entry, _ in index.rank(query, top_k=args.k)] for query in queries]
+    snippet_time, snippets = _best_time(lambda: [[index.snippet(query, entry, 'culture') for entry in page]
+                                                 for query, page in zip(queries, hits)], args.repeat)
+    pages = sum(len(page) for page in hits)
+    snippet_bytes = sum(len(snippet['text'].encode('utf-8')) for page in snippets for snippet in page)
+    full_bytes = sum(len(entry['content'].encode('utf-8')) for page in hits for entry in page)
+    print(f"{'snippet':<10}: {snippet_time / pages * 1000:7.3f} ms/hit  {snippet_bytes / pages:8.0f} bytes/hit")
+    print(f"{'full text':<10}: {'':>15}  {full_bytes / pages:8.0f} bytes/hit")
+
+
+BENCHMARKS = {
+    'scan': (bench_scan, lambda p: (
+        p.add_argument('--files', type=int, default=40, help='Files per category/type folder'),
+        p.add_argument('--workers', type=int, default=os.cpu_count() or 4),
+    )),
+    'video-probe': (bench_video_probe, lambda p: (
+        p.add_argument('--files', type=int, default=10, help='Videos per category'),
+        p.add_argument('--frames', type=int, default=240, help='Frames per video'),
+    )),
+    'layout': (bench_layout, lambda p: (
+        p.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated file counts'),
+        p.add_argument('--claims', type=int, default=1000, help='Name claims timed per layout'),
+    )),
+    'analyzer': (bench_analyzer, lambda p: (
+        p.add_argument('--docs', type=int, default=2000, help='Synthetic documents'),
+        p.add_argument('--data', help='Use the texts of this corpus folder instead'),
+    )),
+    'ann': (bench_ann, lambda p: (
+        p.add_argument('--docs', type=int, default=20000, help='Synthetic documents'),
+        p.add_argument('--doc-words', type=int, default=60),
+        p.add_argument('--queries', type=int, default=200),
+        p.add_argument('--query-words', type=int, default=10),
+        p.add_argument('--k', type=int, default=10),
+        p.add_argument('--topics', type=int, default=50, help='Synthetic topics (0 = no topical structure)'),
+        p.add_argument('--features', type=int, default=None, help='Vectorizer max_features'),
+        p.add_argument('--clusters', type=int, default=None, help='IVF clusters (default sqrt(docs))'),
+        p.add_argument('--probes', default='1,2,4,8,16', help='Comma-separated n_probe settings'),
+    )),
+    'image-hash': (bench_image_hash, lambda p: (
+        p.add_argument('--images', type=int, default=100000, help='Hashed archive images'),
+        p.add_argument('--queries', type=int, default=200),
+        p.add_argument('--k', type=int, default=10),
+        p.add_argument('--sample', type=int, default=100, help='Real JPEGs hashed to time ingestion'),
+    )),
+    'suggest': (bench_suggest, lambda p: (
+        p.add_argument('--items', type=int, default=50000, help='Synthetic named texts'),
+        p.add_argument('--doc-words', type=int, default=20),
+        p.add_argument('--queries', type=int, default=500),
+    )),
+    'fuzzy': (bench_fuzzy, lambda p: (
+        p.add_argument('--docs', type=int, default=5000, help='Synthetic documents'),
+        p.add_argument('--queries', type=int, default=200),
+        p.add_argument('--k', type=int, default=10),
+    )),
+    'snippet': (bench_snippet, lambda p: (
+        p.add_argument('--docs', type=int, default=2000, help='Synthetic documents'),
+        p.add_argument('--doc-words', type=int, default=2000),
+        p.add_argument('--queries', type=int, default=200),
+        p.add_argument('--k', type=int, default=10, help='Hits per results page'),
+    )),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    for name, (fn, add_arguments) in BENCHMARKS.items():
+        subparser = subparsers.add_parser(name, help=fn.__doc__)
+        add_arguments(subparser)
+        subparser.set_defaults(func=fn)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
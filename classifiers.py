@@ -0,0 +1,131 @@
+"""
+PyTorch models behind the image, text and video classification features,
+and the dataset the text classifier is trained on. Kept out of local_utils
+so the corpus loaders and the headless search engine do not import torch.
+"""
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import Dataset
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from local_utils import load_text_content
+from telugu_text import TeluguAnalyzer
+
+# Simple CNN model for image classification
+class CulturalClassifier(nn.Module):
+    def __init__(self, num_classes=4):
+        super(CulturalClassifier, self).__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 32, kernel_size=3, padding=1),
+            nn.ReLU(),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+            nn.Conv2d(32, 64, kernel_size=3, padding=1),
+            nn.ReLU(),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+            nn.Conv2d(64, 128, kernel_size=3, padding=1),
+            nn.ReLU(),
+            nn.MaxPool2d(kernel_size=2, stride=2)
+        )
+        self.classifier = nn.Sequential(
+            nn.Linear(128 * 28 * 28, 512),
+            nn.ReLU(),
+            nn.Dropout(0.5),
+            nn.Linear(512, num_classes)
+        )
+    
+    def forward(self, x):
+        x = self.features(x)
+        x = x.view(x.size(0), -1)
+        x = self.classifier(x)
+        return x
+
+# Text classification model
+class TextClassifier(nn.Module):
+    def __init__(self, input_dim, hidden_dim, num_classes):
+        super(TextClassifier, self).__init__()
+        self.fc1 = nn.Linear(input_dim, hidden_dim)
+        self.relu = nn.ReLU()
+        self.dropout = nn.Dropout(0.5)
+        self.fc2 = nn.Linear(hidden_dim, num_classes)
+    
+    def forward(self, x):
+        x = self.fc1(x)
+        x = self.relu(x)
+        x = self.dropout(x)
+        x = self.fc2(x)
+        return x
+
+# Video classification model (using extracted frames)
+class VideoClassifier(nn.Module):
+    def __init__(self, num_classes=4):
+        super(VideoClassifier, self).__init__()
+        # Use the same architecture as image classifier
+        self.frame_classifier = CulturalClassifier(num_classes)
+    
+    def forward(self, x):
+        # x is a batch of videos, each represented by multiple frames
+        batch_size, num_frames, C, H, W = x.size()
+        x = x.view(batch_size * num_frames, C, H, W)
+        outputs = self.frame_classifier(x)
+        outputs = outputs.view(batch_size, num_frames, -1)
+        # Average the predictions across frames
+        return outputs.mean(dim=1)
+    
+class TextDataset(Dataset):
+    def __init__(self, data_dict, vectorizer=None, min_text_length=10):
+        self.texts = []
+        self.labels = []
+        self.valid_indices = []  # Keep track of valid text samples
+        
+        # Map categories to numerical labels
+        category_map = {'monuments': 0, 'culture': 1, 'traditions': 2, 'folktales': 3}
+        
+        # Prepare text data
+        for category, content in data_dict.items():
+            seen_paths = set()
+            for text_data in content['texts']:
+                # CSV rows share one file; train on the whole file once
+                if text_data['path'] in seen_paths:
+                    continue
+                seen_paths.add(text_data['path'])
+                text_content = load_text_content(text_data['path'])
+                
+                # Only include texts that have sufficient content
+                if text_content and len(text_content.strip()) >= min_text_length:
+                    self.texts.append(text_content)
+                    self.labels.append(category_map[category])
+                    self.valid_indices.append(True)
+                else:
+                    print(f"Skipping short/empty text: {text_data['name']}")
+                    self.valid_indices.append(False)
+        
+        print(f"Found {len(self.texts)} valid text samples out of {len(self.valid_indices)} total files")
+        
+        # Check if we have texts from all categories
+        unique_labels = set(self.labels)
+        print(f"Text samples per category: { {k: self.labels.count(k) for k in unique_labels} }")
+        
+        # Vectorize texts if we have valid samples
+        if len(self.texts) > 0:
+            if vectorizer is None:
+                self.vectorizer = TfidfVectorizer(
+                    # Whole Telugu words plus akshara n-grams instead of the default \w\w+ pattern
+                    analyzer=TeluguAnalyzer(grapheme_ngram_range=(2, 3)),
+                    max_features=1000,
+                    min_df=2,  # Ignore terms that appear in less than 2 documents
+                    max_df=0.8  # Ignore terms that appear in more than 80% of documents
+                )
+                self.features = self.vectorizer.fit_transform(self.texts).toarray()
+            else:
+                self.vectorizer = vectorizer
+                self.features = self.vectorizer.transform(self.texts).toarray()
+        else:
+            self.features = np.array([])
+            self.vectorizer = None
+    
+    def __len__(self):
+        return len(self.texts)
+    
+    def __getitem__(self, idx):
+        return torch.FloatTensor(self.features[idx]), self.labels[idx]
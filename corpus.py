@@ -0,0 +1,338 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from corpus_manifest import CorpusManifest, default_manifest_path
+from local_utils import CATEGORIES, CONTENT_LOADERS, ENTRY_BUILDERS, as_entry_list, get_text_content, scan_corpus
+from upload_store import apply_aliases, content_hash_of
+
+try:
+    # inotify (Linux), FSEvents (macOS) or ReadDirectoryChangesW (Windows) when installed
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+CONTENT_TYPES = [content_type for content_type, _, _, _ in CONTENT_LOADERS]
+FOLDER_TO_CONTENT_TYPE = {folder: content_type for content_type, folder, _, _ in CONTENT_LOADERS}
+CONTENT_TYPE_EXTENSIONS = {content_type: extensions for content_type, _, extensions, _ in CONTENT_LOADERS}
+
+
+class CulturalCorpus:
+    """
+    Shared in-memory corpus that can be updated one file at a time.
+
+    Entries are kept per category and content type in insertion-ordered dicts
+    keyed by path (a file maps to a list of entries, one per CSV row), so
+    adding, replacing or removing a file is O(entries in that file). Readers
+    call snapshot() to get the usual data_dict shape. A change only drops
+    the list of its own category and content type; the next snapshot()
+    rebuilds that list and shares the others with the previous snapshot.
+
+    Search structures register with add_listener() and receive
+    add_entry/remove_entry calls for every change. Text bodies are decoded
+    once per change and handed to every listener as add_entry(..., text=).
+
+    Entries are built and decoded before any lock is taken. Updates are
+    serialized by their own lock, and the lock snapshot() takes is only held
+    to swap the entries of a file, so readers never wait on an ingest.
+    """
+
+    def __init__(self, base_path: str, data_dict: Dict, fast_video_probe: bool = False,
+                 manifest_path: Optional[str] = None):
+        self.base_path = os.path.normpath(base_path)
+        self.fast_video_probe = fast_video_probe
+        self.version = 0
+        self._lock = threading.Lock()           # guards _entries, _lists and _snapshot
+        self._update_lock = threading.Lock()    # serializes changes and listener updates
+        self._listeners = []
+        self._snapshot = None
+        # category -> content type -> snapshot list (None = rebuild on the next snapshot())
+        self._lists = {category: {content_type: None for content_type in CONTENT_TYPES} for category in CATEGORIES}
+
+        self._entries = {
+            category: {content_type: {} for content_type in CONTENT_TYPES}
+            for category in CATEGORIES
+        }
+        for category, content in data_dict.items():
+            for content_type, items in content.items():
+                for entry in items:
+                    self._entries[category][content_type].setdefault(os.path.normpath(entry['path']), []).append(entry)
+
+        try:
+            self._manifest = CorpusManifest(manifest_path or default_manifest_path(base_path))
+        except sqlite3.Error as e:
+            print(f"Corpus manifest unavailable, live updates will not be persisted: {e}")
+            self._manifest = None
+
+    @classmethod
+    def load(cls, base_path: str, workers: int = 1, fast_video_probe: bool = False, listeners=()):
+        """
+        Scan base_path (incrementally, through the manifest) and wrap the
+        result. Passing the listeners here feeds them in one pass, so each
+        text is read and decoded once instead of once per listener.
+        """
+        data_dict, _ = scan_corpus(base_path, workers=workers, fast_video_probe=fast_video_probe)
+        corpus = cls(base_path, data_dict, fast_video_probe=fast_video_probe)
+        corpus.add_listeners(listeners)
+        return corpus
+
+    def add_listener(self, listener):
+        """
+        Register a search structure with add_entry(category, content_type, entry, text=None)
+        and remove_entry(category, content_type, entry) methods. It is first fed
+        every existing entry.
+        """
+        self.add_listeners([listener])
+
+    def add_listeners(self, listeners):
+        """Register several listeners, feeding them every existing entry in a single pass"""
+        listeners = list(listeners)
+        if not listeners:
+            return
+        with self._update_lock:
+            self._listeners.extend(listeners)
+            snapshot = self.snapshot()
+            for category, content in snapshot.items():
+                for content_type, entries in content.items():
+                    for entry in entries:
+                        text = get_text_content(entry) if content_type == 'texts' else None
+                        for listener in listeners:
+                            listener.add_entry(category, content_type, entry, text=text)
+
+    def _entry_texts(self, content_type, entries) -> List[Optional[str]]:
+        """Decoded text of every entry for the listeners (None when nobody needs it)"""
+        if content_type != 'texts' or not self._listeners:
+            return [None] * len(entries)
+        return [get_text_content(entry) for entry in entries]
+
+    def _replace(self, category, content_type, path, entries, texts=()):
+        """
+        Swap the entries of one file (entries=None removes it) and update the
+        listeners. Returns the previous entries, or None if the file was not
+        present. Call with _update_lock held.
+        """
+        with self._lock:
+            items = self._entries[category][content_type]
+            old_entries = items.pop(path, None) if entries is None else items.get(path)
+            if entries is not None:
+                items[path] = entries
+            if old_entries is None and entries is None:
+                return None
+            self._lists[category][content_type] = None
+            self._snapshot = None
+
+        for old in old_entries or ():
+            for listener in self._listeners:
+                listener.remove_entry(category, content_type, old)
+        for entry, text in zip(entries or (), texts):
+            for listener in self._listeners:
+                listener.add_entry(category, content_type, entry, text=text)
+        # Bumped once the listeners are up to date, so results cached per version are never stale
+        with self._lock:
+            self.version += 1
+        return old_entries
+
+    def snapshot(self) -> Dict[str, Dict[str, List[Dict]]]:
+        """Consistent data_dict view of the current version (entries are shared, treat as read-only)"""
+        with self._lock:
+            if self._snapshot is None:
+                for category, content in self._entries.items():
+                    lists = self._lists[category]
+                    for content_type, items in content.items():
+                        if lists[content_type] is None:
+                            lists[content_type] = [entry for entries in items.values() for entry in entries]
+                self._snapshot = {category: dict(lists) for category, lists in self._lists.items()}
+            return self._snapshot
+
+    def classify_path(self, path: str) -> Optional[Tuple[str, str]]:
+        """(category, content_type) for a path inside the corpus folder, or None"""
+        relative = os.path.relpath(os.path.normpath(path), self.base_path)
+        parts = relative.split(os.sep)
+        if len(parts) < 3 or parts[0] not in self._entries:
+            return None
+        content_type = FOLDER_TO_CONTENT_TYPE.get(parts[1])
+        if content_type is None or not parts[-1].lower().endswith(CONTENT_TYPE_EXTENSIONS[content_type]):
+            return None
+        return parts[0], content_type
+
+    def ingest_file(self, path: str) -> Optional[List[Dict]]:
+        """Add or replace the entries for a single file. Returns the new entries, or None if ignored."""
+        path = os.path.normpath(path)
+        location = self.classify_path(path)
+        if location is None or not os.path.isfile(path):
+            return None
+        category, content_type = location
+
+        build_kwargs = {'fast_probe': self.fast_video_probe} if content_type == 'videos' else {}
+        try:
+            file_stat = os.stat(path)
+            built = ENTRY_BUILDERS[content_type](path, os.path.basename(path), **build_kwargs)
+        except Exception as e:
+            print(f"Error ingesting {path}: {e}")
+            return None
+
+        entries = as_entry_list(built)
+        if self._manifest is not None and content_hash_of(os.path.basename(path)):
+            aliases = self._manifest.load_aliases()
+            entries = [apply_aliases(entry, aliases) for entry in entries]
+
+        texts = self._entry_texts(content_type, entries)
+        with self._update_lock:
+            self._replace(category, content_type, path, entries, texts)
+
+        if self._manifest is not None:
+            try:
+                self._manifest.upsert_many([(path, category, content_type,
+                                             file_stat.st_size, file_stat.st_mtime_ns, built)])
+            except sqlite3.Error as e:
+                print(f"Could not record {path} in corpus manifest: {e}")
+        return entries
+
+    def remove_file(self, path: str) -> bool:
+        """Drop the entries for a single file. Returns True if it was present."""
+        path = os.path.normpath(path)
+        location = self.classify_path(path)
+        if location is None:
+            return False
+        category, content_type = location
+
+        with self._update_lock:
+            if self._replace(category, content_type, path, None) is None:
+                return False
+
+        if self._manifest is not None:
+            try:
+                self._manifest.delete_many([path])
+            except sqlite3.Error as e:
+                print(f"Could not remove {path} from corpus manifest: {e}")
+        return True
+
+    def refresh_file(self, path: str):
+        """Ingest the file if it exists, otherwise remove it"""
+        if os.path.isfile(path):
+            self.ingest_file(path)
+        else:
+            self.remove_file(path)
+
+
+class _CorpusEventHandler(FileSystemEventHandler):
+    """Forwards watchdog file events to the corpus"""
+
+    def __init__(self, corpus: CulturalCorpus):
+        self.corpus = corpus
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.corpus.refresh_file(event.src_path)
+
+    on_modified = on_created
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.corpus.remove_file(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.corpus.remove_file(event.src_path)
+            self.corpus.refresh_file(event.dest_path)
+
+
+class CorpusWatcher:
+    """
+    Keeps a CulturalCorpus in sync with its folder. Uses watchdog (inotify on
+    Linux) when it is installed, otherwise polls every interval seconds.
+
+    The polling fallback only re-lists folders whose mtime changed, so it
+    picks up added, removed and renamed files; files rewritten in place need
+    watchdog or an explicit corpus.ingest_file() call.
+    """
+
+    def __init__(self, corpus: CulturalCorpus, interval: float = 5.0, use_polling: bool = False):
+        self.corpus = corpus
+        self.interval = interval
+        self.use_polling = use_polling or Observer is None
+        self._observer = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._folder_state = {}  # folder -> (mtime_ns, set of file paths, subfolders)
+
+    def start(self):
+        if self.use_polling:
+            self._folder_state = self._scan_folders({})
+            self._thread = threading.Thread(target=self._poll_loop, name="corpus-watcher", daemon=True)
+            self._thread.start()
+        else:
+            os.makedirs(self.corpus.base_path, exist_ok=True)
+            self._observer = Observer()
+            self._observer.schedule(_CorpusEventHandler(self.corpus), self.corpus.base_path, recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _scan_folders(self, previous):
+        """Folder state for every content folder, re-listing only folders whose mtime changed"""
+        state = {}
+        for category in CATEGORIES:
+            for folder in FOLDER_TO_CONTENT_TYPE:
+                self._scan_dir(os.path.join(self.corpus.base_path, category, folder), previous, state)
+        return state
+
+    def _scan_dir(self, dir_path, previous, state):
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return
+
+        old = previous.get(dir_path)
+        if old is not None and old[0] == mtime_ns:
+            state[dir_path] = old
+        else:
+            files, subdirs = set(), []
+            try:
+                with os.scandir(dir_path) as it:
+                    for dir_entry in it:
+                        if dir_entry.is_dir():
+                            subdirs.append(dir_entry.path)
+                        else:
+                            files.add(dir_entry.path)
+            except OSError:
+                return
+            state[dir_path] = (mtime_ns, files, subdirs)
+
+        for subdir in state[dir_path][2]:
+            self._scan_dir(subdir, previous, state)
+
+    def poll_once(self):
+        """Apply every change since the previous poll to the corpus"""
+        previous = self._folder_state
+        current = self._scan_folders(previous)
+
+        for dir_path in previous.keys() | current.keys():
+            old = previous.get(dir_path, (None, set(), []))
+            new = current.get(dir_path, (None, set(), []))
+            if old is new:
+                continue
+            for path in old[1] - new[1]:
+                self.corpus.remove_file(path)
+            for path in new[1] - old[1]:
+                self.corpus.ingest_file(path)
+
+        self._folder_state = current
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Corpus watcher error: {e}")
@@ -0,0 +1,209 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+# Bump whenever the shape of the stored entries changes so stale manifests are rebuilt
+MANIFEST_SCHEMA_VERSION = 6
+MANIFEST_FILENAME = '.corpus_manifest.sqlite3'
+
+
+class CorpusManifest:
+    """
+    Persistent record of every scanned corpus file, keyed by path and
+    validated by size and mtime, so unchanged files are not re-read on restart
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        """Create the tables, dropping them first if they were written by an older schema"""
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != MANIFEST_SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS files")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    content_type TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    entry TEXT NOT NULL
+                )
+            """)
+            self._conn.execute(f"PRAGMA user_version = {MANIFEST_SCHEMA_VERSION}")
+
+            # Probed video metadata only depends on the file itself, so it is kept
+            # across schema bumps and full rebuilds
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS video_metadata (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+            """)
+
+            # Content-addressed upload registry and the names each upload arrived with
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS content_hashes (
+                    sha256 TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    content_type TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_aliases (
+                    sha256 TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    PRIMARY KEY (sha256, name)
+                )
+            """)
+
+    def load_all(self) -> Dict[str, Tuple[int, int, str]]:
+        """Return {path: (size, mtime_ns, entry_json)} for every recorded file"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, mtime_ns, entry FROM files").fetchall()
+        return {path: (size, mtime_ns, entry) for path, size, mtime_ns, entry in rows}
+
+    def upsert_many(self, rows: Iterable[Tuple[str, str, str, int, int, Dict]]):
+        """Insert or replace (path, category, content_type, size, mtime_ns, entry) rows"""
+        payload = [
+            (path, category, content_type, size, mtime_ns, json.dumps(entry, ensure_ascii=False))
+            for path, category, content_type, size, mtime_ns, entry in rows
+        ]
+        if not payload:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, category, content_type, size, mtime_ns, entry) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                payload
+            )
+
+    def delete_many(self, paths: Iterable[str]) -> int:
+        """Forget the given paths, returning how many rows were removed"""
+        payload = [(path,) for path in paths]
+        if not payload:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.executemany("DELETE FROM files WHERE path = ?", payload)
+            removed = cursor.rowcount
+            self._conn.executemany("DELETE FROM video_metadata WHERE path = ?", payload)
+        return removed
+
+    def move_paths(self, moves: Iterable[Tuple[str, str]]):
+        """
+        Re-point the file, video metadata and upload registry rows of files
+        moved from old_path to new_path, given as (old_path, new_path) pairs.
+        The stored entries keep their size and mtime, so moved files are
+        reused on the next scan instead of being re-read.
+        """
+        moves = list(moves)
+        if not moves:
+            return
+        with self._lock, self._conn:
+            for old_path, new_path in moves:
+                row = self._conn.execute("SELECT entry FROM files WHERE path = ?", (old_path,)).fetchone()
+                if row is not None:
+                    entry = json.loads(row[0])
+                    for item in entry if isinstance(entry, list) else [entry]:
+                        item['path'] = new_path
+                    self._conn.execute("DELETE FROM files WHERE path = ?", (new_path,))
+                    self._conn.execute("UPDATE files SET path = ?, entry = ? WHERE path = ?",
+                                       (new_path, json.dumps(entry, ensure_ascii=False), old_path))
+                self._conn.execute("DELETE FROM video_metadata WHERE path = ?", (new_path,))
+                self._conn.execute("UPDATE video_metadata SET path = ? WHERE path = ?", (new_path, old_path))
+                self._conn.execute("UPDATE content_hashes SET path = ? WHERE path = ?", (new_path, old_path))
+
+    def load_video_metadata(self) -> Dict[Tuple[str, int, int], Dict]:
+        """Return {(path, size, mtime_ns): metadata} for every probed video"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, mtime_ns, metadata FROM video_metadata").fetchall()
+        return {(path, size, mtime_ns): json.loads(metadata) for path, size, mtime_ns, metadata in rows}
+
+    def store_video_metadata(self, rows: Iterable[Tuple[str, int, int, Dict]]):
+        """Insert or replace (path, size, mtime_ns, metadata) rows"""
+        payload = [
+            (path, size, mtime_ns, json.dumps(metadata))
+            for path, size, mtime_ns, metadata in rows
+        ]
+        if not payload:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO video_metadata (path, size, mtime_ns, metadata) VALUES (?, ?, ?, ?)",
+                payload
+            )
+
+    def register_content(self, sha256: str, path: str, category: str, content_type: str) -> Optional[Tuple[str, str, str]]:
+        """
+        Record path as the stored copy of sha256 unless another live copy is
+        already registered. Returns the existing (path, category, content_type)
+        for a duplicate, or None if path was registered.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT path, category, content_type FROM content_hashes WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if row is not None and os.path.exists(row[0]):
+                return row
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_hashes (sha256, path, category, content_type) VALUES (?, ?, ?, ?)",
+                (sha256, path, category, content_type)
+            )
+        return None
+
+    def add_alias(self, sha256: str, name: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO upload_aliases (sha256, name) VALUES (?, ?)", (sha256, name))
+
+    def load_aliases(self) -> Dict[str, list]:
+        """Return {sha256: [names in arrival order]}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT sha256, name FROM upload_aliases ORDER BY rowid").fetchall()
+        aliases = {}
+        for sha256, name in rows:
+            aliases.setdefault(sha256, []).append(name)
+        return aliases
+
+    def clear(self):
+        """Forget every recorded file (used for a full rebuild); probed video metadata is kept"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def default_manifest_path(base_path: str) -> str:
+    """Manifest location for a data folder"""
+    return os.path.join(base_path, MANIFEST_FILENAME)
+
+
+if __name__ == "__main__":
+    import argparse
+    from local_utils import scan_corpus
+
+    parser = argparse.ArgumentParser(description="Scan the corpus folder and refresh its manifest")
+    parser.add_argument("base_path", nargs="?", default="data", help="Corpus data folder")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the manifest and re-scan every file")
+    args = parser.parse_args()
+
+    _, stats = scan_corpus(args.base_path, full_rebuild=args.rebuild)
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,107 @@
+"""
+Typo-tolerant lookup of vocabulary terms.
+
+Terms are indexed by their character trigrams (padded with < and >). A
+query term first collects the terms sharing trigrams with it; by the q-gram
+lemma a term within k edits shares at least max(grams) - 3k trigrams. So
+only the postings of the 3k + 1 rarest query trigrams are read (a match
+must contain one of them), candidates below that overlap or whose length
+differs by more than k are pruned without computing a distance, and only
+the survivors are verified with a bounded Levenshtein distance.
+
+The search index feeds it phonetic keys (telugu_text.phonetic_key), so
+one edit here is one akshara-level change in either script, and spellings
+that only differ in aspiration or vowel length are already equal.
+"""
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+# Edits allowed by key length: short keys would match too much
+FUZZY_MIN_LENGTH = 4
+FUZZY_TWO_EDIT_LENGTH = 8
+NGRAM = 3
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f'<{term}>'
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def max_edits(term: str) -> int:
+    """Edits tolerated for a term of this length"""
+    if len(term) < FUZZY_MIN_LENGTH:
+        return 0
+    return 1 if len(term) < FUZZY_TWO_EDIT_LENGTH else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance of a and b, or limit + 1 as soon as it must exceed
+    limit. Only the diagonal band |i - j| <= limit of the table is filled.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    beyond = limit + 1
+    previous = [j if j <= limit else beyond for j in range(len(b) + 1)]
+    for i, a_char in enumerate(a, 1):
+        current = [beyond] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a_char != b[j - 1]))
+        if min(current) > limit:
+            return beyond
+        previous = current
+    return min(previous[-1], beyond)
+
+
+class TrigramIndex:
+    """Trigram postings over a changing set of terms (not thread-safe; the owner locks)"""
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}       # trigram -> terms
+        self._grams: Dict[str, FrozenSet[str]] = {}    # term -> its trigrams
+
+    def __len__(self):
+        return len(self._grams)
+
+    def add(self, term: str):
+        if term in self._grams:
+            return
+        grams = self._grams[term] = frozenset(trigrams(term))
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(term)
+
+    def remove(self, term: str):
+        grams = self._grams.pop(term, None)
+        if grams is None:
+            return
+        for gram in grams:
+            terms = self._postings[gram]
+            terms.discard(term)
+            if not terms:
+                del self._postings[gram]
+
+    def lookup(self, term: str, edits: int = None) -> List[Tuple[str, int]]:
+        """(indexed term, edit distance) within edits of term (default max_edits(term)), closest first"""
+        edits = max_edits(term) if edits is None else edits
+        grams = trigrams(term)
+        if len(grams) > NGRAM * edits:
+            # A match keeps all but at most NGRAM * edits of the query trigrams, so it
+            # must contain one of the NGRAM * edits + 1 rarest: only those postings are read
+            rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+            candidates = set().union(*(self._postings.get(gram, ()) for gram in rarest[:NGRAM * edits + 1]))
+        else:
+            # Too few trigrams for the bound (a match may share none): check every term
+            candidates = set(self._grams)
+
+        matches = []
+        for candidate in candidates:
+            candidate_grams = self._grams[candidate]
+            if abs(len(candidate) - len(term)) > edits or \
+                    len(grams & candidate_grams) < max(len(grams), len(candidate_grams)) - NGRAM * edits:
+                continue
+            distance = edit_distance(term, candidate, edits)
+            if distance <= edits:
+                matches.append((candidate, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
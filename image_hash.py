@@ -0,0 +1,164 @@
+"""
+Perceptual image hashes for query-by-image search.
+
+Two 64-bit hashes are kept per image:
+
+    phash  sign of the low-frequency 8x8 DCT coefficients of a 32x32
+           grayscale copy, compared with their median (robust to scaling,
+           compression and small colour changes)
+    dhash  whether each pixel of a 9x8 grayscale copy is brighter than its
+           right neighbour (cheap, sensitive to the overall gradient layout)
+
+Similar images have hashes a small Hamming distance apart. The hashes are
+computed once when an image entry is built and stored on the entry as hex
+strings, so the corpus manifest persists them across restarts.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from scipy.fft import dctn
+
+HASH_BITS = 64
+# Distance reported for a pair of images is phash + dhash distance (0..128)
+MAX_DISTANCE = 2 * HASH_BITS
+
+_HASH_FIELDS = ('phash', 'dhash')
+# Bits set in every byte value, for NumPy versions without np.bitwise_count
+_POPCOUNT8 = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def dhash(image: Image.Image) -> int:
+    """64-bit difference hash"""
+    pixels = np.asarray(image.convert('L').resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image: Image.Image) -> int:
+    """64-bit DCT perceptual hash"""
+    pixels = np.asarray(image.convert('L').resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = dctn(pixels, norm='ortho')[:8, :8]
+    # The DC term only carries the mean brightness, so it is left out of the median
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def image_hashes(image: Image.Image) -> Tuple[int, int]:
+    """(phash, dhash) of an image; corpus images and query images go through the same path"""
+    image.draft('L', (64, 64))   # A freshly opened JPEG is decoded at reduced size
+    return phash(image), dhash(image)
+
+
+def compute_hashes(path: str) -> Dict[str, str]:
+    """{'phash': hex, 'dhash': hex} for an image file"""
+    with Image.open(path) as image:
+        image_phash, image_dhash = image_hashes(image)
+    return {'phash': f'{image_phash:016x}', 'dhash': f'{image_dhash:016x}'}
+
+
+def hamming_distances(hashes: np.ndarray, query: int) -> np.ndarray:
+    """Bitwise Hamming distance of every uint64 in hashes to query"""
+    differences = hashes ^ np.uint64(query)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(differences).astype(np.int32)
+    return _POPCOUNT8[differences.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int32)
+
+
+class ImageHashIndex:
+    """
+    Perceptual hashes of every corpus image in flat uint64 arrays, searched
+    with one vectorized XOR + popcount per query.
+
+    Registered as a corpus listener. Rows of removed images are marked free
+    and reused by the next added image, so the arrays never need compacting.
+    """
+
+    def __init__(self, categories: List[str]):
+        self.categories = list(categories)
+        self._category_codes = {category: code for code, category in enumerate(self.categories)}
+        self._lock = threading.Lock()
+        self._size = 0
+        self._phash = np.zeros(0, dtype=np.uint64)
+        self._dhash = np.zeros(0, dtype=np.uint64)
+        self._category = np.zeros(0, dtype=np.int16)
+        self._alive = np.zeros(0, dtype=bool)
+        self._entries = []     # row -> (category, entry), None for free rows
+        self._row_of = {}      # (category, path) -> row
+        self._free = []
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self._alive))
+        for name in ('_phash', '_dhash', '_category', '_alive'):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add_entry(self, category, content_type, entry, text=None):
+        if content_type != 'images' or category not in self._category_codes:
+            return
+        if not all(field in entry for field in _HASH_FIELDS):
+            # Unreadable images and Swecha API results have no hashes
+            return
+
+        with self._lock:
+            key = (category, entry['path'])
+            if key in self._row_of:
+                self._remove(key)
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._size == len(self._alive):
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._entries.append(None)
+            self._phash[row] = int(entry['phash'], 16)
+            self._dhash[row] = int(entry['dhash'], 16)
+            self._category[row] = self._category_codes[category]
+            self._alive[row] = True
+            self._entries[row] = (category, entry)
+            self._row_of[key] = row
+
+    def remove_entry(self, category, content_type, entry):
+        if content_type != 'images':
+            return
+        with self._lock:
+            self._remove((category, entry['path']))
+
+    def _remove(self, key):
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self._entries[row] = None
+        self._free.append(row)
+
+    def search(self, image: Image.Image, top_k: int = 10, category: Optional[str] = None,
+               max_distance: Optional[int] = None) -> List[Tuple[str, dict, int]]:
+        """
+        (category, entry, distance) of the top_k images closest to image,
+        nearest first. distance is the phash + dhash Hamming distance (0..128).
+        """
+        query_phash, query_dhash = image_hashes(image)
+        with self._lock:
+            size = self._size
+            distances = hamming_distances(self._phash[:size], query_phash) + \
+                hamming_distances(self._dhash[:size], query_dhash)
+            mask = self._alive[:size].copy()
+            if category is not None:
+                mask &= self._category[:size] == self._category_codes.get(category, -1)
+            if max_distance is not None:
+                mask &= distances <= max_distance
+            rows = np.flatnonzero(mask)
+            if rows.size > top_k:
+                rows = rows[np.argpartition(distances[rows], top_k - 1)[:top_k]]
+            rows = rows[np.argsort(distances[rows], kind='stable')]
+            return [(*self._entries[row], int(distances[row])) for row in rows]
+
+    def __len__(self):
+        return len(self._row_of)
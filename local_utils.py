@@ -3,120 +3,448 @@ import json
 import numpy as np
 from PIL import Image
 import cv2
-import pandas as pd
-from sklearn.model_selection import train_test_split
-import torch
-import torch.nn as nn
-import torchvision.transforms as transforms
-import torchvision.models as models
 import csv
-from sklearn.feature_extraction.text import TfidfVectorizer
-from torch.utils.data import Dataset
-from sklearn.metrics.pairwise import cosine_similarity
-import joblib
+import io
+import codecs
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from cache_utils import ByteLRUCache
+from corpus_manifest import CorpusManifest, default_manifest_path
+from video_probe import probe_video
+from text_files import MappedText, detect_file_encoding, read_text_file
+from image_hash import compute_hashes
+from storage_layout import iter_folder_files
+from upload_store import apply_aliases, store_upload
 
-def load_text_content(file_path):
-    """Load text content from various file types including CSV"""
+def _csv_record_encoding(f, encoding):
+    """
+    (encoding, BOM length) for decoding single records of a CSV file opened
+    in binary mode. A UTF-16 BOM only sits at the start of the file, so its
+    records are decoded with the byte order it names.
+    """
+    encoding = encoding or 'utf-8'
+    if encoding != 'utf-16':
+        return encoding, 0
+    position = f.tell()
+    f.seek(0)
+    bom = f.read(2)
+    f.seek(position)
+    if bom == codecs.BOM_UTF16_BE:
+        return 'utf-16-be', 2
+    return 'utf-16-le', 2 if bom == codecs.BOM_UTF16_LE else 0
+
+def _iter_csv_spans(f, encoding='utf-8'):
+    """
+    Yield (fields, offset, length) for each record of a CSV file opened in
+    binary mode. Lines are pulled one at a time, so only the current record
+    is held in memory, and the byte span lets a single row be re-read later.
+    """
+    encoding, position = _csv_record_encoding(f, encoding)
+
+    def byte_lines():
+        nonlocal position
+        for raw_line in f:
+            position += len(raw_line)
+            yield raw_line.decode(encoding, errors='replace')
+
+    def utf16_lines():
+        # Byte newlines can fall inside UTF-16 characters, so split the decoded
+        # stream and measure every line back in the file's encoding
+        nonlocal position
+        f.seek(position)
+        reader = io.TextIOWrapper(f, encoding=encoding, errors='replace', newline='')
+        try:
+            for line in reader:
+                position += len(line.encode(encoding))
+                yield line
+        finally:
+            reader.detach()
+
+    lines = utf16_lines if encoding.startswith('utf-16') else byte_lines
+    start = position
+    for fields in csv.reader(lines()):
+        yield fields, start, position - start
+        start = position
+
+def _column_names(fields):
+    """Header fields as column names (BOM stripped, blank names get a positional name)"""
+    return [name.lstrip('\ufeff').strip() or f"column_{i + 1}" for i, name in enumerate(fields)]
+
+def _read_csv_header(f, encoding='utf-8'):
+    """Column names from the first non-empty record"""
+    for fields, _, _ in _iter_csv_spans(f, encoding):
+        if fields:
+            return _column_names(fields)
+    return []
+
+def iter_csv_records(file_path, encoding='utf-8'):
+    """
+    Stream a CSV file row by row
+    Yields: Dictionary per data row with its 1-based row number, byte offset
+    and length in the file, and {column: value} provenance
+    """
+    with open(file_path, 'rb') as f:
+        header = None
+        row = 0
+        for fields, offset, length in _iter_csv_spans(f, encoding):
+            if not fields:
+                continue
+            if header is None:
+                header = _column_names(fields)
+                continue
+            row += 1
+            yield {
+                'row': row,
+                'offset': offset,
+                'length': length,
+                'columns': dict(zip(header, fields))
+            }
+
+def load_csv_row(file_path, offset, length, encoding='utf-8'):
+    """Re-read a single CSV row from its byte span. Returns: {column: value}"""
+    with open(file_path, 'rb') as f:
+        header = _read_csv_header(f, encoding)
+        record_encoding, _ = _csv_record_encoding(f, encoding)
+        f.seek(offset)
+        raw = f.read(length)
+    fields = next(csv.reader(io.StringIO(raw.decode(record_encoding, errors='replace'))), [])
+    return dict(zip(header, fields))
+
+def _is_number(value):
     try:
-        if file_path.endswith('.csv'):
-            # Read CSV file
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+def csv_row_text(columns):
+    """Searchable text of a CSV row: its non-empty, non-numeric values"""
+    return " ".join(value for value in columns.values() if value.strip() and not _is_number(value))
+
+def load_text_content(file_path, encoding=None):
+    """
+    Load text content from various file types including CSV. The encoding is
+    sniffed from a sample (once per file version) unless given, and the file
+    is decoded in a single pass.
+    """
+    try:
+        encoding = encoding or detect_file_encoding(file_path)
+        if file_path.lower().endswith('.csv'):
+            # Stream the CSV row by row and join once at the end
             try:
-                df = pd.read_csv(file_path)
-                # Try to extract text from different column types
-                text_content = ""
-                for col in df.columns:
-                    if df[col].dtype == 'object':  # String data
-                        text_content += " " + " ".join(df[col].dropna().astype(str).tolist())
-                return text_content.strip()
+                records = iter_csv_records(file_path, encoding)
+                return " ".join(
+                    text for text in (csv_row_text(record['columns']) for record in records)
+                    if text
+                )
             except Exception as e:
                 print(f"Error reading CSV {file_path}: {e}")
                 return ""
         else:
-            # Read text file
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            except UnicodeDecodeError:
-                # Try different encodings
-                try:
-                    with open(file_path, 'r', encoding='latin-1') as f:
-                        return f.read()
-                except:
-                    return ""
+            # Read text file (memory-mapped when large)
+            return read_text_file(file_path, encoding)
     except Exception as e:
         print(f"Error loading text file {file_path}: {e}")
         return ""
 
 # Data loading and preprocessing functions
-def load_data_from_folders(base_path):
+CATEGORIES = ['monuments', 'culture', 'traditions', 'folktales']
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+TEXT_EXTENSIONS = ('.txt', '.csv')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov')
+
+def build_image_entry(img_path, img_file):
+    """Corpus entry for an image file, with its perceptual hashes for query-by-image search"""
+    entry = {
+        'path': img_path,
+        'name': img_file
+    }
+    try:
+        entry.update(compute_hashes(img_path))
+    except Exception as e:
+        print(f"Could not hash image {img_path}: {e}")
+    return entry
+
+def build_text_entry(file_path, text_file):
     """
-    Load all data from the organized folder structure
-    Returns: Dictionary with category-wise data
+    Corpus entry for a text file, or one entry per row for a CSV file. Only
+    metadata is kept; the body is loaded on demand through get_text_content
     """
-    categories = ['monuments', 'culture', 'traditions', 'folktales']
+    file_stat = os.stat(file_path)
+    encoding = detect_file_encoding(file_path, file_stat.st_size, file_stat.st_mtime_ns)
+    if file_path.lower().endswith('.csv'):
+        base_name, extension = os.path.splitext(text_file)
+        return [
+            {
+                'path': file_path,
+                'name': f"{base_name} #{record['row']}{extension}",
+                'row': record['row'],
+                'offset': record['offset'],
+                'length': record['length'],
+                'size': file_stat.st_size,
+                'mtime_ns': file_stat.st_mtime_ns,
+                'encoding': encoding
+            }
+            for record in iter_csv_records(file_path, encoding)
+        ]
+    return {
+        'path': file_path,
+        'name': text_file,
+        'size': file_stat.st_size,
+        'mtime_ns': file_stat.st_mtime_ns,
+        'encoding': encoding
+    }
+
+# Text bodies are materialized on demand and kept in a size-bounded LRU cache
+TEXT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+text_content_cache = ByteLRUCache(TEXT_CACHE_MAX_BYTES)
+
+def get_text_content(item):
+    """
+    Return the text body of a corpus entry, loading it through the LRU cache.
+    Entries that already carry their content (e.g. Swecha API results) are
+    returned as-is.
+    """
+    if 'content' in item:
+        return item['content']
+    key = (item['path'], item.get('size'), item.get('mtime_ns'), item.get('row'))
+    if 'row' in item:
+        return text_content_cache.get_or_load(key, lambda: csv_row_text(get_csv_row(item)))
+    return text_content_cache.get_or_load(key, lambda: load_text_content(item['path'], item.get('encoding')))
+
+def entry_key(item):
+    """Stable identity of a corpus entry (CSV rows share a path)"""
+    return (item['path'], item.get('row'))
+
+def get_csv_row(item):
+    """{column: value} provenance for a CSV row entry"""
+    return load_csv_row(item['path'], item['offset'], item['length'], item.get('encoding', 'utf-8'))
+
+def open_text(item):
+    """
+    MappedText view of a text entry's file for windowed reads and searches
+    without decoding the whole body (use as a context manager)
+    """
+    return MappedText(item['path'], encoding=item.get('encoding'))
+
+def as_entry_list(built):
+    """Entry builders return one entry per file, or a list of them (CSV rows)"""
+    return built if isinstance(built, list) else [built]
+
+def build_video_entry(video_path_full, video_file, fast_probe=False, metadata=None):
+    """
+    Corpus entry for a video file. Metadata is probed with OpenCV (or the
+    header-only MP4/MOV parser when fast_probe=True) unless already known
+    """
+    entry = {
+        'path': video_path_full,
+        'name': video_file
+    }
+    entry.update(metadata if metadata is not None else probe_video(video_path_full, fast=fast_probe))
+    return entry
+
+# (content type key, folder name, accepted extensions, entry builder)
+CONTENT_LOADERS = [
+    ('images', 'images', IMAGE_EXTENSIONS, build_image_entry),
+    ('texts', 'texts', TEXT_EXTENSIONS, build_text_entry),
+    ('videos', 'videos', VIDEO_EXTENSIONS, build_video_entry),
+]
+ENTRY_BUILDERS = {content_type: build_entry for content_type, _, _, build_entry in CONTENT_LOADERS}
+
+# Worker count used by the app for parallel scans (1 means a serial scan)
+DEFAULT_SCAN_WORKERS = min(8, os.cpu_count() or 1)
+
+def _list_folder(folder_path, extensions):
+    """
+    (name, path, stat) tuples for the accepted files in a content folder,
+    flat or hash-sharded, sorted by name
+    """
+    files = []
+    for dir_entry in iter_folder_files(folder_path):
+        if dir_entry.name.lower().endswith(extensions):
+            try:
+                files.append((dir_entry.name, dir_entry.path, dir_entry.stat()))
+            except OSError as e:
+                print(f"Error reading {dir_entry.path}: {e}")
+    files.sort(key=lambda item: (item[0], item[1]))
+    return files
+
+def _safe_build(content_type, file_path, file_name, build_kwargs):
+    """Build an entry, returning the exception instead of raising (safe across worker pools)"""
+    try:
+        return ENTRY_BUILDERS[content_type](file_path, file_name, **build_kwargs)
+    except Exception as e:
+        return e
+
+def _build_entries(jobs, workers):
+    """
+    Build entries for (content_type, file_path, file_name, build_kwargs) jobs, in job order.
+    With workers > 1, texts and images are built on a thread pool (I/O bound)
+    and videos are probed on a process pool (decoder initialization is CPU bound).
+    """
+    if not workers or workers <= 1:
+        return [_safe_build(*job) for job in jobs]
+
+    results = [None] * len(jobs)
+    video_indices = [i for i, job in enumerate(jobs) if job[0] == 'videos']
+    other_indices = [i for i, job in enumerate(jobs) if job[0] != 'videos']
+
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        other_futures = [threads.submit(_safe_build, *jobs[i]) for i in other_indices]
+
+        if len(video_indices) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(video_indices))) as processes:
+                video_results = processes.map(
+                    _safe_build,
+                    *zip(*(jobs[i] for i in video_indices)),
+                    chunksize=max(1, len(video_indices) // (workers * 4))
+                )
+                for i, result in zip(video_indices, video_results):
+                    results[i] = result
+        else:
+            for i in video_indices:
+                results[i] = _safe_build(*jobs[i])
+
+        for i, future in zip(other_indices, other_futures):
+            results[i] = future.result()
+
+    return results
+
+def scan_corpus(base_path, manifest_path=None, full_rebuild=False, use_manifest=True, workers=1,
+                fast_video_probe=False):
+    """
+    Scan the organized folder structure, re-reading only new or changed files.
+
+    Unchanged files (same size and mtime as recorded in the manifest) are
+    reused from the manifest instead of being opened again. Pass
+    full_rebuild=True to ignore the manifest and re-scan every file, and
+    workers > 1 to list folders and build entries in parallel. Entries are
+    always returned in sorted file-name order, whatever the worker count.
+
+    Video metadata is cached by (path, size, mtime) separately from the file
+    entries, so videos are not re-probed even on a full rebuild. With
+    fast_video_probe=True, MP4/MOV metadata is read from the container
+    headers instead of opening a decoder.
+
+    Returns: (data_dict, stats) where stats counts rescanned, reused and
+    removed files, and video probes vs video metadata cache hits
+    """
+    stats = {'rescanned': 0, 'reused': 0, 'removed': 0, 'failed': 0,
+             'video_probes': 0, 'video_cache_hits': 0}
+
+    manifest = None
+    known = {}
+    video_metadata = {}
+    aliases = {}
+    if use_manifest:
+        try:
+            manifest = CorpusManifest(manifest_path or default_manifest_path(base_path))
+            if full_rebuild:
+                manifest.clear()
+            known = manifest.load_all()
+            video_metadata = manifest.load_video_metadata()
+            aliases = manifest.load_aliases()
+        except sqlite3.Error as e:
+            print(f"Corpus manifest unavailable, scanning without it: {e}")
+            manifest = None
+
+    folders = [
+        (category, content_type, os.path.join(base_path, category, folder), extensions)
+        for category in CATEGORIES
+        for content_type, folder, extensions, _ in CONTENT_LOADERS
+    ]
+
+    # List every folder, one thread per folder in parallel mode
+    if workers and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as threads:
+            listings = list(threads.map(lambda folder: _list_folder(folder[2], folder[3]), folders))
+    else:
+        listings = [_list_folder(folder_path, extensions) for _, _, folder_path, extensions in folders]
+
+    # Each (category, content_type) slot keeps the sorted listing order; reused
+    # entries are filled in now and new or changed files are queued as jobs
+    slots = {}
+    jobs = []
+    job_targets = []
+    seen = set()
+    for (category, content_type, _, _), files in zip(folders, listings):
+        entries = [None] * len(files)
+        slots[(category, content_type)] = entries
+
+        for index, (file_name, file_path, file_stat) in enumerate(files):
+            seen.add(file_path)
+
+            # Reuse the manifest entry if the file is unchanged
+            record = known.get(file_path)
+            if record and record[0] == file_stat.st_size and record[1] == file_stat.st_mtime_ns:
+                entries[index] = json.loads(record[2])
+                stats['reused'] += 1
+                continue
+
+            build_kwargs = {}
+            if content_type == 'videos':
+                # Skip the probe if this exact file was probed before
+                metadata = video_metadata.get((file_path, file_stat.st_size, file_stat.st_mtime_ns))
+                if metadata is not None:
+                    build_kwargs['metadata'] = metadata
+                    stats['video_cache_hits'] += 1
+                else:
+                    build_kwargs['fast_probe'] = fast_video_probe
+                    stats['video_probes'] += 1
+
+            jobs.append((content_type, file_path, file_name, build_kwargs))
+            job_targets.append((category, content_type, index, file_stat))
+
+    updated_rows = []
+    probed_rows = []
+    for (content_type, file_path, file_name, build_kwargs), (category, _, index, file_stat), entry in zip(
+            jobs, job_targets, _build_entries(jobs, workers)):
+        if isinstance(entry, Exception):
+            print(f"Error loading {content_type[:-1]} {file_name}: {entry}")
+            stats['failed'] += 1
+            continue
+
+        slots[(category, content_type)][index] = entry
+        updated_rows.append((file_path, category, content_type,
+                             file_stat.st_size, file_stat.st_mtime_ns, entry))
+        if content_type == 'videos' and 'metadata' not in build_kwargs:
+            probed_rows.append((file_path, file_stat.st_size, file_stat.st_mtime_ns,
+                                {key: entry[key] for key in ('fps', 'frame_count', 'duration')}))
+        stats['rescanned'] += 1
+
     data_dict = {}
-    
-    for category in categories:
-        category_path = os.path.join(base_path, category)
+    for category in CATEGORIES:
         data_dict[category] = {
-            'images': [],
-            'videos': [],
-            'texts': []
+            content_type: [
+                apply_aliases(entry, aliases)
+                for built in slots[(category, content_type)] if built is not None
+                for entry in as_entry_list(built)
+            ]
+            for content_type in ('images', 'videos', 'texts')
         }
-        
-        # Load images
-        image_path = os.path.join(category_path, 'images')
-        if os.path.exists(image_path):
-            for img_file in os.listdir(image_path):
-                if img_file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    try:
-                        img_path = os.path.join(image_path, img_file)
-                        data_dict[category]['images'].append({
-                            'path': img_path,
-                            'name': img_file
-                        })
-                    except Exception as e:
-                        print(f"Error loading image {img_file}: {e}")
-        
-        # Load texts (including CSV files)
-        text_path = os.path.join(category_path, 'texts')
-        if os.path.exists(text_path):
-            for text_file in os.listdir(text_path):
-                if text_file.lower().endswith(('.txt', '.csv')):
-                    try:
-                        file_path = os.path.join(text_path, text_file)
-                        content = load_text_content(file_path)
-                        
-                        data_dict[category]['texts'].append({
-                            'path': file_path,
-                            'content': content,
-                            'name': text_file
-                        })
-                    except Exception as e:
-                        print(f"Error loading text {text_file}: {e}")
-        
-        # Load videos (store paths and extract metadata)
-        video_path = os.path.join(category_path, 'videos')
-        if os.path.exists(video_path):
-            for video_file in os.listdir(video_path):
-                if video_file.lower().endswith(('.mp4', '.avi', '.mov')):
-                    video_path_full = os.path.join(video_path, video_file)
-                    
-                    # Extract video metadata
-                    cap = cv2.VideoCapture(video_path_full)
-                    fps = cap.get(cv2.CAP_PROP_FPS)
-                    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                    duration = frame_count / fps if fps > 0 else 0
-                    cap.release()
-                    
-                    data_dict[category]['videos'].append({
-                        'path': video_path_full,
-                        'name': video_file,
-                        'fps': fps,
-                        'frame_count': frame_count,
-                        'duration': duration
-                    })
-    
+
+    if manifest is not None:
+        try:
+            manifest.upsert_many(updated_rows)
+            manifest.store_video_metadata(probed_rows)
+            stats['removed'] = manifest.delete_many(path for path in known if path not in seen)
+        except sqlite3.Error as e:
+            print(f"Could not update corpus manifest: {e}")
+        finally:
+            manifest.close()
+
+    print(f"Corpus scan: {stats['rescanned']} files re-scanned, {stats['reused']} reused from manifest, "
+          f"{stats['removed']} removed, {stats['failed']} failed; "
+          f"{stats['video_probes']} videos probed, {stats['video_cache_hits']} from metadata cache")
+    return data_dict, stats
+
+def load_data_from_folders(base_path, full_rebuild=False, workers=1, fast_video_probe=False):
+    """
+    Load all data from the organized folder structure
+    Returns: Dictionary with category-wise data
+    """
+    data_dict, _ = scan_corpus(base_path, full_rebuild=full_rebuild, workers=workers,
+                               fast_video_probe=fast_video_probe)
     return data_dict
 
 def preprocess_image(image, target_size=(224, 224)):
@@ -160,117 +488,6 @@ def extract_frames_from_video(video_path, num_frames=5):
     cap.release()
     return frames
 
-# Simple CNN model for image classification
-class CulturalClassifier(nn.Module):
-    def __init__(self, num_classes=4):
-        super(CulturalClassifier, self).__init__()
-        self.features = nn.Sequential(
-            nn.Conv2d(3, 32, kernel_size=3, padding=1),
-            nn.ReLU(),
-            nn.MaxPool2d(kernel_size=2, stride=2),
-            nn.Conv2d(32, 64, kernel_size=3, padding=1),
-            nn.ReLU(),
-            nn.MaxPool2d(kernel_size=2, stride=2),
-            nn.Conv2d(64, 128, kernel_size=3, padding=1),
-            nn.ReLU(),
-            nn.MaxPool2d(kernel_size=2, stride=2)
-        )
-        self.classifier = nn.Sequential(
-            nn.Linear(128 * 28 * 28, 512),
-            nn.ReLU(),
-            nn.Dropout(0.5),
-            nn.Linear(512, num_classes)
-        )
-    
-    def forward(self, x):
-        x = self.features(x)
-        x = x.view(x.size(0), -1)
-        x = self.classifier(x)
-        return x
-
-# Text classification model
-class TextClassifier(nn.Module):
-    def __init__(self, input_dim, hidden_dim, num_classes):
-        super(TextClassifier, self).__init__()
-        self.fc1 = nn.Linear(input_dim, hidden_dim)
-        self.relu = nn.ReLU()
-        self.dropout = nn.Dropout(0.5)
-        self.fc2 = nn.Linear(hidden_dim, num_classes)
-    
-    def forward(self, x):
-        x = self.fc1(x)
-        x = self.relu(x)
-        x = self.dropout(x)
-        x = self.fc2(x)
-        return x
-
-# Video classification model (using extracted frames)
-class VideoClassifier(nn.Module):
-    def __init__(self, num_classes=4):
-        super(VideoClassifier, self).__init__()
-        # Use the same architecture as image classifier
-        self.frame_classifier = CulturalClassifier(num_classes)
-    
-    def forward(self, x):
-        # x is a batch of videos, each represented by multiple frames
-        batch_size, num_frames, C, H, W = x.size()
-        x = x.view(batch_size * num_frames, C, H, W)
-        outputs = self.frame_classifier(x)
-        outputs = outputs.view(batch_size, num_frames, -1)
-        # Average the predictions across frames
-        return outputs.mean(dim=1)
-    
-class TextDataset(Dataset):
-    def __init__(self, data_dict, vectorizer=None, min_text_length=10):
-        self.texts = []
-        self.labels = []
-        self.valid_indices = []  # Keep track of valid text samples
-        
-        # Map categories to numerical labels
-        category_map = {'monuments': 0, 'culture': 1, 'traditions': 2, 'folktales': 3}
-        
-        # Prepare text data
-        for category, content in data_dict.items():
-            for text_data in content['texts']:
-                text_content = load_text_content(text_data['path'])
-                
-                # Only include texts that have sufficient content
-                if text_content and len(text_content.strip()) >= min_text_length:
-                    self.texts.append(text_content)
-                    self.labels.append(category_map[category])
-                    self.valid_indices.append(True)
-                else:
-                    print(f"Skipping short/empty text: {text_data['name']}")
-                    self.valid_indices.append(False)
-        
-        print(f"Found {len(self.texts)} valid text samples out of {len(self.valid_indices)} total files")
-        
-        # Check if we have texts from all categories
-        unique_labels = set(self.labels)
-        print(f"Text samples per category: { {k: self.labels.count(k) for k in unique_labels} }")
-        
-        # Vectorize texts if we have valid samples
-        if len(self.texts) > 0:
-            if vectorizer is None:
-                self.vectorizer = TfidfVectorizer(
-                    max_features=1000,
-                    min_df=2,  # Ignore terms that appear in less than 2 documents
-                    max_df=0.8  # Ignore terms that appear in more than 80% of documents
-                )
-                self.features = self.vectorizer.fit_transform(self.texts).toarray()
-            else:
-                self.vectorizer = vectorizer
-                self.features = self.vectorizer.transform(self.texts).toarray()
-        else:
-            self.features = np.array([])
-            self.vectorizer = None
-    
-    def __len__(self):
-        return len(self.texts)
-    
-    def __getitem__(self, idx):
-        return torch.FloatTensor(self.features[idx]), self.labels[idx]
-    
 def save_uploaded_file(uploaded_file, category, file_type):
     """
     Save uploaded file to the appropriate folder structure with error handling
@@ -291,27 +508,13 @@ def save_uploaded_file(uploaded_file, category, file_type):
             print(f"Invalid file type: {file_type}")
             return None
         
-        # Create directory structure if it doesn't exist
-        base_dir = 'data'
-        category_dir = os.path.join(base_dir, category, file_type + 's')
-        os.makedirs(category_dir, exist_ok=True)
-        
-        # Generate file path
-        file_path = os.path.join(category_dir, uploaded_file.name)
+        # Store one copy per distinct content; repeated uploads only add a name alias
+        file_path, already_archived = store_upload(uploaded_file, category, file_type + 's')
         
-        # Check if file already exists and handle naming
-        counter = 1
-        original_name, extension = os.path.splitext(uploaded_file.name)
-        while os.path.exists(file_path):
-            new_name = f"{original_name}_{counter}{extension}"
-            file_path = os.path.join(category_dir, new_name)
-            counter += 1
-        
-        # Save the file
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        print(f"File saved successfully: {file_path}")
+        if already_archived:
+            print(f"File already archived: {file_path}")
+        else:
+            print(f"File saved successfully: {file_path}")
         return file_path
         
     except Exception as e:
@@ -0,0 +1,114 @@
+"""
+Fusion of the ranked candidate lists of the search sources (BM25 keyword
+matches, semantic similarity, Swecha API results) into one result list.
+
+Each source hands over its candidates best first as (item, score) pairs
+(score may be None for sources that only give a rank). Two fusions:
+
+    rrf       reciprocal-rank fusion: sum of weight / (RRF_K + rank)
+    weighted  sum of weight * score, with scores min-max scaled per source
+              (rank-based for sources without scores)
+
+The same item coming from several sources (a local file that is also on
+the Swecha server, a text found by keyword and semantic search) is merged
+and collects the contributions of every source. Lists are consumed one rank
+at a time and fusion stops as soon as no unseen candidate or lower-ranked
+item can still enter the top k.
+"""
+import heapq
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from telugu_text import normalize
+
+RRF_K = 60
+SOURCE_WEIGHTS = {'keyword': 1.0, 'semantic': 1.0, 'remote': 0.5}
+
+
+def _is_remote(item: Dict) -> bool:
+    return item.get('source') == 'swecha_api'
+
+
+def result_keys(item: Dict) -> Tuple[tuple, Optional[tuple]]:
+    """
+    (identity key, name key) of a result. Local entries are identified by
+    path and Swecha results by URL; the name key only pairs a local entry
+    with a Swecha result, so two local files that share a display name stay apart.
+    """
+    name_key = ('name', normalize(item['name']), item.get('row')) if item.get('name') else None
+    if item.get('path'):
+        kind = 'url' if _is_remote(item) else 'path'
+        path = item['path'] if _is_remote(item) else os.path.normpath(item['path'])
+        return (kind, path, item.get('row')), name_key
+    return ('object', id(item), None), name_key
+
+
+def _contributions(candidates: Sequence[Tuple[Dict, Optional[float]]], method: str,
+                   weight: float, rrf_k: int) -> List[float]:
+    """Fused-score contribution of every rank of one source (non-increasing)"""
+    if not candidates:
+        return []
+    if method == 'rrf':
+        return [weight / (rrf_k + rank) for rank in range(1, len(candidates) + 1)]
+
+    scores = [score for _, score in candidates]
+    if any(score is None for score in scores):
+        return [weight * (1.0 - rank / len(candidates)) for rank in range(len(candidates))]
+    high, low = max(scores), min(scores)
+    if high == low:
+        return [weight] * len(candidates)
+    return [weight * (score - low) / (high - low) for score in scores]
+
+
+def fuse_results(sources: Dict[str, Sequence[Tuple[Dict, Optional[float]]]], top_k: int = 20,
+                 method: str = 'rrf', weights: Optional[Dict[str, float]] = None,
+                 rrf_k: int = RRF_K) -> List[Tuple[Dict, float, List[str]]]:
+    """
+    Fuse ranked source lists into the top_k (item, fused score, sources) triples, best first.
+    The order inside the top k reflects the ranks consumed before stopping.
+    """
+    if method not in ('rrf', 'weighted'):
+        raise ValueError(f"Unknown fusion method: {method}")
+    weights = {**SOURCE_WEIGHTS, **(weights or {})}
+    contributions = {
+        name: _contributions(candidates, method, weights.get(name, 1.0), rrf_k)
+        for name, candidates in sources.items()
+    }
+
+    records = []       # [item, fused score, source names]
+    record_of = {}     # identity key -> record index
+    named = {}         # name key -> record indexes
+    depth = max((len(candidates) for candidates in sources.values()), default=0)
+    for rank in range(depth):
+        for name, candidates in sources.items():
+            if rank >= len(candidates):
+                continue
+            item = candidates[rank][0]
+            identity_key, name_key = result_keys(item)
+            index = record_of.get(identity_key)
+            if index is None and name_key is not None:
+                index = next((other for other in named.get(name_key, [])
+                              if _is_remote(records[other][0]) != _is_remote(item)), None)
+            if index is None:
+                index = len(records)
+                records.append([item, 0.0, []])
+                if name_key is not None:
+                    named.setdefault(name_key, []).append(index)
+            record_of.setdefault(identity_key, index)
+            record = records[index]
+            if _is_remote(record[0]) and not _is_remote(item):
+                # Prefer the local copy, which renders without a network fetch
+                record[0] = item
+            if name not in record[2]:
+                record[1] += contributions[name][rank]
+                record[2].append(name)
+
+        # The most any item outside the current top k can still gain
+        remaining = sum(values[rank + 1] for values in contributions.values() if rank + 1 < len(values))
+        if len(records) > top_k:
+            best = heapq.nlargest(top_k + 1, records, key=lambda record: record[1])
+            if best[top_k - 1][1] >= best[top_k][1] + remaining:
+                break
+
+    ranked = heapq.nlargest(top_k, records, key=lambda record: record[1])
+    return [(item, score, names) for item, score, names in ranked]
@@ -0,0 +1,450 @@
+"""
+Headless search: the keyword, semantic and Swecha API sources behind the
+results pages and their fusion, without Streamlit.
+
+app.py serves every session from one SearchEngine (adding its query cache
+and showing the notices). Run as a script, this module replays a file of
+queries against a corpus folder and reports latency, throughput, memory
+and, for queries with relevance labels, recall@k and MRR as JSON:
+
+    python search_engine.py data queries.jsonl --k 10 --fuzzy
+
+Every line of the query file is either a plain query or a JSON object:
+
+    {"query": "చార్మినార్", "category": "monuments", "content_type": "texts",
+     "relevant": ["monuments/texts/charminar.txt", "festivals.csv#3", "golconda.jpg"]}
+
+A query with both category and content_type runs the per-category search
+of the results page, otherwise the cross-category search with the given
+filters. Relevant results are named by their path relative to the corpus
+folder or by their file name, with #row appended for a CSV row
+("culture/texts/festivals.csv#3" or "festivals.csv#3").
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from corpus import CONTENT_TYPES, CulturalCorpus
+from local_utils import CATEGORIES, DEFAULT_SCAN_WORKERS
+from ranking import fuse_results
+from search_index import InvertedIndex, quoted_phrases
+from semantic_index import SemanticIndex, default_ann_dir
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; memory is then not reported
+    resource = None
+
+# Candidates taken from each local source, and fused results kept per query
+RANK_CANDIDATES = 50
+MAX_RESULTS = 50
+DEFAULT_VECTORIZER_PATH = 'models/text_vectorizer.pkl'
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+def fetch_remote_results(search_query, category, content_type, notices):
+    """Swecha API results (best first) for the query; problems are reported through notices"""
+    # Imported on first use, so local-only searches never set up the API client
+    from swecha_api import get_swecha_search_results, swecha_client
+    try:
+        # Check if Swecha API is accessible
+        if not swecha_client.health_check():
+            notices.append(('warning', "Swecha API is currently unavailable. Showing only local results."))
+            return []
+        swecha_results = get_swecha_search_results(
+            query=search_query,
+            category=category,
+            content_type=content_type,
+            limit=10
+        )
+
+        # Add source indicator to Swecha results
+        for result in swecha_results:
+            result['source'] = 'swecha_api'
+
+        # Show info about API results
+        if swecha_results:
+            notices.append(('info', f"Found {len(swecha_results)} additional results from Swecha API"))
+        return swecha_results
+    except Exception as e:
+        notices.append(('warning', f"Could not fetch results from Swecha API: {str(e)}"))
+        return []
+
+
+class SearchEngine:
+    """
+    BM25 over the inverted index, TF-IDF similarity for texts (when a
+    semantic index is given) and optionally the Swecha API, fused into one
+    ranking. The indexes are corpus listeners, so the engine always
+    searches the current corpus version. Quoted phrases in a query are
+    required of local results, and exact phrases rank higher.
+
+    Searches return (payload, notices); notices are (streamlit function
+    name, message) pairs for the caller to show or ignore.
+    """
+
+    def __init__(self, corpus: CulturalCorpus, search_index: InvertedIndex,
+                 semantic_index: Optional[SemanticIndex] = None):
+        self.corpus = corpus
+        self.search_index = search_index
+        self.semantic_index = semantic_index
+
+    @classmethod
+    def build(cls, corpus: CulturalCorpus, vectorizer=None):
+        """Engine with fresh indexes registered on corpus (no semantic search without a vectorizer)"""
+        search_index = InvertedIndex()
+        semantic_index = None
+        if vectorizer is not None:
+            semantic_index = SemanticIndex(vectorizer, ann_dir=default_ann_dir(corpus.base_path))
+        corpus.add_listeners(index for index in (search_index, semantic_index) if index is not None)
+        return cls(corpus, search_index, semantic_index)
+
+    def semantic_search(self, category, content_type, search_query, top_k=5) -> List[Tuple[dict, float]]:
+        """[(entry, cosine similarity)] best first, for texts only"""
+        if content_type != 'texts' or self.semantic_index is None:
+            return []
+        # One sparse product against the precomputed category matrix
+        try:
+            return self.semantic_index.search(category, search_query, top_k=top_k)
+        except ValueError:
+            return []
+
+    def semantic_query(self, search_query, fuzzy=False):
+        """
+        The query plus its indexed romanized or misspelled variants: the
+        vectorizer only knows the corpus spelling
+        """
+        return ' '.join([search_query] + self.search_index.query_variants(search_query, fuzzy))
+
+    def semantic_batch(self, specs: Sequence[Dict], fuzzy=False) -> List[Optional[list]]:
+        """
+        Semantic hits of several query specs ({'query', 'category',
+        'content_type'} as in run_query) scored together, with one
+        SemanticIndex.search_batch per set of categories covered.
+        Returns: per spec, the semantic_hits argument of the search() or
+        search_all() call it runs (None when it has no semantic part)
+        """
+        hits = [None] * len(specs)
+        if self.semantic_index is None:
+            return hits
+        groups = {}   # categories (None = all) -> spec numbers
+        for number, spec in enumerate(specs):
+            if spec['query'].strip() and spec['content_type'] in (None, 'texts'):
+                groups.setdefault((spec['category'],) if spec['category'] else None, []).append(number)
+
+        for categories, numbers in groups.items():
+            queries = [self.semantic_query(specs[number]['query'], fuzzy) for number in numbers]
+            try:
+                batch = self.semantic_index.search_batch(queries, categories, top_k=RANK_CANDIDATES)
+            except ValueError:
+                continue
+            for number, spec_hits in zip(numbers, batch):
+                if specs[number]['category'] and specs[number]['content_type']:
+                    # search() takes (entry, score) pairs of its own category
+                    spec_hits = [(entry, score) for _, entry, score in spec_hits]
+                hits[number] = spec_hits
+        return hits
+
+    def search(self, category, content_type, search_query, use_api=False, fuzzy=False, semantic_hits=None):
+        """
+        Local keyword/semantic search plus the Swecha API search, fused into one ranking.
+        With fuzzy=True keyword matches also cover misspelled variants of the query words.
+        semantic_hits, from semantic_batch(), replaces the semantic search.
+        Returns: (results, notices)
+        """
+        notices = []
+        sources = {}
+
+        category_data = self.corpus.snapshot().get(category, {})
+        if content_type in category_data:
+            # Without a query the whole category is listed, unranked
+            if not search_query.strip():
+                return list(category_data[content_type]), notices
+
+            # BM25 over the inverted index, plus vector similarity for texts
+            sources['keyword'] = self.search_index.rank(
+                search_query, category=category, content_type=content_type, top_k=RANK_CANDIDATES, fuzzy=fuzzy)
+            if semantic_hits is None:
+                semantic_hits = self.semantic_search(category, content_type, self.semantic_query(search_query, fuzzy),
+                                                     top_k=RANK_CANDIDATES)
+            if semantic_hits and quoted_phrases(search_query):
+                # Similarity only reorders the results that hold the quoted phrases
+                matching = {id(entry) for entry, _ in sources['keyword']}
+                semantic_hits = [(entry, score) for entry, score in semantic_hits if id(entry) in matching]
+            if semantic_hits:
+                sources['semantic'] = semantic_hits
+
+        if search_query and search_query.strip() and use_api:
+            # The server returns them best first, without scores
+            sources['remote'] = [(result, None) for result in
+                                 fetch_remote_results(search_query, category, content_type, notices)]
+
+        # Duplicates across sources are merged; fusion stops once the top results are settled
+        results = [item for item, _, _ in fuse_results(sources, top_k=MAX_RESULTS)]
+        return results, notices
+
+    def search_all(self, search_query, categories=(), content_types=(), use_api=False, fuzzy=False,
+                   semantic_hits=None):
+        """
+        Cross-category search: one BM25 pass over the unified inverted index,
+        one semantic search over the selected categories (empty = all), and
+        the Swecha API, fused into one ranking. The facet counts are taken
+        from the fused results too, each facet under the other facet's filter
+        only, so a count is the number of results selecting that value shows.
+        semantic_hits, from semantic_batch(), replaces the semantic search.
+        Returns: ((hits, facets), notices) with hits as (category, content_type, item)
+        """
+        notices = []
+        if not search_query.strip():
+            return ([], {'category': {}, 'content_type': {}}), notices
+
+        categories, content_types = set(categories), set(content_types)
+        sources = {}    # source -> [(item, score)] best first, before the facet filters
+        location = {}   # id(item) -> (category, content_type)
+        # Every keyword hit, filtered per scope below
+        keyword_hits, _ = self.search_index.rank_faceted(search_query, fuzzy=fuzzy)
+        sources['keyword'] = []
+        for category, content_type, entry, score in keyword_hits:
+            location[id(entry)] = (category, content_type)
+            sources['keyword'].append((entry, score))
+
+        semantic_all = []   # semantic hits of every category, for the category facet
+        if self.semantic_index is not None:
+            if semantic_hits is None:
+                semantic_hits = self.semantic_index.search_categories(
+                    self.semantic_query(search_query, fuzzy), categories=categories or None, top_k=RANK_CANDIDATES)
+            semantic_all = semantic_hits
+            if categories:
+                semantic_all = self.semantic_index.search_categories(
+                    self.semantic_query(search_query, fuzzy), top_k=RANK_CANDIDATES)
+            if quoted_phrases(search_query):
+                # Similarity only reorders the results that hold the quoted phrases
+                matching = {id(entry) for entry, _ in sources['keyword']}
+                semantic_hits = [hit for hit in semantic_hits if id(hit[1]) in matching]
+                semantic_all = [hit for hit in semantic_all if id(hit[1]) in matching]
+            for category, entry, score in semantic_hits + semantic_all:
+                location[id(entry)] = (category, 'texts')
+            sources['semantic'] = [(entry, score) for _, entry, score in semantic_hits]
+
+        if use_api:
+            sources['remote'] = []
+            for result in fetch_remote_results(search_query, None, None, notices):
+                category = result.get('category') if result.get('category') in CATEGORIES else None
+                content_type = result.get('content_type')
+                # Only results that can be rendered
+                if content_type not in CONTENT_TYPES:
+                    continue
+                location[id(result)] = (category, content_type)
+                sources['remote'].append((result, None))
+
+        def fused(category_filter, content_type_filter):
+            scoped = dict(sources)
+            if 'semantic' in scoped and not category_filter:
+                scoped['semantic'] = [(entry, score) for _, entry, score in semantic_all]
+            for name, candidates in scoped.items():
+                scoped[name] = [
+                    (item, score) for item, score in candidates
+                    if (not category_filter or location[id(item)][0] in category_filter) and
+                       (not content_type_filter or location[id(item)][1] in content_type_filter)
+                ][:RANK_CANDIDATES]
+            return [(*location[id(item)], item) for item, _, _ in fuse_results(scoped, top_k=MAX_RESULTS)]
+
+        hits = fused(categories, content_types)
+        facets = {'category': {}, 'content_type': {}}
+        for category, _, _ in fused(None, content_types):
+            if category is not None:
+                facets['category'][category] = facets['category'].get(category, 0) + 1
+        for _, content_type, _ in fused(categories, None):
+            facets['content_type'][content_type] = facets['content_type'].get(content_type, 0) + 1
+        return (hits, facets), notices
+
+
+# --- Offline evaluation ---
+def load_queries(path: str) -> List[Dict]:
+    """Query specs of a query file: {'query', 'category', 'content_type', 'relevant'} (missing keys = None)"""
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            spec = json.loads(line) if line.startswith('{') else {'query': line}
+            relevant = spec.get('relevant')
+            queries.append({
+                'query': spec['query'],
+                'category': spec.get('category'),
+                'content_type': spec.get('content_type'),
+                'relevant': [label.replace('\\', '/') for label in relevant] if relevant is not None else None
+            })
+    return queries
+
+
+def result_labels(item: Dict, base_path: str) -> Tuple[str, ...]:
+    """
+    The names a relevance label can give a result: corpus-relative path and
+    file name (both with #row for CSV rows), and the display name
+    """
+    if item.get('source') == 'swecha_api':
+        return tuple(label for label in (item.get('path'), item.get('name')) if label)
+    path = os.path.relpath(os.path.normpath(item['path']), base_path).replace(os.sep, '/')
+    file_name = os.path.basename(path)
+    if 'row' in item:
+        path, file_name = f"{path}#{item['row']}", f"{file_name}#{item['row']}"
+    return path, file_name, item['name']
+
+
+def relevance_metrics(results: Sequence[Dict], relevant: Sequence[str], base_path: str, k: int) -> Tuple[float, float]:
+    """(recall@k, reciprocal rank of the first relevant result within k) of one labeled query"""
+    relevant = set(relevant)
+    if not relevant:
+        return 0.0, 0.0
+    found = set()
+    reciprocal_rank = 0.0
+    for rank, item in enumerate(results[:k], 1):
+        matched = relevant.intersection(result_labels(item, base_path))
+        if matched and not reciprocal_rank:
+            reciprocal_rank = 1.0 / rank
+        found |= matched
+    return len(found) / len(relevant), reciprocal_rank
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_query(engine: SearchEngine, spec: Dict, use_api: bool, fuzzy: bool,
+              semantic_hits: Optional[list] = None) -> Tuple[List[Dict], float]:
+    """(results, seconds) of one query spec"""
+    start = time.perf_counter()
+    if spec['category'] and spec['content_type']:
+        results, _ = engine.search(spec['category'], spec['content_type'], spec['query'], use_api, fuzzy,
+                                   semantic_hits)
+    else:
+        (hits, _), _ = engine.search_all(
+            spec['query'], [spec['category']] if spec['category'] else [],
+            [spec['content_type']] if spec['content_type'] else [], use_api, fuzzy, semantic_hits)
+        results = [item for _, _, item in hits]
+    return results, time.perf_counter() - start
+
+
+def evaluate(engine: SearchEngine, queries: List[Dict], k: int = 10, use_api: bool = False, fuzzy: bool = False,
+             repeat: int = 1, concurrency: int = 1, batch: bool = True) -> Dict:
+    """
+    Replay queries repeat times (concurrency at a time) and summarize.
+    Latency percentiles cover every run; relevance is taken from the first.
+    With batch=True the semantic part of every run is scored up front in one
+    batch, and each run's latency includes an equal share of that time.
+    """
+    specs = queries * repeat
+    start = time.perf_counter()
+    semantic = [None] * len(specs)
+    batch_share = 0.0
+    if batch and specs:
+        semantic = engine.semantic_batch(specs, fuzzy)
+        batch_share = (time.perf_counter() - start) / len(specs)
+
+    def run(spec, semantic_hits):
+        return run_query(engine, spec, use_api, fuzzy, semantic_hits)
+
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            runs = list(pool.map(run, specs, semantic))
+    else:
+        runs = [run(spec, semantic_hits) for spec, semantic_hits in zip(specs, semantic)]
+    elapsed = time.perf_counter() - start
+
+    latencies = (np.array([seconds for _, seconds in runs]) + batch_share) * 1000
+    report = {
+        'queries': len(queries),
+        'runs': len(specs),
+        'latency_ms': {
+            **{f'p{percentile}': float(np.percentile(latencies, percentile)) for percentile in LATENCY_PERCENTILES},
+            'mean': float(latencies.mean()),
+            'max': float(latencies.max())
+        } if len(specs) else {},
+        'qps': len(specs) / elapsed if elapsed else None,
+    }
+
+    labeled = [(spec, results) for spec, (results, _) in zip(queries, runs) if spec['relevant'] is not None]
+    report['labeled_queries'] = len(labeled)
+    if labeled:
+        metrics = np.array([relevance_metrics(results, spec['relevant'], engine.corpus.base_path, k)
+                            for spec, results in labeled])
+        report[f'recall@{k}'] = float(metrics[:, 0].mean())
+        report['mrr'] = float(metrics[:, 1].mean())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay queries against a corpus folder and report search metrics as JSON")
+    parser.add_argument('corpus', help='Corpus folder (category/content type layout, as data/)')
+    parser.add_argument('queries', help='Query file: one query or JSON query spec per line')
+    parser.add_argument('--k', type=int, default=10, help='Cutoff for recall@k and MRR')
+    parser.add_argument('--fuzzy', action='store_true', help='Also match misspelled query words')
+    parser.add_argument('--api', action='store_true', help='Include Swecha API results')
+    parser.add_argument('--vectorizer', default=DEFAULT_VECTORIZER_PATH,
+                        help='TF-IDF vectorizer for semantic search (skipped when the file is missing)')
+    parser.add_argument('--repeat', type=int, default=1, help='Times the query file is replayed')
+    parser.add_argument('--concurrency', type=int, default=1, help='Queries in flight at once')
+    parser.add_argument('--per-query', action='store_true',
+                        help='Run the semantic search query by query, as the app does, instead of in one batch')
+    parser.add_argument('--workers', type=int, default=DEFAULT_SCAN_WORKERS, help='Corpus scan workers')
+    parser.add_argument('--output', help='Write the report here instead of stdout')
+    args = parser.parse_args()
+
+    # Loading progress goes to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        corpus = CulturalCorpus.load(args.corpus, workers=args.workers, fast_video_probe=True)
+        scan_seconds = time.perf_counter() - start
+
+        vectorizer = None
+        if args.vectorizer and os.path.exists(args.vectorizer):
+            import joblib
+            vectorizer = joblib.load(args.vectorizer)
+        start = time.perf_counter()
+        engine = SearchEngine.build(corpus, vectorizer)
+        index_seconds = time.perf_counter() - start
+        build_rss = peak_rss_mb()
+
+        report = {
+            'corpus': args.corpus,
+            'k': args.k,
+            'fuzzy': args.fuzzy,
+            'api': args.api,
+            'semantic': engine.semantic_index is not None,
+            'semantic_batch': not args.per_query,
+            'scan_seconds': scan_seconds,
+            'index_seconds': index_seconds,
+            'index': engine.search_index.stats(),
+            **evaluate(engine, load_queries(args.queries), k=args.k, use_api=args.api, fuzzy=args.fuzzy,
+                       repeat=args.repeat, concurrency=args.concurrency, batch=not args.per_query),
+            'memory_mb': {'peak_rss_after_build': build_rss, 'peak_rss': peak_rss_mb()},
+        }
+        if args.api:
+            from swecha_api import swecha_client
+            report['api_metrics'] = swecha_client.metrics()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ann_index import top_k_indices
+from fuzzy_index import TrigramIndex
+from local_utils import entry_key, get_text_content, open_text
+from telugu_text import WORD_PATTERN, normalize, phonetic_key, word_spans, word_tokens
+from text_files import encoded_offsets
+
+FIELDS = ('name', 'content')
+# BM25 parameters and per-field weights (a name match counts more than a body match)
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {'name': 2.0, 'content': 1.0}
+# In fuzzy mode a token reached through k edits scores FUZZY_EDIT_WEIGHT ** k of an exact match
+FUZZY_EDIT_WEIGHT = 0.7
+# Quoted parts of a ranked query ("golconda fort") must occur as phrases in every result
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+# Without quotes, results holding all query words as a phrase score this much more
+PHRASE_BOOST = 1.5
+# Text content is split into passages of this many words; a result snippet is one passage
+PASSAGE_TOKENS = 24
+
+
+def passage_offsets(text: str) -> np.ndarray:
+    """Character offsets where the passages of text start, followed by len(text)"""
+    return _passage_array(text, [start for start, _ in word_spans(text)[::PASSAGE_TOKENS]])
+
+
+def _passage_array(text: str, starts: List[int]) -> np.ndarray:
+    return np.array(starts + [len(text)], dtype=np.int32)
+
+
+def analyze_content(text: str) -> Tuple[List[str], np.ndarray]:
+    """
+    (word_tokens(text), passage_offsets(text)) in one tokenizer pass when
+    normalizing keeps the length of text, so offsets in the normalized text
+    are offsets in text; otherwise the offsets come from the original text.
+    """
+    normalized = normalize(text)
+    matches = list(WORD_PATTERN.finditer(normalized))
+    tokens = [match.group() for match in matches]
+    if len(normalized) != len(text):
+        return tokens, passage_offsets(text)
+    return tokens, _passage_array(text, [match.start() for match in matches[::PASSAGE_TOKENS]])
+
+
+def highlight_spans(text: str, tokens: Set[str]) -> List[Tuple[int, int]]:
+    """(start, end) of the words of text whose normalized form is one of tokens"""
+    return [(start, end) for start, end in word_spans(text) if normalize(text[start:end]) in tokens]
+
+
+def _passage_bounds(passages: np.ndarray, number: int) -> Tuple[int, int]:
+    """(start, end) offsets of a passage, (0, 0) past the last one"""
+    if number + 1 < len(passages):
+        return int(passages[number]), int(passages[number + 1])
+    return 0, 0
+
+
+def quoted_phrases(query: str) -> List[List[str]]:
+    """Tokens of every quoted phrase of a query"""
+    return [tokens for tokens in map(word_tokens, PHRASE_PATTERN.findall(query)) if tokens]
+
+
+def _best(candidates: List[tuple], top_k: Optional[int]) -> List[tuple]:
+    """The top_k (item, score) pairs, best first (all of them for top_k=None)"""
+    values = np.fromiter((score for _, score in candidates), dtype=np.float64, count=len(candidates))
+    order = top_k_indices(values, len(candidates) if top_k is None else top_k)
+    return [candidates[i] for i in order]
+
+
+class InvertedIndex:
+    """
+    Positional inverted index over entry names and text content.
+
+    Every field keeps token -> {doc id: [positions]}, so a query only touches
+    the posting lists of its own tokens. Registered as a corpus listener, it is
+    filled once at load time and updated per ingested or removed file.
+
+    The phonetic key of every vocabulary token (telugu_text.phonetic_key) is
+    computed when the token is first indexed, so a query token in Latin script
+    ("charminar") also reads the postings of the Telugu tokens with the
+    same key ("చార్మినార్") and vice versa. The keys are also trigram-indexed,
+    so fuzzy queries reach misspelled variants the same way, without
+    scanning the vocabulary.
+
+    The offsets of the passages of every text are stored at index time too,
+    so a result snippet is picked from the content postings and only that
+    passage is read. For plain text files they are byte offsets into the
+    file, and the passage is decoded from a MappedText window instead of
+    the whole body.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, Dict[int, List[int]]]] = {field: {} for field in FIELDS}
+        self._docs: Dict[int, Tuple[str, str, dict]] = {}       # doc id -> (category, content_type, entry)
+        self._doc_terms: Dict[int, Dict[str, Set[str]]] = {}    # doc id -> field -> tokens, for removal
+        self._doc_ids: Dict[tuple, int] = {}                    # (category, content_type, entry key) -> doc id
+        self._doc_lengths: Dict[int, Dict[str, int]] = {}       # doc id -> field -> token count
+        self._passages: Dict[int, Tuple[np.ndarray, bool]] = {}  # doc id -> (passage offsets, byte offsets into the file?)
+        self._field_totals = {field: [0, 0] for field in FIELDS}  # field -> [documents, tokens]
+        self._variants: Dict[str, Set[str]] = {}                # phonetic key -> vocabulary tokens
+        self._fuzzy_keys = TrigramIndex()                       # trigrams of the phonetic keys
+        self._next_id = 0
+
+    def add_entry(self, category, content_type, entry, text=None):
+        fields = {'name': word_tokens(entry['name'])}
+        passages = None
+        if content_type == 'texts':
+            text = get_text_content(entry) if text is None else text
+            fields['content'], passages = analyze_content(text)
+            passages = self._file_passages(entry, text, passages)
+
+        with self._lock:
+            key = (category, content_type, entry_key(entry))
+            if key in self._doc_ids:
+                self._remove(key)
+            doc_id = self._next_id
+            self._next_id += 1
+            self._doc_ids[key] = doc_id
+            self._docs[doc_id] = (category, content_type, entry)
+            self._doc_terms[doc_id] = {}
+            self._doc_lengths[doc_id] = {}
+            if passages is not None:
+                self._passages[doc_id] = passages
+            for field, tokens in fields.items():
+                postings = self._postings[field]
+                for position, token in enumerate(tokens):
+                    docs = postings.get(token)
+                    if docs is None:
+                        docs = postings[token] = {}
+                        self._add_variant(token)
+                    docs.setdefault(doc_id, []).append(position)
+                self._doc_terms[doc_id][field] = set(tokens)
+                self._doc_lengths[doc_id][field] = len(tokens)
+                self._field_totals[field][0] += 1
+                self._field_totals[field][1] += len(tokens)
+
+    @staticmethod
+    def _file_passages(entry, text, passages) -> Tuple[np.ndarray, bool]:
+        """Passage offsets as byte offsets into the file for plain text files, character offsets otherwise"""
+        if 'content' in entry or 'row' in entry or 'encoding' not in entry:
+            return passages, False
+        offsets = encoded_offsets(text, passages.tolist(), entry['encoding'])
+        if offsets is None:
+            return passages, False
+        return np.array(offsets, dtype=np.int64), True
+
+    def remove_entry(self, category, content_type, entry):
+        with self._lock:
+            self._remove((category, content_type, entry_key(entry)))
+
+    def _remove(self, key):
+        doc_id = self._doc_ids.pop(key, None)
+        if doc_id is None:
+            return
+        del self._docs[doc_id]
+        self._passages.pop(doc_id, None)
+        for field, length in self._doc_lengths.pop(doc_id).items():
+            self._field_totals[field][0] -= 1
+            self._field_totals[field][1] -= length
+        for field, tokens in self._doc_terms.pop(doc_id).items():
+            postings = self._postings[field]
+            for token in tokens:
+                docs = postings[token]
+                del docs[doc_id]
+                if not docs:
+                    del postings[token]
+                    if not any(token in self._postings[other] for other in FIELDS):
+                        self._forget_variant(token)
+
+    def _add_variant(self, token):
+        key = phonetic_key(token)
+        if key not in self._variants:
+            self._variants[key] = set()
+            self._fuzzy_keys.add(key)
+        self._variants[key].add(token)
+
+    def _forget_variant(self, token):
+        key = phonetic_key(token)
+        variants = self._variants.get(key)
+        if variants is not None:
+            variants.discard(token)
+            if not variants:
+                del self._variants[key]
+                self._fuzzy_keys.remove(key)
+
+    def _expand(self, tokens: List[str], fuzzy: bool = False) -> List[Dict[str, float]]:
+        """
+        Every query token as a group {token: weight}: the token itself, the
+        indexed tokens sharing its phonetic key and, with fuzzy=True, those
+        whose key is within a few edits (call with the lock held)
+        """
+        groups = []
+        for token in tokens:
+            key = phonetic_key(token)
+            matches = self._fuzzy_keys.lookup(key) if fuzzy else [(key, 0)]
+            group = {token: 1.0}
+            for match, edits in matches:
+                for variant in sorted(self._variants.get(match, ())):
+                    group.setdefault(variant, FUZZY_EDIT_WEIGHT ** edits)
+            groups.append(group)
+        return groups
+
+    def _group_postings(self, field: str, group: Dict[str, float]) -> Optional[Dict[int, List[int]]]:
+        """Postings of a token group, with the positions of all its tokens merged per document"""
+        lists = [docs for docs in map(self._postings[field].get, group) if docs]
+        if len(lists) <= 1:
+            return lists[0] if lists else None
+        merged: Dict[int, List[int]] = {}
+        for docs in lists:
+            for doc_id, positions in docs.items():
+                merged.setdefault(doc_id, []).extend(positions)
+        return merged
+
+    def query_variants(self, query: str, fuzzy: bool = False) -> List[str]:
+        """
+        Indexed tokens in the other script or another spelling (within a few
+        edits with fuzzy=True) that the query tokens match through their phonetic key
+        """
+        tokens = word_tokens(query)
+        with self._lock:
+            return [variant for group in self._expand(tokens, fuzzy) for variant in group if variant not in tokens]
+
+    def _match_field(self, field: str, groups: List[Dict[str, float]], phrase: bool) -> Set[int]:
+        lists = [self._group_postings(field, group) for group in groups]
+        if any(docs is None for docs in lists):
+            return set()
+
+        # Intersect starting from the rarest token
+        ordered = sorted(lists, key=len)
+        candidates = set(ordered[0])
+        for docs in ordered[1:]:
+            candidates.intersection_update(docs)
+            if not candidates:
+                return candidates
+        if not phrase or len(groups) == 1:
+            return candidates
+
+        matches = set()
+        for doc_id in candidates:
+            following = [set(docs[doc_id]) for docs in lists[1:]]
+            if any(all(start + offset in positions for offset, positions in enumerate(following, 1))
+                   for start in lists[0][doc_id]):
+                matches.add(doc_id)
+        return matches
+
+    def search(self, query: str, category: Optional[str] = None, content_type: Optional[str] = None,
+               phrase: bool = True, fuzzy: bool = False) -> List[dict]:
+        """
+        Entries whose name or text content contains the query tokens, in
+        corpus order. With phrase=True the tokens must be consecutive,
+        otherwise each must appear somewhere in the same field. fuzzy=True
+        also accepts tokens a few edits away.
+        """
+        tokens = word_tokens(query)
+        if not tokens:
+            return []
+        with self._lock:
+            groups = self._expand(tokens, fuzzy)
+            doc_ids = set()
+            for field in FIELDS:
+                doc_ids |= self._match_field(field, groups, phrase)
+            results = []
+            for doc_id in sorted(doc_ids):
+                doc_category, doc_content_type, entry = self._docs[doc_id]
+                if category is not None and doc_category != category:
+                    continue
+                if content_type is not None and doc_content_type != content_type:
+                    continue
+                results.append(entry)
+            return results
+
+    def _bm25_scores(self, groups: List[Dict[str, float]]) -> Dict[int, float]:
+        """
+        doc id -> BM25 score summed over fields with FIELD_WEIGHTS (call with
+        the lock held). A token group counts once per document, with its
+        best-scoring variant after the variant's weight.
+        """
+        scores: Dict[int, float] = {}
+        for field in FIELDS:
+            documents, total_length = self._field_totals[field]
+            if not documents:
+                continue
+            average_length = total_length / documents or 1.0
+            weight = FIELD_WEIGHTS[field]
+            for group in groups:
+                group_scores: Dict[int, float] = {}
+                for token, token_weight in group.items():
+                    docs = self._postings[field].get(token)
+                    if not docs:
+                        continue
+                    idf = math.log(1 + (documents - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for doc_id, positions in docs.items():
+                        tf = len(positions)
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id][field] / average_length)
+                        score = token_weight * weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                        if score > group_scores.get(doc_id, 0.0):
+                            group_scores[doc_id] = score
+                for doc_id, score in group_scores.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+        return scores
+
+    def _phrase_docs(self, groups: List[Dict[str, float]]) -> Set[int]:
+        """Documents holding the token groups consecutively in one field (call with the lock held)"""
+        docs = set()
+        for field in FIELDS:
+            docs |= self._match_field(field, groups, phrase=True)
+        return docs
+
+    def _ranked_scores(self, query: str, fuzzy: bool) -> Dict[int, float]:
+        """
+        doc id -> BM25 score of the query tokens, keeping only documents that
+        contain every quoted phrase; an unquoted query of several words gets
+        PHRASE_BOOST where they appear as a phrase (call with the lock held)
+        """
+        tokens = word_tokens(query)
+        scores = self._bm25_scores(self._expand(list(dict.fromkeys(tokens)), fuzzy))
+        phrases = quoted_phrases(query)
+        for phrase in phrases:
+            required = self._phrase_docs(self._expand(phrase, fuzzy))
+            scores = {doc_id: score for doc_id, score in scores.items() if doc_id in required}
+        if not phrases and len(tokens) > 1:
+            for doc_id in self._phrase_docs(self._expand(tokens, fuzzy)):
+                scores[doc_id] *= PHRASE_BOOST
+        return scores
+
+    def rank(self, query: str, category: Optional[str] = None, content_type: Optional[str] = None,
+             top_k: Optional[int] = None, fuzzy: bool = False) -> List[Tuple[dict, float]]:
+        """
+        (entry, BM25 score) for entries containing any query token, best
+        first. Only the posting lists of the query tokens are read; fuzzy=True
+        adds misspelled variants at FUZZY_EDIT_WEIGHT per edit. Quoted
+        phrases are required and other multi-word queries favour exact phrases.
+        """
+        tokens = list(dict.fromkeys(word_tokens(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            candidates = []
+            for doc_id, score in self._ranked_scores(query, fuzzy).items():
+                doc_category, doc_content_type, entry = self._docs[doc_id]
+                if (category is None or doc_category == category) and \
+                        (content_type is None or doc_content_type == content_type):
+                    candidates.append((entry, score))
+        return _best(candidates, top_k)
+
+    def rank_faceted(self, query: str, categories: Optional[Iterable[str]] = None,
+                     content_types: Optional[Iterable[str]] = None,
+                     top_k: Optional[int] = None, fuzzy: bool = False) -> Tuple[List[Tuple[str, str, dict, float]], Dict[str, Dict[str, int]]]:
+        """
+        BM25 ranking across the whole corpus in one pass, restricted to the
+        given categories / content types (None = all).
+        Returns: ([(category, content_type, entry, score)] best first,
+                  {'category': {category: hits}, 'content_type': {content type: hits}})
+        Each facet is counted under the other facet's filter only, so the
+        counts show how many hits selecting that value would give.
+        Quoted phrases and phrase matches count as in rank().
+        """
+        categories = set(categories) if categories else None
+        content_types = set(content_types) if content_types else None
+        facets = {'category': {}, 'content_type': {}}
+        tokens = list(dict.fromkeys(word_tokens(query)))
+        if not tokens:
+            return [], facets
+        with self._lock:
+            candidates = []
+            for doc_id, score in self._ranked_scores(query, fuzzy).items():
+                doc_category, doc_content_type, entry = self._docs[doc_id]
+                category_match = categories is None or doc_category in categories
+                content_type_match = content_types is None or doc_content_type in content_types
+                if content_type_match:
+                    facets['category'][doc_category] = facets['category'].get(doc_category, 0) + 1
+                if category_match:
+                    facets['content_type'][doc_content_type] = facets['content_type'].get(doc_content_type, 0) + 1
+                if category_match and content_type_match:
+                    candidates.append(((doc_category, doc_content_type, entry), score))
+        return [(*hit, score) for hit, score in _best(candidates, top_k)], facets
+
+    def snippet(self, query: str, entry: dict, category: Optional[str] = None, content_type: str = 'texts',
+                fuzzy: bool = False) -> Dict:
+        """
+        The passage of a text entry that best matches query: the one holding
+        the most distinct query tokens, then the most occurrences. Entries
+        not in the index (Swecha API results) get their first passage.
+        Returns: {'text': passage, 'highlights': [(start, end) in text of the
+                  matched words], 'start': offset in the full text, 'end': ..., 'length': ...}
+                  (offsets and length are in bytes of the file when the
+                  passage was read from a MappedText window)
+        """
+        tokens = list(dict.fromkeys(word_tokens(query)))
+        with self._lock:
+            groups = self._expand(tokens, fuzzy)
+            doc_id = self._doc_ids.get((category, content_type, entry_key(entry)))
+            passages, in_bytes = self._passages.get(doc_id, (None, False))
+            matched: Dict[int, Set[int]] = {}   # passage -> query groups found in it
+            occurrences: Dict[int, int] = {}
+            if passages is not None:
+                postings = self._postings['content']
+                for number, group in enumerate(groups):
+                    for token in group:
+                        for position in postings.get(token, {}).get(doc_id, ()):
+                            passage = position // PASSAGE_TOKENS
+                            matched.setdefault(passage, set()).add(number)
+                            occurrences[passage] = occurrences.get(passage, 0) + 1
+
+        best = min(matched, key=lambda passage: (-len(matched[passage]), -occurrences[passage], passage), default=0)
+        text = length = None
+        if in_bytes:
+            text, start, end, length = self._mapped_passage(entry, passages, best)
+        if text is None:
+            content = get_text_content(entry)
+            if passages is None or in_bytes:
+                passages = passage_offsets(content)
+            start, end = _passage_bounds(passages, best)
+            text, length = content[start:end], len(content)
+        text = text.rstrip()
+        variants = {token for group in groups for token in group}
+        return {'text': text, 'highlights': highlight_spans(text, variants),
+                'start': start, 'end': end, 'length': length}
+
+    @staticmethod
+    def _mapped_passage(entry, passages, best):
+        """
+        (text, start, end, file size) of a passage decoded from a MappedText
+        window, or a None text if the file changed since it was indexed
+        """
+        start, end = _passage_bounds(passages, best)
+        try:
+            with open_text(entry) as mapped:
+                if (mapped.size, mapped.mtime_ns) != (entry.get('size'), entry.get('mtime_ns')):
+                    return None, start, end, None
+                return mapped.decode(start, end), start, end, mapped.size
+        except OSError:
+            return None, start, end, None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'documents': len(self._docs),
+                **{f'{field}_terms': len(postings) for field, postings in self._postings.items()},
+                **{f'{field}_postings': sum(len(docs) for docs in postings.values())
+                   for field, postings in self._postings.items()},
+                'phonetic_keys': len(self._variants),
+                'passages': sum(len(offsets) - 1 for offsets, _ in self._passages.values())
+            }
@@ -0,0 +1,313 @@
+import os
+import json
+import heapq
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from ann_index import IVFIndex, top_k_indices
+from local_utils import entry_key, get_text_content
+
+# Newly added documents are kept in a small side block and merged into the
+# main matrix once the block reaches this many rows or this share of the main matrix
+MERGE_MIN_ROWS = 256
+MERGE_RATIO = 0.1
+# Removed rows are physically dropped once they make up this share of the matrix
+COMPACT_RATIO = 0.25
+# Categories with at least this many merged rows are searched through an IVF index
+ANN_MIN_ROWS = 50000
+# The IVF centroids are retrained once the matrix has grown by this factor,
+# smaller merges only assign the new rows to the existing clusters
+ANN_RETRAIN_GROWTH = 2.0
+# Saved IVF indexes live next to the corpus manifest, one folder per category
+ANN_DIRNAME = '.ann_index'
+# A query batch is split so its dense score block stays under this many cells (8 bytes each)
+BATCH_SCORE_CELLS = 4 * 1024 * 1024
+
+
+class _CategoryMatrix:
+    """Document-term matrix of one category with append-only updates and tombstones"""
+
+    def __init__(self, n_features: int, ann_min_rows: Optional[int] = None, ann_params: Optional[dict] = None,
+                 ann_dir: Optional[str] = None, ann_tag: str = ''):
+        self.n_features = n_features
+        self.entries = []      # row -> entry (None once removed)
+        self.dead = set()      # removed rows not yet compacted away
+        self.row_of = {}       # entry key -> row
+        self.main = sp.csc_matrix((0, n_features), dtype=np.float64)
+        self.pending = []      # 1 x n_features CSR rows not yet merged into main
+        self._pending_block = None
+        self.ann_min_rows = ann_min_rows
+        self.ann_params = ann_params or {}
+        self.ann = None        # IVFIndex over the rows of main, rebuilt on first use after a merge
+        self.ann_stale = False
+        self.ann_dir = ann_dir  # where the IVF index is saved (None = kept in memory only)
+        self.ann_tag = ann_tag  # vectorizer and IVF parameters the saved index must have been built with
+
+    def add(self, key, entry, vector):
+        if key in self.row_of:
+            self.remove(key)
+        self.row_of[key] = len(self.entries)
+        self.entries.append(entry)
+        self.pending.append(vector)
+        self._pending_block = None
+        if len(self.pending) >= max(MERGE_MIN_ROWS, int(self.main.shape[0] * MERGE_RATIO)):
+            self.merge()
+
+    def remove(self, key):
+        row = self.row_of.pop(key, None)
+        if row is None:
+            return
+        self.dead.add(row)
+        self.entries[row] = None
+        if len(self.dead) > COMPACT_RATIO * len(self.entries) and len(self.entries) > MERGE_MIN_ROWS:
+            self.compact()
+
+    def merge(self):
+        """Fold the pending rows into the column-major main matrix"""
+        if self.pending:
+            main_rows = sp.vstack([self.main.tocsr()] + self.pending, format='csr')
+            self.main = main_rows.tocsc()
+            self.pending = []
+            self._pending_block = None
+            self.ann_stale = True
+
+    def ensure_ann(self) -> Optional[IVFIndex]:
+        """
+        The IVF index of main (None below ann_min_rows). It is rebuilt on
+        first use after main changed, so loading a corpus builds it once
+        instead of once per merge.
+        """
+        if self.ann_stale:
+            self.ann_stale = False
+            self._rebuild_ann()
+        return self.ann
+
+    def _fingerprint(self) -> str:
+        """Identity of the rows of main: entry keys and file versions, in row order"""
+        digest = hashlib.sha1(self.ann_tag.encode('utf-8'))
+        digest.update(repr([
+            None if entry is None else (*entry_key(entry), entry.get('size'), entry.get('mtime_ns'))
+            for entry in self.entries[:self.main.shape[0]]
+        ]).encode('utf-8'))
+        digest.update(f"{self.main.shape[0]}:{self.main.nnz}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _rebuild_ann(self):
+        n_rows = self.main.shape[0]
+        if self.ann_min_rows is None or n_rows < self.ann_min_rows:
+            self.ann = None
+            return
+
+        header = fingerprint = None
+        if self.ann_dir:
+            header = IVFIndex.read_header(self.ann_dir)
+            fingerprint = self._fingerprint()
+            if header is not None and header['metadata'].get('fingerprint') == fingerprint:
+                # The saved index covers exactly these rows: map it instead of building
+                self.ann = IVFIndex.load(self.ann_dir, mmap=True)
+                return
+
+        centroids = trained_rows = None
+        if self.ann is not None and n_rows < self.ann.trained_rows * ANN_RETRAIN_GROWTH:
+            centroids, trained_rows = self.ann.centroids, self.ann.trained_rows
+        elif header is not None and header['metadata'].get('tag') == self.ann_tag and \
+                n_rows < header['trained_rows'] * ANN_RETRAIN_GROWTH:
+            # Centroids saved by an earlier version of the category (e.g. the previous run)
+            centroids, trained_rows = IVFIndex.load_centroids(self.ann_dir), header['trained_rows']
+        self.ann = IVFIndex(**self.ann_params).build(self.main.tocsr(), centroids=centroids)
+        if trained_rows is not None:
+            self.ann.trained_rows = trained_rows
+
+        if self.ann_dir:
+            try:
+                self.ann.save(self.ann_dir, {'fingerprint': fingerprint, 'tag': self.ann_tag})
+            except OSError as e:
+                print(f"Could not save the ANN index to {self.ann_dir}: {e}")
+
+    def pending_block(self):
+        """The pending rows stacked into one CSR matrix (cached until the next add or merge)"""
+        if self._pending_block is None and self.pending:
+            self._pending_block = sp.vstack(self.pending, format='csr')
+        return self._pending_block
+
+    def compact(self):
+        """Drop removed rows and renumber the remaining ones"""
+        keep = np.array([row for row in range(len(self.entries)) if row not in self.dead], dtype=np.int64)
+        main_rows = sp.vstack([self.main.tocsr()] + self.pending, format='csr')[keep]
+        self.pending = []
+        self._pending_block = None
+        self.main = main_rows.tocsc()
+        self.ann_stale = True
+        self.entries = [self.entries[row] for row in keep]
+        self.dead = set()
+        self.row_of = {entry_key(entry): row for row, entry in enumerate(self.entries)}
+
+    def scores(self, query_vector) -> np.ndarray:
+        """
+        Cosine similarity of every row with an L2-normalized 1 x n_features
+        CSR query. Only the columns of the query terms are touched, so the cost
+        depends on how many documents contain those terms, not on document length.
+        """
+        columns, weights = query_vector.indices, query_vector.data
+        scores = self.main[:, columns] @ weights if self.main.shape[0] else np.zeros(0)
+        if self.pending:
+            scores = np.concatenate([scores, self.pending_block()[:, columns] @ weights])
+        scores = np.asarray(scores).ravel()
+        if self.dead:
+            scores[list(self.dead)] = 0.0
+        return scores
+
+    def batch_scores(self, query_matrix) -> np.ndarray:
+        """
+        n_queries x n_rows similarities for an L2-normalized n_queries x
+        n_features CSR matrix, with one sparse product per block
+        """
+        blocks = [self.main] if self.main.shape[0] else []
+        if self.pending:
+            blocks.append(self.pending_block())
+        if not blocks:
+            return np.zeros((query_matrix.shape[0], 0))
+        query_columns = query_matrix.T.tocsc()
+        scores = np.hstack([(block @ query_columns).T.toarray() for block in blocks])
+        if self.dead:
+            scores[:, list(self.dead)] = 0.0
+        return scores
+
+    def top_k(self, query_vector, k: int) -> List[Tuple[int, float]]:
+        """
+        (row, similarity) of the k best rows. Exact unless an IVF index
+        exists; then main is searched approximately and only the pending
+        rows are scored exactly.
+        """
+        if self.ensure_ann() is None:
+            scores = self.scores(query_vector)
+            return [(int(row), float(scores[row])) for row in top_k_indices(scores, k)]
+
+        rows, scores = self.ann.query(query_vector, k, exclude=self.dead)
+        if self.pending:
+            columns, weights = query_vector.indices, query_vector.data
+            pending_scores = np.asarray(self.pending_block()[:, columns] @ weights).ravel()
+            pending_rows = np.arange(self.main.shape[0], len(self.entries))
+            alive = ~np.isin(pending_rows, list(self.dead)) if self.dead else slice(None)
+            rows = np.concatenate([rows, pending_rows[alive]])
+            scores = np.concatenate([scores, pending_scores[alive]])
+        return [(int(rows[i]), float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+class SemanticIndex:
+    """
+    Precomputed per-category TF-IDF matrices for semantic text search.
+
+    Registered as a corpus listener, so documents are vectorized once when
+    they are loaded or ingested instead of on every query.
+
+    Categories with at least ann_min_rows documents are searched through a
+    k-means IVF index (ann_params are IVFIndex arguments);
+    ann_min_rows=None keeps every search exact. With an ann_dir the index
+    of every category is saved there after each rebuild. On the next start
+    an index saved for the same rows and vectorizer is memory-mapped instead
+    of rebuilt; otherwise its centroids spare the k-means training.
+    """
+
+    def __init__(self, vectorizer, ann_min_rows: Optional[int] = ANN_MIN_ROWS, ann_params: Optional[dict] = None,
+                 ann_dir: Optional[str] = None):
+        self.vectorizer = vectorizer
+        self.n_features = len(vectorizer.vocabulary_)
+        self.ann_min_rows = ann_min_rows
+        self.ann_params = ann_params
+        self.ann_dir = ann_dir
+        tag = hashlib.sha1(json.dumps([self.n_features, ann_params or {}], sort_keys=True).encode('utf-8'))
+        if getattr(vectorizer, 'idf_', None) is not None:
+            tag.update(np.ascontiguousarray(vectorizer.idf_).tobytes())
+        self._ann_tag = tag.hexdigest()
+        self._lock = threading.Lock()
+        self._categories: Dict[str, _CategoryMatrix] = {}
+
+    def add_entry(self, category, content_type, entry, text=None):
+        if content_type != 'texts':
+            return
+        vector = self._vectorize([get_text_content(entry) if text is None else text])
+        with self._lock:
+            matrix = self._categories.get(category)
+            if matrix is None:
+                matrix = self._categories[category] = _CategoryMatrix(
+                    self.n_features, self.ann_min_rows, self.ann_params,
+                    os.path.join(self.ann_dir, category) if self.ann_dir else None, self._ann_tag)
+            matrix.add(entry_key(entry), entry, vector)
+
+    def remove_entry(self, category, content_type, entry):
+        if content_type != 'texts':
+            return
+        with self._lock:
+            matrix = self._categories.get(category)
+            if matrix is not None:
+                matrix.remove(entry_key(entry))
+
+    def _vectorize(self, texts: List[str]):
+        """Row-normalized TF-IDF vectors, so dot products are cosine similarities whatever the vectorizer's norm"""
+        return normalize(self.vectorizer.transform(texts), norm='l2', copy=False).tocsr()
+
+    def search(self, category: str, query: str, top_k: int = 5) -> List[Tuple[dict, float]]:
+        """Top-k (entry, cosine similarity) pairs with similarity > 0"""
+        query_vector = self._vectorize([query])
+        with self._lock:
+            matrix = self._categories.get(category)
+            if matrix is None or query_vector.nnz == 0:
+                return []
+            return [(matrix.entries[row], score) for row, score in matrix.top_k(query_vector, top_k) if score > 0]
+
+    def search_categories(self, query: str, categories: Optional[Iterable[str]] = None,
+                          top_k: int = 5) -> List[Tuple[str, dict, float]]:
+        """Top-k (category, entry, cosine similarity) over several categories (None = all)"""
+        return self.search_batch([query], categories, top_k)[0]
+
+    def search_batch(self, queries: List[str], categories: Optional[Iterable[str]] = None,
+                     top_k: int = 5) -> List[List[Tuple[str, dict, float]]]:
+        """
+        Top-k (category, entry, cosine similarity) for every query over
+        several categories (None = all). The queries are vectorized together
+        and each exact category is scored with one sparse product per block
+        of queries; categories with an IVF index are probed query by query.
+        """
+        query_matrix = self._vectorize(list(queries))
+        hits = [[] for _ in range(query_matrix.shape[0])]
+        with self._lock:
+            for category in (list(self._categories) if categories is None else categories):
+                matrix = self._categories.get(category)
+                if matrix is None:
+                    continue
+                if matrix.ensure_ann() is not None:
+                    for i in range(query_matrix.shape[0]):
+                        if query_matrix[i].nnz:
+                            hits[i].extend((category, matrix.entries[row], score)
+                                           for row, score in matrix.top_k(query_matrix[i], top_k) if score > 0)
+                    continue
+                block_size = max(1, BATCH_SCORE_CELLS // max(1, len(matrix.entries)))
+                for block_start in range(0, query_matrix.shape[0], block_size):
+                    scores = matrix.batch_scores(query_matrix[block_start:block_start + block_size])
+                    for i, row_scores in enumerate(scores, block_start):
+                        hits[i].extend((category, matrix.entries[row], float(row_scores[row]))
+                                       for row in top_k_indices(row_scores, top_k) if row_scores[row] > 0)
+        return [heapq.nlargest(top_k, query_hits, key=lambda hit: hit[2]) for query_hits in hits]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                category: {
+                    'documents': len(matrix.row_of),
+                    'nnz': int(matrix.main.nnz + sum(row.nnz for row in matrix.pending)),
+                    'pending_rows': len(matrix.pending),
+                    'ann_rows': len(matrix.ann) if matrix.ann is not None else 0
+                }
+                for category, matrix in self._categories.items()
+            }
+
+
+def default_ann_dir(base_path: str) -> str:
+    """Saved IVF index location for a data folder"""
+    return os.path.join(base_path, ANN_DIRNAME)
@@ -0,0 +1,134 @@
+"""
+Flat and hash-sharded file layouts for the data/ folder.
+
+Flat:     data/<category>/<type>s/<name>
+Sharded:  data/<category>/<type>s/<ab>/<cd>/<name>   (ab, cd = prefix of sha1(name))
+
+The loader reads both layouts (and a mix of them), so sharding can be
+switched on without migrating first. To move an existing tree:
+
+    python storage_layout.py migrate data --to sharded
+"""
+import os
+import sqlite3
+import hashlib
+import argparse
+from typing import Iterator, List, Tuple
+
+from corpus_manifest import CorpusManifest, default_manifest_path
+
+# Write new uploads into two-level hash-prefix directories instead of one flat folder
+SHARDED_STORAGE = False
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2  # hex characters per level -> 256 directories per level
+
+
+def shard_dir(folder_path: str, file_name: str) -> str:
+    """Shard directory a file name belongs to inside a content folder"""
+    digest = hashlib.sha1(file_name.encode('utf-8')).hexdigest()
+    parts = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return os.path.join(folder_path, *parts)
+
+
+def storage_dir(folder_path: str, file_name: str, sharded: bool = None) -> str:
+    """Directory a new file should be written to under the configured layout"""
+    if sharded is None:
+        sharded = SHARDED_STORAGE
+    return shard_dir(folder_path, file_name) if sharded else folder_path
+
+
+def iter_folder_files(folder_path: str) -> Iterator[os.DirEntry]:
+    """
+    Every file under a content folder, flat or sharded, using os.scandir so
+    file type checks need no extra stat calls
+    """
+    try:
+        with os.scandir(folder_path) as it:
+            subdirs = []
+            for dir_entry in it:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    subdirs.append(dir_entry.path)
+                elif dir_entry.is_file():
+                    yield dir_entry
+    except FileNotFoundError:
+        return
+    for subdir in subdirs:
+        yield from iter_folder_files(subdir)
+
+
+def _content_folders(base_path: str) -> Iterator[str]:
+    from local_utils import CATEGORIES, CONTENT_LOADERS
+    for category in CATEGORIES:
+        for _, folder, _, _ in CONTENT_LOADERS:
+            folder_path = os.path.join(base_path, category, folder)
+            if os.path.isdir(folder_path):
+                yield folder_path
+
+
+def migrate(base_path: str, sharded: bool = True, dry_run: bool = False) -> Tuple[int, int]:
+    """
+    Move every file of every content folder into the requested layout. The
+    corpus manifest (if any) is updated folder by folder, so moved files keep
+    their recorded entries and upload registry rows.
+    Returns: (moved, skipped) counts; files whose target name is taken are skipped
+    """
+    moved = skipped = 0
+    for folder_path in _content_folders(base_path):
+        moves = []
+        for dir_entry in list(iter_folder_files(folder_path)):
+            target_dir = shard_dir(folder_path, dir_entry.name) if sharded else folder_path
+            target = os.path.join(target_dir, dir_entry.name)
+            if os.path.normpath(target) == os.path.normpath(dir_entry.path):
+                continue
+            if os.path.exists(target):
+                print(f"Skipping {dir_entry.path}: {target} already exists")
+                skipped += 1
+                continue
+            if not dry_run:
+                os.makedirs(target_dir, exist_ok=True)
+                os.replace(dir_entry.path, target)
+                moves.append((dir_entry.path, target))
+            moved += 1
+
+        _record_moves(base_path, moves)
+        if not sharded and not dry_run:
+            _remove_empty_dirs(folder_path)
+    return moved, skipped
+
+
+def _record_moves(base_path: str, moves: List[Tuple[str, str]]):
+    """Re-point the manifest rows of moved files (no manifest yet means nothing to update)"""
+    manifest_path = default_manifest_path(base_path)
+    if not moves or not os.path.exists(manifest_path):
+        return
+    try:
+        manifest = CorpusManifest(manifest_path)
+        try:
+            manifest.move_paths(moves)
+        finally:
+            manifest.close()
+    except sqlite3.Error as e:
+        print(f"Could not update the corpus manifest, moved files will be re-scanned: {e}")
+
+
+def _remove_empty_dirs(folder_path: str):
+    """Remove shard directories left empty after migrating back to flat"""
+    for dir_path, _, _ in os.walk(folder_path, topdown=False):
+        if dir_path != folder_path:
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the data/ storage layout")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help="Move files between flat and sharded layouts")
+    migrate_parser.add_argument('base_path', nargs='?', default='data')
+    migrate_parser.add_argument('--to', choices=['sharded', 'flat'], default='sharded')
+    migrate_parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    moved, skipped = migrate(args.base_path, sharded=args.to == 'sharded', dry_run=args.dry_run)
+    print(f"{'Would move' if args.dry_run else 'Moved'} {moved} files to the {args.to} layout, skipped {skipped}")
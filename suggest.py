@@ -0,0 +1,150 @@
+"""
+Prefix suggestions for the search box.
+
+Every (category, content type) keeps its entry names (without extension)
+and the terms of names and texts, each with a weight: the number of
+entries with that name (times NAME_WEIGHT) or the number of documents
+containing the term. Suggestions are served from a sorted array of the
+normalized forms with bisect, so a prefix only reads its own range.
+
+Short prefixes match a large share of the array; their top completions
+are precomputed when the array is built. The arrays are rebuilt lazily
+on the first lookup after a corpus change, not on every keystroke.
+
+The suggestions every entry contributed are kept, so removing an entry
+takes back exactly those without reading its (possibly deleted or
+rewritten) file again.
+"""
+import bisect
+import heapq
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from local_utils import entry_key, get_text_content
+from telugu_text import normalize, word_tokens
+
+# A name suggestion counts like a term found in this many documents
+NAME_WEIGHT = 5
+# Top completions of prefixes up to this many characters are precomputed
+PRECOMPUTED_PREFIX_LENGTH = 3
+# Longer prefixes rank at most this many matches of their range
+MAX_SCAN = 2000
+DEFAULT_LIMIT = 10
+
+
+class _Scope:
+    """Suggestions of one (category, content type)"""
+
+    def __init__(self):
+        self.weights: Dict[str, int] = {}      # normalized suggestion -> weight
+        self.display: Dict[str, str] = {}      # normalized suggestion -> text shown
+        self.keys: List[str] = []              # sorted normalized suggestions
+        self.top: Dict[str, List[Tuple[int, str]]] = {}   # short prefix -> best (weight, key)
+        self.dirty = False
+
+    def update(self, key: str, display: str, delta: int):
+        weight = self.weights.get(key, 0) + delta
+        if weight > 0:
+            self.weights[key] = weight
+            self.display.setdefault(key, display)
+        else:
+            self.weights.pop(key, None)
+            self.display.pop(key, None)
+        self.dirty = True
+
+    def rebuild(self, limit: int):
+        self.keys = sorted(self.weights)
+        top: Dict[str, List[Tuple[int, str]]] = {}
+        for key in self.keys:
+            for length in range(1, min(PRECOMPUTED_PREFIX_LENGTH, len(key)) + 1):
+                best = top.setdefault(key[:length], [])
+                heapq.heappush(best, (self.weights[key], key))
+                if len(best) > limit:
+                    heapq.heappop(best)
+        self.top = top
+        self.dirty = False
+
+    def candidates(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            return self.top.get(prefix, [])
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\uffff', start, min(len(self.keys), start + MAX_SCAN))
+        return heapq.nlargest(limit, ((self.weights[key], key) for key in self.keys[start:end]))
+
+
+class PrefixSuggester:
+    """
+    Corpus listener serving top-N completions of a typed prefix from entry
+    names and frequent terms
+    """
+
+    def __init__(self, limit: int = DEFAULT_LIMIT):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._scopes: Dict[Tuple[str, str], _Scope] = {}
+        # (category, content type, entry key) -> suggestions the entry added, for removal
+        self._entry_suggestions: Dict[tuple, Dict[str, Tuple[str, int]]] = {}
+
+    @staticmethod
+    def _suggestions(content_type, entry, text=None) -> Dict[str, Tuple[str, int]]:
+        """normalized suggestion -> (display text, weight) contributed by one entry"""
+        name = os.path.splitext(entry['name'])[0]
+        tokens = set(word_tokens(name))
+        if content_type == 'texts':
+            tokens.update(word_tokens(get_text_content(entry) if text is None else text))
+        suggestions = {token: (token, 1) for token in tokens}
+        suggestions[normalize(name)] = (name, NAME_WEIGHT)
+        return suggestions
+
+    def _apply(self, scope_key, suggestions, sign):
+        scope = self._scopes.setdefault(scope_key, _Scope())
+        for key, (display, weight) in suggestions.items():
+            scope.update(key, display, sign * weight)
+
+    def add_entry(self, category, content_type, entry, text=None):
+        suggestions = self._suggestions(content_type, entry, text)
+        key = (category, content_type, entry_key(entry))
+        with self._lock:
+            # A re-added (rewritten) entry first takes back what its old version contributed
+            previous = self._entry_suggestions.pop(key, None)
+            if previous:
+                self._apply((category, content_type), previous, -1)
+            self._apply((category, content_type), suggestions, 1)
+            self._entry_suggestions[key] = suggestions
+
+    def remove_entry(self, category, content_type, entry):
+        # Decrement what was added: the file itself may already be gone or rewritten
+        with self._lock:
+            suggestions = self._entry_suggestions.pop((category, content_type, entry_key(entry)), None)
+            if suggestions:
+                self._apply((category, content_type), suggestions, -1)
+
+    def suggest(self, prefix: str, category: Optional[str] = None, content_type: Optional[str] = None,
+                limit: Optional[int] = None) -> List[str]:
+        """
+        Best completions of prefix (names and terms, most frequent first) in a
+        category/content type (None = all), at most the suggester's limit
+        """
+        limit = min(limit or self.limit, self.limit)
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+        with self._lock:
+            found: Dict[str, Tuple[int, str]] = {}
+            for (scope_category, scope_content_type), scope in self._scopes.items():
+                if (category is not None and scope_category != category) or \
+                        (content_type is not None and scope_content_type != content_type):
+                    continue
+                if scope.dirty:
+                    scope.rebuild(self.limit)
+                for weight, key in scope.candidates(prefix, limit):
+                    total = found.get(key, (0, scope.display[key]))[0] + weight
+                    found[key] = (total, scope.display[key])
+        best = heapq.nlargest(limit, found.items(), key=lambda item: (item[1][0], item[0]))
+        return [display for _, (_, display) in best]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'scopes': len(self._scopes),
+                    'suggestions': sum(len(scope.weights) for scope in self._scopes.values())}
@@ -1,26 +1,72 @@
 import requests
 import json
 import os
+import random
+import threading
+import time
 from typing import Dict, List, Optional, Any
 import streamlit as st
 from datetime import datetime
 import base64
+from requests.adapters import HTTPAdapter
 from swecha_config import (
-    SWECHA_API_BASE_URL, API_ENDPOINTS, API_TIMEOUT, 
+    SWECHA_API_BASE_URL, API_ENDPOINTS, API_TIMEOUT, API_CONNECT_TIMEOUT, API_HEALTH_TIMEOUT,
+    API_MAX_RETRIES, API_RETRY_DELAY, API_RETRY_MAX_DELAY, API_RETRY_BUDGET,
+    API_POOL_CONNECTIONS, API_POOL_MAXSIZE,
     CONTENT_CATEGORIES, CONTENT_TYPES, DEFAULT_METADATA,
     ERROR_MESSAGES, SUCCESS_MESSAGES, API_AUTH_TOKEN, 
     API_AUTH_HEADER, API_AUTH_TYPE
 )
 
+# Requests that can be sent again without side effects; other calls opt in with idempotent=True
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+# Responses worth retrying: rate limiting and temporary server or gateway failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
 class SwechaAPIClient:
     """
     Client for interacting with the Swecha Corpus API
+
+    Every request has connect/read timeouts. Idempotent requests are retried
+    on connection errors, timeouts and 429/5xx responses with exponential
+    backoff and full jitter, within a total time budget. The session's
+    connection pool holds pool_maxsize connections per host; requests beyond
+    that wait for a free connection (at most the connect timeout).
     """
     
-    def __init__(self, base_url: str = SWECHA_API_BASE_URL, auth_token: str = None):
+    def __init__(self, base_url: str = SWECHA_API_BASE_URL, auth_token: str = None,
+                 connect_timeout: float = API_CONNECT_TIMEOUT, read_timeout: float = API_TIMEOUT,
+                 max_retries: int = API_MAX_RETRIES, retry_delay: float = API_RETRY_DELAY,
+                 retry_max_delay: float = API_RETRY_MAX_DELAY, retry_budget: float = API_RETRY_BUDGET,
+                 pool_connections: int = API_POOL_CONNECTIONS, pool_maxsize: int = API_POOL_MAXSIZE):
         self.base_url = base_url
         self.auth_token = auth_token or API_AUTH_TOKEN
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.retry_budget = retry_budget
+        self.pool_maxsize = pool_maxsize
         self.session = requests.Session()
+        # Retries are done here rather than by urllib3, so they can be counted and jittered
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              max_retries=0, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # One slot per pooled connection, so waiting for a connection can be measured
+        self._pool_slots = threading.BoundedSemaphore(pool_maxsize)
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'requests': 0,
+            'retries': 0,
+            'retry_sleep_seconds': 0.0,
+            'timeouts': 0,
+            'connection_errors': 0,
+            'failed_requests': 0,
+            'pool_waits': 0,
+            'pool_wait_seconds': 0.0,
+            'pool_wait_timeouts': 0
+        }
         self.session.headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'TeluguCulturalHeritage/1.0'
@@ -40,11 +86,86 @@ class SwechaAPIClient:
         else:
             print("⚠️  No authentication token provided - some endpoints may require authentication")
         
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict]:
-        """Make HTTP request to the API"""
+    def _count(self, **increments):
+        with self._metrics_lock:
+            for name, value in increments.items():
+                self._metrics[name] += value
+
+    def metrics(self) -> Dict[str, Any]:
+        """Request, retry, timeout and connection pool counters since the client was created"""
+        with self._metrics_lock:
+            return {**self._metrics, 'pool_maxsize': self.pool_maxsize}
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """One attempt through the connection pool, with the client's timeouts unless given"""
+        kwargs.setdefault('timeout', self.timeout)
+        if not self._pool_slots.acquire(blocking=False):
+            # Every pooled connection is busy: wait for one, but not longer than a connect would take
+            started = time.monotonic()
+            acquired = self._pool_slots.acquire(timeout=self.timeout[0])
+            self._count(pool_waits=1, pool_wait_seconds=time.monotonic() - started)
+            if not acquired:
+                self._count(pool_wait_timeouts=1, timeouts=1)
+                raise requests.exceptions.ConnectTimeout(f"No free connection to {self.base_url} in the pool")
+        try:
+            self._count(requests=1)
+            return self.session.request(method, url, **kwargs)
+        except requests.exceptions.Timeout:
+            self._count(timeouts=1)
+            raise
+        except requests.exceptions.ConnectionError:
+            self._count(connection_errors=1)
+            raise
+        finally:
+            self._pool_slots.release()
+
+    def _backoff(self, attempt: int, deadline: float, retry_after: Optional[str] = None) -> bool:
+        """
+        Sleep before retry number attempt + 1: a random delay up to
+        retry_delay * 2 ** attempt (full jitter), or the server's Retry-After
+        seconds. Returns False without sleeping when the delay would pass the deadline.
+        """
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = random.uniform(0, self.retry_delay * 2 ** attempt)
+        delay = min(max(delay, 0.0), self.retry_max_delay)
+        if time.monotonic() + delay >= deadline:
+            return False
+        self._count(retries=1, retry_sleep_seconds=delay)
+        time.sleep(delay)
+        return True
+
+    def _request_with_retries(self, method: str, url: str, idempotent: bool, **kwargs) -> requests.Response:
+        """The final response (or exception) after retrying retryable failures of idempotent requests"""
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        deadline = time.monotonic() + self.retry_budget
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                response = self._send(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last or not self._backoff(attempt, deadline):
+                    raise
+                continue
+            if response.status_code in RETRY_STATUSES and not last and \
+                    self._backoff(attempt, deadline, response.headers.get('Retry-After')):
+                continue
+            return response
+
+    def _make_request(self, method: str, endpoint: str, idempotent: Optional[bool] = None,
+                      **kwargs) -> Optional[Dict]:
+        """
+        Make HTTP request to the API. GET-like requests are retried; pass
+        idempotent=True for other requests that are safe to send twice.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
         try:
             url = f"{self.base_url}{endpoint}"
-            response = self.session.request(method, url, **kwargs)
+            response = self._request_with_retries(method, url, idempotent, **kwargs)
+            if response.status_code not in (200, 201):
+                self._count(failed_requests=1)
             
             if response.status_code == 200:
                 return response.json()
@@ -63,13 +184,20 @@ class SwechaAPIClient:
                 st.error(f"API request failed with status {response.status_code}: {response.text}")
                 return None
                 
+        except requests.exceptions.Timeout as e:
+            self._count(failed_requests=1)
+            st.error(f"Request timed out: {str(e)}")
+            return None
         except requests.exceptions.RequestException as e:
+            self._count(failed_requests=1)
             st.error(f"Network error: {str(e)}")
             return None
         except json.JSONDecodeError as e:
+            self._count(failed_requests=1)
             st.error(f"Invalid JSON response: {str(e)}")
             return None
         except Exception as e:
+            self._count(failed_requests=1)
             st.error(f"Unexpected error: {str(e)}")
             return None
     
@@ -105,13 +233,14 @@ class SwechaAPIClient:
         results = []
         
         # Method 1: Direct content search
-        response = self._make_request("POST", endpoint, json=search_params)
+        # Searches are read-only, so their POSTs are retried like GETs
+        response = self._make_request("POST", endpoint, idempotent=True, json=search_params)
         if response and "results" in response:
             results.extend(response["results"])
         
         # Method 2: Files search if content search doesn't work
         if not results:
-            files_response = self._make_request("POST", "/files/search", json=search_params)
+            files_response = self._make_request("POST", "/files/search", idempotent=True, json=search_params)
             if files_response and "files" in files_response:
                 results.extend(files_response["files"])
         
@@ -240,7 +369,8 @@ class SwechaAPIClient:
     def health_check(self) -> bool:
         """Check if the API is accessible"""
         try:
-            response = self.session.get(f"{self.base_url}/health", timeout=5)
+            # A single quick probe: callers fall back to local results instead of waiting on retries
+            response = self._send("GET", f"{self.base_url}/health", timeout=(self.timeout[0], API_HEALTH_TIMEOUT))
             return response.status_code == 200
         except:
             return False
@@ -261,29 +391,28 @@ def get_swecha_search_results(query: str, category: str = None, content_type: st
         
     Returns:
         List of search results
+
+    Raises:
+        Errors from a malformed response are left to the caller to report,
+        so this also runs without Streamlit (e.g. in search_engine.py)
     """
-    try:
-        results = swecha_client.search_content(query, category, content_type, limit)
-        
-        # Transform results to match your app's expected format
-        transformed_results = []
-        for result in results:
-            transformed_result = {
-                'name': result.get('title', result.get('name', 'Unknown')),
-                'path': result.get('file_path', result.get('url', '')),
-                'content': result.get('content', result.get('description', '')),
-                'category': result.get('category', ''),
-                'content_type': result.get('content_type', ''),
-                'uploaded_at': result.get('uploaded_at', ''),
-                'source': 'swecha_api'
-            }
-            transformed_results.append(transformed_result)
-        
-        return transformed_results
-        
-    except Exception as e:
-        st.error(f"Error fetching results from Swecha API: {str(e)}")
-        return []
+    results = swecha_client.search_content(query, category, content_type, limit)
+
+    # Transform results to match your app's expected format
+    transformed_results = []
+    for result in results:
+        transformed_result = {
+            'name': result.get('title', result.get('name', 'Unknown')),
+            'path': result.get('file_path', result.get('url', '')),
+            'content': result.get('content', result.get('description', '')),
+            'category': result.get('category', ''),
+            'content_type': result.get('content_type', ''),
+            'uploaded_at': result.get('uploaded_at', ''),
+            'source': 'swecha_api'
+        }
+        transformed_results.append(transformed_result)
+
+    return transformed_results
 
 def upload_to_swecha(file_path: str, category: str, content_type: str, 
                      metadata: Dict = None) -> bool:
@@ -0,0 +1,179 @@
+"""
+Telugu-aware text analysis shared by the TF-IDF vectorizer and the search indexes.
+
+The default scikit-learn token pattern (\\w\\w+) treats Telugu vowel signs and
+the virama (Unicode category Mn/Mc) as separators, so "చార్మినార్" becomes
+fragments like "చ", "ర", "మ". Here a word is a run of letters, digits and
+Telugu signs, and character n-grams are built from aksharas (grapheme
+clusters: consonant [+ virama + consonant]* + signs), never from half a
+character.
+"""
+import functools
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+ZWNJ = '\u200C'
+ZWJ = '\u200D'
+
+_CONSONANT = '[\u0C15-\u0C39\u0C58-\u0C5A\u0C5D]'
+_VOWEL = '[\u0C05-\u0C14\u0C60\u0C61]'
+_SIGN = '[\u0C00-\u0C04\u0C3C\u0C3E-\u0C4C\u0C55\u0C56\u0C62\u0C63]'
+_VIRAMA = '\u0C4D'
+
+# One akshara, or any other single character
+GRAPHEME_PATTERN = re.compile(
+    f'{_CONSONANT}(?:{_VIRAMA}{_CONSONANT})*(?:{_SIGN}|{_VIRAMA})*|{_VOWEL}{_SIGN}*|.', re.S)
+# Letters, digits and the whole Telugu block; underscores separate words as in file names
+WORD_PATTERN = re.compile('(?:[^\\W_]|[\u0C00-\u0C7F])+')
+_JOINERS = re.compile(f'[{ZWNJ}{ZWJ}\u00AD\uFEFF]')
+# Words of unnormalized text: the characters normalize() drops cannot split a word
+_SPAN_PATTERN = re.compile(f'(?:[^\\W_]|[\u0C00-\u0C7F])(?:[^\\W_]|[\u0C00-\u0C7F{ZWNJ}{ZWJ}\u00AD\uFEFF])*')
+
+
+def normalize(text: str) -> str:
+    """
+    NFC-normalize and lowercase text, dropping ZWJ/ZWNJ (which only select a
+    rendering of a conjunct) and soft hyphens/BOMs, so visually identical
+    spellings compare equal
+    """
+    return _JOINERS.sub('', unicodedata.normalize('NFC', text)).lower()
+
+
+def graphemes(text: str) -> List[str]:
+    """Split already normalized text into aksharas / single characters"""
+    return GRAPHEME_PATTERN.findall(text)
+
+
+def word_tokens(text: str) -> List[str]:
+    """Normalized word tokens of text, in order"""
+    return WORD_PATTERN.findall(normalize(text))
+
+
+def word_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) of every word of text in the original, unnormalized string,
+    in order. Joiners inside a word stay part of it, so the spans line up
+    with word_tokens(text).
+    """
+    return [match.span() for match in _SPAN_PATTERN.finditer(text)]
+
+
+def grapheme_ngrams(word: str, ngram_range: Tuple[int, int] = (2, 3)) -> List[str]:
+    """Akshara n-grams of one normalized word, padded with < and > at the word boundaries"""
+    clusters = ['<'] + graphemes(word) + ['>']
+    min_n, max_n = ngram_range
+    return [
+        ''.join(clusters[i:i + n])
+        for n in range(min_n, max_n + 1)
+        for i in range(len(clusters) - n + 1)
+    ]
+
+
+# Telugu -> Latin letters (a loose ISO 15919 without diacritics, as users type it:
+# long e/o are not doubled)
+_CONSONANT_LATIN = {
+    'క': 'k', 'ఖ': 'kh', 'గ': 'g', 'ఘ': 'gh', 'ఙ': 'ng',
+    'చ': 'ch', 'ఛ': 'chh', 'జ': 'j', 'ఝ': 'jh', 'ఞ': 'ny',
+    'ట': 't', 'ఠ': 'th', 'డ': 'd', 'ఢ': 'dh', 'ణ': 'n',
+    'త': 't', 'థ': 'th', 'ద': 'd', 'ధ': 'dh', 'న': 'n',
+    'ప': 'p', 'ఫ': 'ph', 'బ': 'b', 'భ': 'bh', 'మ': 'm',
+    'య': 'y', 'ర': 'r', 'ఱ': 'r', 'ల': 'l', 'ళ': 'l', 'ఴ': 'zh', 'వ': 'v',
+    'శ': 'sh', 'ష': 'sh', 'స': 's', 'హ': 'h',
+    '\u0C58': 'ts', '\u0C59': 'dz', '\u0C5A': 'rr', '\u0C5D': 'n',
+}
+_VOWEL_LATIN = {
+    'అ': 'a', 'ఆ': 'aa', 'ఇ': 'i', 'ఈ': 'ii', 'ఉ': 'u', 'ఊ': 'uu', 'ఋ': 'ru', 'ౠ': 'ruu',
+    'ఌ': 'lu', 'ౡ': 'luu', 'ఎ': 'e', 'ఏ': 'e', 'ఐ': 'ai', 'ఒ': 'o', 'ఓ': 'o', 'ఔ': 'au',
+}
+_VOWEL_SIGN_LATIN = {
+    'ా': 'aa', 'ి': 'i', 'ీ': 'ii', 'ు': 'u', 'ూ': 'uu', 'ృ': 'ru', 'ౄ': 'ruu',
+    'ె': 'e', 'ే': 'e', 'ై': 'ai', 'ొ': 'o', 'ో': 'o', 'ౌ': 'au',
+    '\u0C62': 'lu', '\u0C63': 'luu',
+}
+_LABIALS = ('p', 'b', 'm', 'v')
+# Spelling differences a phonetic key ignores, longest first: aspiration,
+# vowel length, retroflex vs dental and common English spellings
+_KEY_RULES = [
+    ('chh', 'c'), ('ch', 'c'), ('sh', 's'), ('th', 't'), ('dh', 'd'), ('kh', 'k'), ('gh', 'g'),
+    ('ph', 'p'), ('bh', 'b'), ('jh', 'j'), ('zh', 'l'), ('ck', 'k'), ('ee', 'i'), ('ii', 'i'),
+    ('oo', 'u'), ('uu', 'u'), ('aa', 'a'), ('c', 'k'), ('w', 'v'), ('f', 'p'), ('z', 'j'), ('q', 'k'),
+    ('x', 'ks'),
+]
+_KEY_PATTERN = re.compile('|'.join(re.escape(source) for source, _ in _KEY_RULES))
+_KEY_REPLACEMENTS = dict(_KEY_RULES)
+_REPEATS = re.compile(r'(.)\1+')
+_TELUGU = re.compile('[\u0C00-\u0C7F]')
+
+
+def romanize(text: str) -> str:
+    """Latin spelling of Telugu text (other characters are kept as they are)"""
+    out = []
+    characters = normalize(text)
+    for i, character in enumerate(characters):
+        following = characters[i + 1] if i + 1 < len(characters) else ''
+        if character in _CONSONANT_LATIN:
+            out.append(_CONSONANT_LATIN[character])
+            # Inherent vowel unless a vowel sign or virama follows
+            if following not in _VOWEL_SIGN_LATIN and following not in (_VIRAMA, '\u0C3C'):
+                out.append('a')
+        elif character in _VOWEL_LATIN:
+            out.append(_VOWEL_LATIN[character])
+        elif character in _VOWEL_SIGN_LATIN:
+            out.append(_VOWEL_SIGN_LATIN[character])
+        elif character in ('\u0C02', '\u0C01', '\u0C00'):
+            # Anusvara / candrabindu: m before labials and at the end of a word, n elsewhere
+            next_latin = _CONSONANT_LATIN.get(following)
+            out.append('m' if next_latin is None or next_latin.startswith(_LABIALS) else 'n')
+        elif character == '\u0C03':
+            out.append('h')
+        elif '\u0C66' <= character <= '\u0C6F':
+            out.append(str(ord(character) - 0x0C66))
+        elif character not in (_VIRAMA, '\u0C3C'):
+            out.append(character)
+    return ''.join(out)
+
+
+@functools.lru_cache(maxsize=65536)
+def phonetic_key(token: str) -> str:
+    """
+    Script-independent key of a word token: Telugu is romanized first, then
+    aspiration, vowel length and doubled letters are folded, so "charminar",
+    "chaarminaar" and "చార్మినార్" share a key
+    """
+    latin = romanize(token) if _TELUGU.search(token) else normalize(token)
+    folded = _KEY_PATTERN.sub(lambda match: _KEY_REPLACEMENTS[match.group()], latin)
+    return _REPEATS.sub(r'\1', folded)
+
+
+class TeluguAnalyzer:
+    """
+    Callable analyzer for TfidfVectorizer(analyzer=TeluguAnalyzer(...)).
+
+    Produces word n-grams and, optionally, akshara n-grams inside each word,
+    which match inflected forms (హైదరాబాద్లో / హైదరాబాద్) that share a stem.
+    Defined at module level so fitted vectorizers can be pickled with joblib.
+    """
+
+    def __init__(self, word_ngram_range: Tuple[int, int] = (1, 1),
+                 grapheme_ngram_range: Optional[Tuple[int, int]] = None):
+        self.word_ngram_range = tuple(word_ngram_range)
+        self.grapheme_ngram_range = tuple(grapheme_ngram_range) if grapheme_ngram_range else None
+
+    def __call__(self, text: str) -> List[str]:
+        words = word_tokens(text)
+        features = []
+        min_n, max_n = self.word_ngram_range
+        for n in range(min_n, max_n + 1):
+            if n == 1:
+                features.extend(words)
+            else:
+                features.extend(' '.join(words[i:i + n]) for i in range(len(words) - n + 1))
+        if self.grapheme_ngram_range:
+            for word in words:
+                features.extend(grapheme_ngrams(word, self.grapheme_ngram_range))
+        return features
+
+    def __repr__(self):
+        return (f"TeluguAnalyzer(word_ngram_range={self.word_ngram_range}, "
+                f"grapheme_ngram_range={self.grapheme_ngram_range})")
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+from ann_index import IVFIndex, top_k_indices
+from semantic_index import _CategoryMatrix
+
+
+@pytest.fixture
+def vectors():
+    return normalize(sp.random(400, 60, density=0.1, format='csr', random_state=1))
+
+
+def exact_top_k(vectors, query, k):
+    scores = np.asarray(vectors @ query.T.toarray()).ravel()
+    return top_k_indices(scores, k)
+
+
+def test_top_k_indices_best_first():
+    scores = np.array([0.1, 0.9, 0.3, 0.7, 0.5])
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 4]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 4, 2, 0]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_probing_every_cluster_is_exact(vectors):
+    index = IVFIndex(n_clusters=10).build(vectors)
+    assert len(index) == vectors.shape[0]
+    for row in range(0, 400, 40):
+        query = vectors[row]
+        rows, _ = index.query(query, 5, n_probe=10)
+        assert rows.tolist() == exact_top_k(vectors, query, 5).tolist()
+
+
+def test_partial_probe_finds_the_nearest_row(vectors):
+    index = IVFIndex(n_clusters=10, n_probe=3).build(vectors)
+    found = sum(index.query(vectors[row], 1)[0].tolist() == [row] for row in range(0, 400, 10))
+    assert found == 40
+
+
+def test_query_excludes_rows(vectors):
+    index = IVFIndex(n_clusters=10).build(vectors)
+    rows, _ = index.query(vectors[7], 5, n_probe=10, exclude={7})
+    assert 7 not in rows.tolist()
+    assert len(rows) == 5
+
+
+def test_rebuild_with_saved_centroids_skips_training(vectors):
+    first = IVFIndex(n_clusters=10).build(vectors[:300])
+    second = IVFIndex(n_clusters=10).build(vectors, centroids=first.centroids)
+    np.testing.assert_array_equal(second.centroids, first.centroids)
+    assert len(second) == 400
+
+
+def test_save_and_mmap_load_give_the_same_results(vectors, tmp_path):
+    index = IVFIndex(n_clusters=10, n_probe=4).build(vectors)
+    index.save(str(tmp_path), {'fingerprint': 'abc'})
+
+    header = IVFIndex.read_header(str(tmp_path))
+    assert header['metadata'] == {'fingerprint': 'abc'}
+    assert header['trained_rows'] == 400
+    assert not list(tmp_path.glob('*.tmp'))
+
+    loaded = IVFIndex.load(str(tmp_path), mmap=True)
+    assert isinstance(loaded.ids, np.memmap)
+    for row in range(0, 400, 50):
+        expected_rows, expected_scores = index.query(vectors[row], 5)
+        rows, scores = loaded.query(vectors[row], 5)
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+    np.testing.assert_array_equal(IVFIndex.load_centroids(str(tmp_path)), index.centroids)
+
+
+def test_read_header_without_an_index(tmp_path):
+    assert IVFIndex.read_header(str(tmp_path)) is None
+
+
+def category_matrix(vectors, ann_dir):
+    matrix = _CategoryMatrix(vectors.shape[1], ann_min_rows=100, ann_params={'n_clusters': 10}, ann_dir=ann_dir)
+    for row in range(vectors.shape[0]):
+        matrix.add((f'{row}.txt', None), {'path': f'{row}.txt', 'name': f'{row}.txt'}, vectors[row])
+    matrix.merge()
+    return matrix
+
+
+def test_category_matrix_maps_its_saved_index_on_restart(vectors, tmp_path):
+    ann_dir = str(tmp_path / 'culture')
+    first = category_matrix(vectors, ann_dir)
+    assert first.ensure_ann() is not None
+    assert IVFIndex.read_header(ann_dir)['metadata']['fingerprint'] == first._fingerprint()
+
+    restarted = category_matrix(vectors, ann_dir)
+    assert isinstance(restarted.ensure_ann().ids, np.memmap)
+    assert restarted.top_k(vectors[3], 3) == first.top_k(vectors[3], 3)
+
+
+def test_category_matrix_reuses_saved_centroids_after_a_change(vectors, tmp_path):
+    ann_dir = str(tmp_path / 'culture')
+    first = category_matrix(vectors[:300], ann_dir)
+    first.ensure_ann()
+
+    grown = category_matrix(vectors, ann_dir)
+    ann = grown.ensure_ann()
+    assert not isinstance(ann.ids, np.memmap)
+    assert len(ann) == 400
+    assert ann.trained_rows == 300
+    np.testing.assert_array_equal(ann.centroids, first.ann.centroids)
+
+
+def test_category_matrix_stays_exact_below_ann_min_rows(vectors):
+    matrix = _CategoryMatrix(vectors.shape[1], ann_min_rows=1000)
+    for row in range(50):
+        matrix.add((f'{row}.txt', None), {'path': f'{row}.txt'}, vectors[row])
+    matrix.merge()
+    assert matrix.ensure_ann() is None
@@ -0,0 +1,72 @@
+from cache_utils import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, ttl_seconds=30, clock=clock)
+    cache.put('q', ['result'])
+    clock.now = 29.9
+    assert cache.get('q') == ['result']
+    clock.now = 30.0
+    assert cache.get('q') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['entries']) == (1, 1, 1, 0)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_put_restarts_the_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, ttl_seconds=30, clock=clock)
+    cache.put('q', 1)
+    clock.now = 20
+    cache.put('q', 2)
+    clock.now = 40
+    assert cache.get('q') == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl_seconds=60, clock=FakeClock())
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_get_or_load_calls_the_loader_once():
+    cache = TTLCache(max_entries=4, ttl_seconds=60, clock=FakeClock())
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 'value'
+
+    assert cache.get_or_load('k', loader) == 'value'
+    assert cache.get_or_load('k', loader) == 'value'
+    assert len(calls) == 1
+
+
+def test_purge_invalidate_and_clear():
+    cache = TTLCache(max_entries=10, ttl_seconds=60, clock=FakeClock())
+    for key in [('v1', 'temple'), ('v1', 'festival'), ('v2', 'temple')]:
+        cache.put(key, key)
+    assert cache.purge(lambda key: key[0] == 'v1') == 2
+    assert cache.get(('v1', 'temple')) is None
+    assert cache.get(('v2', 'temple')) == ('v2', 'temple')
+
+    cache.invalidate(('v2', 'temple'))
+    assert cache.get(('v2', 'temple')) is None
+    cache.put('x', 1)
+    cache.clear()
+    assert cache.stats()['entries'] == 0
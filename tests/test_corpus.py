@@ -0,0 +1,167 @@
+import os
+import threading
+
+import pytest
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+
+from corpus import CorpusWatcher, CulturalCorpus, _CorpusEventHandler
+
+
+class RecordingListener:
+    def __init__(self):
+        self.events = []
+
+    def add_entry(self, category, content_type, entry, text=None):
+        self.events.append(('add', category, content_type, entry['name'], text))
+
+    def remove_entry(self, category, content_type, entry):
+        self.events.append(('remove', category, content_type, entry['name']))
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+
+def names(corpus, category='culture', content_type='texts'):
+    return [entry['name'] for entry in corpus.snapshot()[category][content_type]]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write(tmp_path / 'culture' / 'texts' / 'bonalu.txt', 'bonalu festival')
+    write(tmp_path / 'monuments' / 'texts' / 'fort.txt', 'golconda fort')
+    return tmp_path
+
+
+@pytest.fixture
+def corpus(data_dir):
+    return CulturalCorpus.load(str(data_dir))
+
+
+def test_listeners_are_fed_existing_entries_with_their_text(corpus):
+    listener = RecordingListener()
+    corpus.add_listener(listener)
+    assert sorted(listener.events) == [('add', 'culture', 'texts', 'bonalu.txt', 'bonalu festival'),
+                                       ('add', 'monuments', 'texts', 'fort.txt', 'golconda fort')]
+
+
+def test_ingest_adds_and_replaces_a_file(corpus, data_dir):
+    listener = RecordingListener()
+    corpus.add_listener(listener)
+    listener.events.clear()
+    version = corpus.version
+
+    path = write(data_dir / 'culture' / 'texts' / 'kites.txt', 'sankranti kites')
+    assert [entry['name'] for entry in corpus.ingest_file(path)] == ['kites.txt']
+    assert names(corpus) == ['bonalu.txt', 'kites.txt']
+    assert listener.events == [('add', 'culture', 'texts', 'kites.txt', 'sankranti kites')]
+
+    write(path, 'sankranti kites and rangoli')
+    os.utime(path, ns=(1, 1))
+    corpus.ingest_file(path)
+    assert names(corpus) == ['bonalu.txt', 'kites.txt']
+    assert listener.events[1:] == [('remove', 'culture', 'texts', 'kites.txt'),
+                                   ('add', 'culture', 'texts', 'kites.txt', 'sankranti kites and rangoli')]
+    assert corpus.version == version + 2
+
+
+def test_ingest_ignores_files_outside_the_content_folders(corpus, data_dir):
+    assert corpus.ingest_file(write(data_dir / 'culture' / 'notes.txt', 'x')) is None
+    assert corpus.ingest_file(write(data_dir / 'culture' / 'texts' / 'song.mp3', 'x')) is None
+    assert corpus.ingest_file(str(data_dir / 'culture' / 'texts' / 'missing.txt')) is None
+
+
+def test_remove_file(corpus, data_dir):
+    listener = RecordingListener()
+    corpus.add_listener(listener)
+    listener.events.clear()
+
+    path = str(data_dir / 'culture' / 'texts' / 'bonalu.txt')
+    os.remove(path)
+    assert corpus.remove_file(path)
+    assert names(corpus) == []
+    assert listener.events == [('remove', 'culture', 'texts', 'bonalu.txt')]
+    assert not corpus.remove_file(path)
+
+
+def test_changes_are_persisted_to_the_manifest(corpus, data_dir):
+    path = write(data_dir / 'culture' / 'texts' / 'kites.txt', 'sankranti kites')
+    corpus.ingest_file(path)
+    corpus.remove_file(str(data_dir / 'culture' / 'texts' / 'bonalu.txt'))
+    os.remove(str(data_dir / 'culture' / 'texts' / 'bonalu.txt'))
+
+    restarted = CulturalCorpus.load(str(data_dir))
+    assert names(restarted) == ['kites.txt']
+
+
+def test_snapshot_only_rebuilds_the_changed_list(corpus, data_dir):
+    before = corpus.snapshot()
+    assert corpus.snapshot() is before
+    corpus.ingest_file(write(data_dir / 'culture' / 'texts' / 'kites.txt', 'kites'))
+    after = corpus.snapshot()
+    assert after is not before
+    assert after['monuments']['texts'] is before['monuments']['texts']
+    assert after['culture']['texts'] is not before['culture']['texts']
+    assert [entry['name'] for entry in before['culture']['texts']] == ['bonalu.txt']
+
+
+def test_snapshot_does_not_wait_for_listeners(corpus, data_dir):
+    entered, release = threading.Event(), threading.Event()
+
+    class SlowListener(RecordingListener):
+        def add_entry(self, category, content_type, entry, text=None):
+            if entry['name'] == 'kites.txt':
+                entered.set()
+                release.wait(5)
+
+    corpus.add_listener(SlowListener())
+    path = write(data_dir / 'culture' / 'texts' / 'kites.txt', 'kites')
+    ingest = threading.Thread(target=corpus.ingest_file, args=(path,))
+    ingest.start()
+    try:
+        assert entered.wait(5)
+        # The ingest is inside a listener: readers already see the new entries
+        assert names(corpus) == ['bonalu.txt', 'kites.txt']
+    finally:
+        release.set()
+        ingest.join()
+
+
+def test_event_handler_applies_watchdog_events(corpus, data_dir):
+    handler = _CorpusEventHandler(corpus)
+    folder = data_dir / 'culture' / 'texts'
+
+    handler.on_created(FileCreatedEvent(write(folder / 'kites.txt', 'kites')))
+    assert names(corpus) == ['bonalu.txt', 'kites.txt']
+
+    write(folder / 'kites.txt', 'kites and rangoli')
+    handler.on_modified(FileModifiedEvent(str(folder / 'kites.txt')))
+    assert [entry['size'] for entry in corpus.snapshot()['culture']['texts']][1] == len('kites and rangoli')
+
+    os.rename(folder / 'kites.txt', folder / 'gaalipatam.txt')
+    handler.on_moved(FileMovedEvent(str(folder / 'kites.txt'), str(folder / 'gaalipatam.txt')))
+    assert names(corpus) == ['bonalu.txt', 'gaalipatam.txt']
+
+    os.remove(folder / 'bonalu.txt')
+    handler.on_deleted(FileDeletedEvent(str(folder / 'bonalu.txt')))
+    assert names(corpus) == ['gaalipatam.txt']
+
+
+def test_polling_watcher_picks_up_added_removed_and_renamed_files(corpus, data_dir):
+    watcher = CorpusWatcher(corpus, use_polling=True)
+    watcher._folder_state = watcher._scan_folders({})
+    folder = data_dir / 'culture' / 'texts'
+
+    write(folder / 'kites.txt', 'kites')
+    os.remove(folder / 'bonalu.txt')
+    write(data_dir / 'traditions' / 'texts' / 'kolatam.txt', 'stick dance')
+    watcher.poll_once()
+    assert names(corpus) == ['kites.txt']
+    assert names(corpus, 'traditions') == ['kolatam.txt']
+
+    os.rename(folder / 'kites.txt', folder / 'gaalipatam.txt')
+    watcher.poll_once()
+    assert names(corpus) == ['gaalipatam.txt']
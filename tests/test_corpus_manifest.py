@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from corpus_manifest import CorpusManifest, default_manifest_path
+from local_utils import scan_corpus
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    folder = tmp_path / 'culture' / 'texts'
+    folder.mkdir(parents=True)
+    (folder / 'bonalu.txt').write_text('bonalu festival', encoding='utf-8')
+    (folder / 'bathukamma.txt').write_text('bathukamma flowers', encoding='utf-8')
+    (folder / 'songs.csv').write_text('title,lyrics\nkolatam,song one\nsankranti,song two\n', encoding='utf-8')
+    return tmp_path
+
+
+def manifest_records(base_path):
+    manifest = CorpusManifest(default_manifest_path(str(base_path)))
+    try:
+        return manifest.load_all()
+    finally:
+        manifest.close()
+
+
+def scan_counts(base_path, **kwargs):
+    data, stats = scan_corpus(str(base_path), **kwargs)
+    names = sorted(entry['name'] for entry in data['culture']['texts'])
+    return (stats['rescanned'], stats['reused'], stats['removed']), names
+
+
+def test_unchanged_files_are_reused(corpus_dir):
+    counts, names = scan_counts(corpus_dir)
+    assert counts == (3, 0, 0)
+    assert names == ['bathukamma.txt', 'bonalu.txt', 'songs #1.csv', 'songs #2.csv']
+    assert scan_counts(corpus_dir) == ((0, 3, 0), names)
+    # A full rebuild ignores the manifest
+    assert scan_counts(corpus_dir, full_rebuild=True)[0] == (3, 0, 0)
+
+
+def test_changed_size_or_mtime_is_rescanned(corpus_dir):
+    scan_counts(corpus_dir)
+    bonalu = corpus_dir / 'culture' / 'texts' / 'bonalu.txt'
+    songs = corpus_dir / 'culture' / 'texts' / 'songs.csv'
+
+    # Same size, new mtime
+    stat = bonalu.stat()
+    os.utime(bonalu, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    # New size: a third row
+    songs.write_text('title,lyrics\nkolatam,song one\nsankranti,song two\nugadi,song three\n', encoding='utf-8')
+
+    counts, names = scan_counts(corpus_dir)
+    assert counts == (2, 1, 0)
+    assert names[-1] == 'songs #3.csv'
+
+    records = manifest_records(corpus_dir)
+    for path in (bonalu, songs):
+        size, mtime_ns, _ = records[str(path)]
+        assert (size, mtime_ns) == (path.stat().st_size, path.stat().st_mtime_ns)
+    assert scan_counts(corpus_dir)[0] == (0, 3, 0)
+
+
+def test_removed_files_lose_their_rows(corpus_dir):
+    scan_counts(corpus_dir)
+    bonalu = corpus_dir / 'culture' / 'texts' / 'bonalu.txt'
+    bonalu.unlink()
+
+    counts, names = scan_counts(corpus_dir)
+    assert counts == (0, 2, 1)
+    assert 'bonalu.txt' not in names
+    assert str(bonalu) not in manifest_records(corpus_dir)
+    assert scan_counts(corpus_dir)[0] == (0, 2, 0)
+
+
+def test_delete_many_counts_removed_rows_and_drops_video_metadata(tmp_path):
+    manifest = CorpusManifest(str(tmp_path / 'manifest.sqlite3'))
+    try:
+        manifest.upsert_many([
+            ('a.txt', 'culture', 'texts', 1, 10, {'path': 'a.txt', 'name': 'a.txt'}),
+            ('b.mp4', 'culture', 'videos', 2, 20, {'path': 'b.mp4', 'name': 'b.mp4'}),
+        ])
+        manifest.store_video_metadata([('b.mp4', 2, 20, {'fps': 25.0, 'frame_count': 50, 'duration': 2.0})])
+
+        assert manifest.delete_many([]) == 0
+        assert manifest.delete_many(['b.mp4', 'missing.txt']) == 1
+        assert set(manifest.load_all()) == {'a.txt'}
+        assert manifest.load_video_metadata() == {}
+    finally:
+        manifest.close()
@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from fuzzy_index import TrigramIndex, edit_distance, max_edits, trigrams
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, a_char in enumerate(a, 1):
+        current = [i]
+        for j, b_char in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a_char != b_char)))
+        previous = current
+    return previous[-1]
+
+
+def random_words(count, seed):
+    generator = random.Random(seed)
+    return [''.join(generator.choice('abcdr') for _ in range(generator.randint(1, 10))) for _ in range(count)]
+
+
+def test_trigrams_are_padded():
+    assert trigrams('kat') == {'<ka', 'kat', 'at>'}
+    assert trigrams('a') == {'<a>'}
+
+
+def test_max_edits_grows_with_length():
+    assert [max_edits('x' * n) for n in (3, 4, 7, 8, 12)] == [0, 1, 1, 2, 2]
+
+
+@pytest.mark.parametrize('limit', [0, 1, 2])
+def test_edit_distance_is_exact_up_to_limit(limit):
+    words = random_words(60, seed=limit)
+    for a in words:
+        for b in words:
+            expected = levenshtein(a, b)
+            assert edit_distance(a, b, limit) == (expected if expected <= limit else limit + 1)
+
+
+def test_lookup_finds_every_term_within_the_edits():
+    words = set(random_words(300, seed=7))
+    index = TrigramIndex()
+    for word in words:
+        index.add(word)
+    assert len(index) == len(words)
+
+    for query in random_words(40, seed=8):
+        for edits in (0, 1, 2):
+            expected = {(word, levenshtein(query, word)) for word in words if levenshtein(query, word) <= edits}
+            matches = index.lookup(query, edits)
+            assert set(matches) == expected
+            assert [distance for _, distance in matches] == sorted(distance for _, distance in matches)
+
+
+def test_lookup_defaults_to_max_edits():
+    index = TrigramIndex()
+    for word in ['charminar', 'charmnar', 'karminar', 'golkonda', 'kota', 'kata']:
+        index.add(word)
+    assert index.lookup('charminaar') == [('charminar', 1), ('charmnar', 2)]
+    assert index.lookup('kot') == []
+    assert index.lookup('kota') == [('kota', 0), ('kata', 1)]
+
+
+def test_removed_terms_are_not_found():
+    index = TrigramIndex()
+    index.add('golkonda')
+    index.add('golkonda')
+    index.add('golconda')
+    index.remove('golkonda')
+    index.remove('missing')
+    assert len(index) == 1
+    assert index.lookup('golkonda', 1) == [('golconda', 1)]
+    index.remove('golconda')
+    assert index.lookup('golkonda', 2) == []
@@ -0,0 +1,106 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from image_hash import MAX_DISTANCE, ImageHashIndex, compute_hashes, dhash, hamming_distances, image_hashes, phash
+
+# The app's IMAGE_QUERY_MAX_DISTANCE for query-by-image search
+NEAR_DUPLICATE_DISTANCE = 40
+
+
+def temple_image(size=(320, 240)):
+    """A gopuram-like shape over a sky gradient"""
+    width, height = size
+    sky = np.linspace(60, 220, height, dtype=np.uint8)[:, None].repeat(width, axis=1)
+    image = Image.merge('RGB', [Image.fromarray(sky)] * 2 + [Image.fromarray(255 - sky)])
+    draw = ImageDraw.Draw(image)
+    for tier in range(5):
+        inset = tier * width // 14
+        top = height - (tier + 1) * height // 6
+        draw.rectangle([width // 5 + inset, top, 4 * width // 5 - inset, top + height // 6], fill=(150, 60, 30))
+    draw.ellipse([2 * width // 5, 10, 3 * width // 5, 50], fill=(240, 200, 40))
+    return image
+
+
+def unrelated_image(size=(320, 240)):
+    """Dark diagonal stripes, nothing like the temple"""
+    width, height = size
+    x, y = np.meshgrid(np.arange(width), np.arange(height))
+    stripes = ((np.sin((x + 2 * y) / 9.0) > 0) * 200 + 30).astype(np.uint8)
+    return Image.fromarray(stripes).convert('RGB')
+
+
+def jpeg_copy(image, quality=40):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+def distance(first, second):
+    (first_phash, first_dhash), (second_phash, second_dhash) = image_hashes(first), image_hashes(second)
+    return bin(first_phash ^ second_phash).count('1') + bin(first_dhash ^ second_dhash).count('1')
+
+
+@pytest.mark.parametrize('near_duplicate', [
+    lambda image: image.resize((160, 120), Image.BILINEAR),
+    lambda image: image.resize((1024, 768), Image.BICUBIC),
+    lambda image: jpeg_copy(image),
+    lambda image: jpeg_copy(image.resize((200, 150)), quality=25),
+], ids=['downscaled', 'upscaled', 'jpeg', 'downscaled-jpeg'])
+def test_near_duplicates_are_within_the_threshold(near_duplicate):
+    original = temple_image()
+    assert distance(original, near_duplicate(original.copy())) <= NEAR_DUPLICATE_DISTANCE
+
+
+def test_unrelated_images_are_beyond_the_threshold():
+    assert distance(temple_image(), unrelated_image()) > NEAR_DUPLICATE_DISTANCE
+    assert distance(temple_image(), temple_image().transpose(Image.FLIP_TOP_BOTTOM)) > NEAR_DUPLICATE_DISTANCE
+
+
+def test_hashes_are_64_bit_and_stored_as_hex(tmp_path):
+    image = temple_image()
+    assert 0 <= phash(image) < 2 ** 64 and 0 <= dhash(image) < 2 ** 64
+    path = tmp_path / 'temple.png'
+    image.save(path)
+    hashes = compute_hashes(str(path))
+    assert all(len(value) == 16 for value in hashes.values())
+    assert (int(hashes['phash'], 16), int(hashes['dhash'], 16)) == image_hashes(image)
+
+
+def test_hamming_distances():
+    hashes = np.array([0, 0xFF, 2 ** 64 - 1], dtype=np.uint64)
+    assert hamming_distances(hashes, 0).tolist() == [0, 8, 64]
+    assert hamming_distances(hashes, 2 ** 64 - 1).tolist() == [64, 56, 0]
+
+
+def image_entry(tmp_path, name, image):
+    path = tmp_path / name
+    image.save(path)
+    return {'path': str(path), 'name': name, **compute_hashes(str(path))}
+
+
+def test_index_finds_near_duplicates_and_reuses_removed_rows(tmp_path):
+    index = ImageHashIndex(['monuments', 'art'])
+    temple = image_entry(tmp_path, 'temple.png', temple_image())
+    stripes = image_entry(tmp_path, 'stripes.png', unrelated_image())
+    index.add_entry('monuments', 'images', temple)
+    index.add_entry('art', 'images', stripes)
+    # Swecha API results and other content types carry no hashes
+    index.add_entry('monuments', 'images', {'path': 'remote.jpg', 'name': 'remote.jpg'})
+    index.add_entry('monuments', 'texts', {'path': 'a.txt', 'name': 'a.txt'})
+    assert len(index) == 2
+
+    query = jpeg_copy(temple_image().resize((160, 120)))
+    matches = index.search(query, max_distance=NEAR_DUPLICATE_DISTANCE)
+    assert [(category, entry['name']) for category, entry, _ in matches] == [('monuments', 'temple.png')]
+    assert index.search(query, category='art', max_distance=NEAR_DUPLICATE_DISTANCE) == []
+    assert [entry['name'] for _, entry, _ in index.search(query)] == ['temple.png', 'stripes.png']
+    assert all(0 <= found <= MAX_DISTANCE for _, _, found in index.search(query))
+
+    index.remove_entry('monuments', 'images', temple)
+    assert index.search(query, max_distance=NEAR_DUPLICATE_DISTANCE) == []
+    index.add_entry('monuments', 'images', temple)
+    assert len(index) == 2 and index._size == 2
@@ -0,0 +1,77 @@
+import codecs
+
+import pytest
+
+from local_utils import build_text_entry, get_csv_row, get_text_content, iter_csv_records, load_csv_row
+
+HEADER = ['name', 'place', 'story']
+ROWS = [
+    ['చార్మినార్', 'హైదరాబాద్', 'built in 1591'],
+    ['Golconda', 'Hyderabad', 'a fort,\nwith "diamond" markets\nand walls'],
+    ['బతుకమ్మ', '', '9'],
+]
+
+
+def csv_text(newline='\n'):
+    def field(value):
+        if any(char in value for char in ',"\n'):
+            return '"' + value.replace('"', '""') + '"'
+        return value
+    return ''.join(','.join(map(field, fields)) + newline for fields in [HEADER] + ROWS)
+
+
+ENCODINGS = {
+    'utf-8': lambda text: text.encode('utf-8'),
+    'utf-8-sig': lambda text: codecs.BOM_UTF8 + text.encode('utf-8'),
+    'utf-16-le': lambda text: codecs.BOM_UTF16_LE + text.encode('utf-16-le'),
+    'utf-16-be': lambda text: codecs.BOM_UTF16_BE + text.encode('utf-16-be'),
+}
+BOM_LENGTHS = {'utf-8': 0, 'utf-8-sig': 3, 'utf-16-le': 2, 'utf-16-be': 2}
+
+
+@pytest.fixture(params=sorted(ENCODINGS))
+def csv_file(request, tmp_path):
+    path = tmp_path / 'stories.csv'
+    path.write_bytes(ENCODINGS[request.param](csv_text(newline='\r\n')))
+    return request.param, path
+
+
+def test_rows_are_streamed_with_their_columns(csv_file):
+    _, path = csv_file
+    entry = build_text_entry(str(path), 'stories.csv')
+    records = list(iter_csv_records(str(path), entry[0]['encoding']))
+    assert [record['row'] for record in records] == [1, 2, 3]
+    assert [list(record['columns'].values()) for record in records] == ROWS
+    # The BOM never ends up in the first column name
+    assert list(records[0]['columns']) == HEADER
+
+
+def test_byte_spans_round_trip(csv_file):
+    name, path = csv_file
+    raw = path.read_bytes()
+    entries = build_text_entry(str(path), 'stories.csv')
+    # The first span starts right after the BOM and the header record
+    header_length = len(ENCODINGS[name](csv_text().split('\n')[0] + '\r\n')) - BOM_LENGTHS[name]
+    assert entries[0]['offset'] == BOM_LENGTHS[name] + header_length
+    for entry, fields in zip(entries, ROWS):
+        assert load_csv_row(str(path), entry['offset'], entry['length'], entry['encoding']) == dict(zip(HEADER, fields))
+        assert entry['offset'] + entry['length'] <= len(raw)
+    assert entries[-1]['offset'] + entries[-1]['length'] == len(raw)
+
+
+def test_csv_row_entries(csv_file):
+    _, path = csv_file
+    entries = build_text_entry(str(path), 'stories.csv')
+    assert [entry['name'] for entry in entries] == ['stories #1.csv', 'stories #2.csv', 'stories #3.csv']
+    assert get_csv_row(entries[1])['story'] == ROWS[1][2]
+    # Numbers and blank values are not searchable text
+    assert get_text_content(entries[2]) == 'బతుకమ్మ'
+    assert get_text_content(entries[0]) == 'చార్మినార్ హైదరాబాద్ built in 1591'
+
+
+def test_blank_lines_and_header_only_files(tmp_path):
+    path = tmp_path / 'blank.csv'
+    path.write_bytes(b'\nname,place\n\nkites,sky\n')
+    assert [record['columns'] for record in iter_csv_records(str(path))] == [{'name': 'kites', 'place': 'sky'}]
+    path.write_bytes(b'name,place\n')
+    assert list(iter_csv_records(str(path))) == []
@@ -0,0 +1,87 @@
+import pytest
+
+from ranking import RRF_K, fuse_results
+
+
+def local(path, name=None):
+    return {'path': path, 'name': name or path.rsplit('/', 1)[-1]}
+
+
+def remote(url, name):
+    return {'path': url, 'name': name, 'source': 'swecha_api'}
+
+
+def test_rrf_rewards_items_found_by_several_sources():
+    a, b, c = local('data/a.txt'), local('data/b.txt'), local('data/c.txt')
+    fused = fuse_results({
+        'keyword': [(a, 9.0), (b, 5.0)],
+        'semantic': [(c, 0.9), (b, 0.8)],
+    })
+    assert [item['path'] for item, _, _ in fused] == ['data/b.txt', 'data/a.txt', 'data/c.txt']
+    assert fused[0][2] == ['keyword', 'semantic']
+    assert fused[0][1] == pytest.approx(2 / (RRF_K + 2))
+    assert fused[1][1] == pytest.approx(1 / (RRF_K + 1))
+
+
+def test_same_path_is_merged_across_sources():
+    fused = fuse_results({
+        'keyword': [(local('data/./a.txt'), 3.0)],
+        'semantic': [(local('data/a.txt'), 0.5)],
+    })
+    assert len(fused) == 1
+    assert fused[0][2] == ['keyword', 'semantic']
+
+
+def test_local_files_sharing_a_name_stay_apart():
+    fused = fuse_results({'keyword': [(local('data/x/song.txt'), 2.0), (local('data/y/song.txt'), 1.0)]})
+    assert len(fused) == 2
+
+
+def test_remote_result_pairs_with_local_copy_by_name():
+    fused = fuse_results({
+        'remote': [(remote('https://api.example/1', 'Song.txt'), None)],
+        'keyword': [(local('data/song.txt'), 4.0)],
+    })
+    assert len(fused) == 1
+    item, _, sources = fused[0]
+    assert item['path'] == 'data/song.txt'
+    assert sources == ['remote', 'keyword']
+
+
+def test_weighted_fusion_scales_scores_per_source():
+    a, b, c = local('a.txt'), local('b.txt'), local('c.txt')
+    fused = fuse_results({
+        'keyword': [(a, 100.0), (b, 50.0), (c, 0.0)],
+        'semantic': [(c, 0.9), (b, 0.2), (a, 0.1)],
+    }, method='weighted', weights={'semantic': 2.0})
+    scores = {item['path']: score for item, score, _ in fused}
+    assert scores['a.txt'] == pytest.approx(1.0)
+    assert scores['b.txt'] == pytest.approx(0.5 + 2.0 * 0.125)
+    assert scores['c.txt'] == pytest.approx(2.0)
+    assert [item['path'] for item, _, _ in fused] == ['c.txt', 'a.txt', 'b.txt']
+
+
+def test_weighted_fusion_uses_ranks_without_scores():
+    items = [local(f'{n}.txt') for n in 'abcd']
+    fused = fuse_results({'remote': [(item, None) for item in items]}, method='weighted')
+    assert [score for _, score, _ in fused] == pytest.approx([0.5, 0.375, 0.25, 0.125])
+
+
+def test_top_k_is_respected_and_stays_exact():
+    keyword = [(local(f'k{n}.txt'), float(100 - n)) for n in range(50)]
+    semantic = [(local(f'k{n}.txt'), 1.0) for n in range(49, -1, -1)]
+    sources = {'keyword': keyword, 'semantic': semantic}
+    top = fuse_results(sources, top_k=5)
+    everything = fuse_results(sources, top_k=100)
+    assert len(top) == 5
+    assert [score for _, score, _ in top] == pytest.approx([score for _, score, _ in everything[:5]])
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        fuse_results({'keyword': []}, method='borda')
+
+
+def test_empty_sources():
+    assert fuse_results({}) == []
+    assert fuse_results({'keyword': [], 'semantic': []}) == []
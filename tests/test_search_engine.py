@@ -0,0 +1,100 @@
+import json
+import sys
+from collections import Counter
+
+import joblib
+import pytest
+from PIL import Image
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from corpus import CulturalCorpus
+import search_engine
+from search_engine import SearchEngine
+
+TEXTS = {
+    ('monuments', 'charminar.txt'): 'The charminar temple mosque stands in the old city',
+    ('monuments', 'golconda.txt'): 'Golconda fort was a diamond market',
+    ('culture', 'bonalu.txt'): 'Bonalu festival offerings at the temple',
+    ('traditions', 'kolatam.txt'): 'Kolatam is a stick dance performed at festivals',
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for (category, name), text in TEXTS.items():
+        folder = tmp_path / category / 'texts'
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / name).write_text(text, encoding='utf-8')
+    (tmp_path / 'monuments' / 'images').mkdir()
+    Image.new('RGB', (32, 32), 'red').save(tmp_path / 'monuments' / 'images' / 'temple_gate.png')
+    return tmp_path
+
+
+@pytest.fixture
+def engine(data_dir):
+    # Character n-grams, so "temples" is a semantic match of "temple" but not a keyword match
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 4)).fit(TEXTS.values())
+    return SearchEngine.build(CulturalCorpus.load(str(data_dir)), vectorizer)
+
+
+def test_search_all_facets_count_the_fused_results(engine):
+    (hits, facets), notices = engine.search_all('temples')
+    assert notices == []
+    assert hits
+    assert facets['category'] == dict(Counter(category for category, _, _ in hits))
+    assert facets['content_type'] == dict(Counter(content_type for _, content_type, _ in hits))
+
+
+def test_search_all_facets_count_under_the_other_filter(engine):
+    (hits, facets), _ = engine.search_all('temple', categories=['monuments'], content_types=['texts'])
+    assert {(category, content_type) for category, content_type, _ in hits} == {('monuments', 'texts')}
+
+    (category_hits, _), _ = engine.search_all('temple', content_types=['texts'])
+    (content_type_hits, _), _ = engine.search_all('temple', categories=['monuments'])
+    assert facets['category'] == dict(Counter(category for category, _, _ in category_hits))
+    assert facets['content_type'] == dict(Counter(content_type for _, content_type, _ in content_type_hits))
+    assert facets['content_type']['images'] == 1
+    assert facets['category']['monuments'] == len(hits)
+
+
+def test_search_all_without_a_query(engine):
+    assert engine.search_all('  ') == (([], {'category': {}, 'content_type': {}}), [])
+
+
+def test_quoted_phrases_filter_every_local_source(engine):
+    results, _ = engine.search('monuments', 'texts', '"diamond market"')
+    assert [item['name'] for item in results] == ['golconda.txt']
+    (hits, facets), _ = engine.search_all('"temple mosque"')
+    assert [item['name'] for _, _, item in hits] == ['charminar.txt']
+    assert facets == {'category': {'monuments': 1}, 'content_type': {'texts': 1}}
+
+
+def test_evaluation_cli_reports_latency_memory_and_relevance(data_dir, tmp_path, monkeypatch, capsys):
+    vectorizer_path = tmp_path / 'vectorizer.pkl'
+    joblib.dump(TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 4)).fit(TEXTS.values()), vectorizer_path)
+    queries = tmp_path / 'queries.jsonl'
+    queries.write_text('\n'.join([
+        json.dumps({'query': 'golconda fort', 'relevant': ['monuments/texts/golconda.txt']}),
+        json.dumps({'query': 'temple', 'category': 'culture', 'content_type': 'texts', 'relevant': ['bonalu.txt']}),
+        json.dumps({'query': 'kolatm dance', 'relevant': ['kolatam.txt', 'missing.txt']}),
+        'charminar',
+        '',
+    ]), encoding='utf-8')
+
+    monkeypatch.setattr(sys, 'argv', ['search_engine.py', str(data_dir), str(queries), '--k', '5', '--fuzzy',
+                                      '--repeat', '2', '--vectorizer', str(vectorizer_path)])
+    search_engine.main()
+    report = json.loads(capsys.readouterr().out)
+
+    assert (report['queries'], report['runs'], report['labeled_queries']) == (4, 8, 3)
+    assert report['k'] == 5 and report['fuzzy'] and report['semantic']
+    latency = report['latency_ms']
+    assert set(latency) == {'p50', 'p95', 'p99', 'mean', 'max'}
+    assert 0 < latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max']
+    assert report['qps'] > 0
+    assert set(report['memory_mb']) == {'peak_rss_after_build', 'peak_rss'}
+    assert 0 < report['memory_mb']['peak_rss_after_build'] <= report['memory_mb']['peak_rss']
+    assert report['index']['documents'] == len(TEXTS) + 1
+    # Every labeled query finds its first relevant file first; missing.txt is never found
+    assert report['recall@5'] == pytest.approx((1 + 1 + 0.5) / 3)
+    assert report['mrr'] == pytest.approx(1.0)
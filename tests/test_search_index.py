@@ -0,0 +1,211 @@
+import os
+
+import pytest
+
+from local_utils import build_text_entry
+from search_index import PASSAGE_TOKENS, PHRASE_BOOST, InvertedIndex, quoted_phrases
+
+
+def text_entry(path, content, name=None):
+    return {'path': path, 'name': name or path, 'content': content}
+
+
+def names(entries):
+    return [entry['name'] for entry in entries]
+
+
+def build_index():
+    index = InvertedIndex()
+    index.add_entry('monuments', 'texts', text_entry('fort.txt', 'The Golconda fort stands near Hyderabad city'))
+    index.add_entry('monuments', 'texts', text_entry('city.txt', 'Hyderabad is a city of pearls and the fort of Golconda'))
+    index.add_entry('festivals', 'texts', text_entry('bonalu.txt', 'Bonalu is celebrated across Hyderabad'))
+    index.add_entry('monuments', 'images', {'path': 'golconda_fort.jpg', 'name': 'golconda_fort.jpg'})
+    return index
+
+
+def test_phrase_search_requires_consecutive_tokens():
+    index = build_index()
+    assert names(index.search('golconda fort')) == ['fort.txt', 'golconda_fort.jpg']
+    assert names(index.search('golconda fort', phrase=False)) == ['fort.txt', 'city.txt', 'golconda_fort.jpg']
+
+
+def test_search_is_case_insensitive_and_filtered():
+    index = build_index()
+    assert names(index.search('HYDERABAD')) == ['fort.txt', 'city.txt', 'bonalu.txt']
+    assert names(index.search('hyderabad', category='festivals')) == ['bonalu.txt']
+    assert names(index.search('golconda', content_type='images')) == ['golconda_fort.jpg']
+    assert index.search('charminar') == []
+    assert index.search('   ') == []
+
+
+def test_remove_entry_drops_its_postings():
+    index = build_index()
+    index.remove_entry('monuments', 'texts', text_entry('fort.txt', ''))
+    assert names(index.search('golconda fort')) == ['golconda_fort.jpg']
+    assert names(index.search('stands')) == []
+    assert index.stats()['documents'] == 3
+
+
+def test_re_adding_an_entry_replaces_its_content():
+    index = build_index()
+    index.add_entry('festivals', 'texts', text_entry('bonalu.txt', 'Bonalu offerings to the goddess'))
+    assert names(index.search('goddess')) == ['bonalu.txt']
+    assert names(index.search('celebrated')) == []
+    assert index.stats()['documents'] == 4
+
+
+def test_rank_orders_by_bm25():
+    index = InvertedIndex()
+    index.add_entry('c', 'texts', text_entry('once.txt', 'kites fly during sankranti with music and food and dance'))
+    index.add_entry('c', 'texts', text_entry('twice.txt', 'kites and more kites in the sky'))
+    index.add_entry('c', 'texts', text_entry('none.txt', 'rangoli patterns at the doorstep'))
+
+    ranked = index.rank('kites')
+    assert names(entry for entry, _ in ranked) == ['twice.txt', 'once.txt']
+    assert ranked[0][1] > ranked[1][1] > 0
+    assert names(entry for entry, _ in index.rank('kites', top_k=1)) == ['twice.txt']
+    assert index.rank('') == []
+
+
+def test_rank_weights_name_matches_above_content_matches():
+    index = InvertedIndex()
+    index.add_entry('c', 'texts', text_entry('notes.txt', 'a story about bathukamma flowers'))
+    index.add_entry('c', 'texts', text_entry('bathukamma.txt', 'a story about flowers'))
+    assert names(entry for entry, _ in index.rank('bathukamma')) == ['bathukamma.txt', 'notes.txt']
+
+
+def test_rank_sums_scores_of_every_query_token():
+    index = build_index()
+    ranked = names(entry for entry, _ in index.rank('golconda fort hyderabad', category='monuments'))
+    # city.txt holds all three tokens too, but in a longer text
+    assert ranked == ['golconda_fort.jpg', 'fort.txt', 'city.txt']
+
+
+def test_rank_faceted_counts_each_facet_under_the_other_filter():
+    index = build_index()
+    hits, facets = index.rank_faceted('hyderabad golconda')
+    assert {entry['name'] for _, _, entry, _ in hits} == {'fort.txt', 'city.txt', 'bonalu.txt', 'golconda_fort.jpg'}
+    assert facets == {'category': {'monuments': 3, 'festivals': 1},
+                      'content_type': {'texts': 3, 'images': 1}}
+
+    hits, facets = index.rank_faceted('hyderabad golconda', categories=['monuments'], content_types=['texts'])
+    assert [(category, content_type) for category, content_type, _, _ in hits] == [('monuments', 'texts')] * 2
+    # Category counts keep the content type filter, content type counts keep the category filter
+    assert facets == {'category': {'monuments': 2, 'festivals': 1},
+                      'content_type': {'texts': 2, 'images': 1}}
+
+
+def test_rank_faceted_matches_rank_within_one_category():
+    index = build_index()
+    hits, _ = index.rank_faceted('golconda fort', categories=['monuments'], top_k=2)
+    assert [(entry, score) for _, _, entry, score in hits] == index.rank('golconda fort', 'monuments', top_k=2)
+    assert index.rank_faceted('') == ([], {'category': {}, 'content_type': {}})
+
+
+def test_romanized_query_matches_telugu_content_and_back():
+    index = InvertedIndex()
+    index.add_entry('monuments', 'texts', text_entry('charminar.txt', 'చార్మినార్ హైదరాబాద్ లో ఉంది'))
+    index.add_entry('monuments', 'texts', text_entry('fort.txt', 'the Charminar was built in 1591'))
+
+    assert names(index.search('charminar')) == ['charminar.txt', 'fort.txt']
+    assert names(index.search('chaarminaar')) == ['charminar.txt', 'fort.txt']
+    assert names(index.search('చార్మినార్')) == ['charminar.txt', 'fort.txt']
+    assert index.query_variants('charminar') == ['చార్మినార్']
+    assert index.query_variants('చార్మినార్') == ['charminar']
+    assert {entry['name'] for entry, _ in index.rank('charminar')} == {'charminar.txt', 'fort.txt'}
+
+
+def test_fuzzy_search_accepts_misspellings_at_a_lower_score():
+    index = InvertedIndex()
+    index.add_entry('monuments', 'texts', text_entry('fort.txt', 'golconda fort'))
+    index.add_entry('monuments', 'texts', text_entry('palace.txt', 'chowmahalla palace'))
+
+    assert index.search('golcinda') == []
+    assert names(index.search('golcinda', fuzzy=True)) == ['fort.txt']
+    assert names(index.search('chowmahala palase', fuzzy=True)) == ['palace.txt']
+    assert index.query_variants('golcinda', fuzzy=True) == ['golconda']
+
+    exact_score = index.rank('golconda')[0][1]
+    fuzzy_hits = index.rank('golcinda', fuzzy=True)
+    assert names(entry for entry, _ in fuzzy_hits) == ['fort.txt']
+    assert 0 < fuzzy_hits[0][1] < exact_score
+
+
+def test_rank_requires_quoted_phrases():
+    index = build_index()
+    assert names(entry for entry, _ in index.rank('"golconda fort"')) == ['golconda_fort.jpg', 'fort.txt']
+    assert names(entry for entry, _ in index.rank('"fort golconda"')) == []
+    # city.txt holds "city" and both words, but not as the quoted phrase
+    assert set(names(entry for entry, _ in index.rank('"golconda fort" city'))) == {'fort.txt', 'golconda_fort.jpg'}
+    hits, facets = index.rank_faceted('"golconda fort"', content_types=['texts'])
+    assert [entry['name'] for _, _, entry, _ in hits] == ['fort.txt']
+    assert facets['content_type'] == {'texts': 1, 'images': 1}
+
+
+def test_rank_boosts_exact_phrases():
+    index = InvertedIndex()
+    index.add_entry('c', 'texts', text_entry('apart.txt', 'the fort near the old golconda walls'))
+    index.add_entry('c', 'texts', text_entry('phrase.txt', 'the old walls near the golconda fort'))
+    ranked = index.rank('golconda fort')
+    assert names(entry for entry, _ in ranked) == ['phrase.txt', 'apart.txt']
+    assert ranked[0][1] == pytest.approx(ranked[1][1] * PHRASE_BOOST)
+
+
+def test_quoted_phrases():
+    assert quoted_phrases('"Golconda Fort" hyderabad "" "x"') == [['golconda', 'fort'], ['x']]
+    assert quoted_phrases('golconda fort') == []
+
+
+FILLER = ' '.join(f'పదం{number}' for number in range(PASSAGE_TOKENS))
+STORY = f"{FILLER}\n{FILLER} బోనాలు పండుగ హైదరాబాద్ లో\n{FILLER}\n"
+
+
+def test_snippet_picks_the_best_passage_and_highlights_matches():
+    index = InvertedIndex()
+    entry = text_entry('bonalu.txt', STORY)
+    index.add_entry('festivals', 'texts', entry)
+
+    snippet = index.snippet('బోనాలు హైదరాబాద్', entry, 'festivals')
+    assert 'బోనాలు పండుగ హైదరాబాద్' in snippet['text']
+    assert STORY[snippet['start']:snippet['end']].rstrip() == snippet['text']
+    assert snippet['length'] == len(STORY)
+    assert [snippet['text'][start:end] for start, end in snippet['highlights']] == ['బోనాలు', 'హైదరాబాద్']
+
+    # Entries missing from the index (Swecha API results) get their first passage
+    other = text_entry('other.txt', STORY)
+    assert index.snippet('బోనాలు', other, 'festivals')['start'] == 0
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'utf-8-sig', 'utf-16'])
+def test_snippet_reads_file_passages_from_byte_windows(tmp_path, encoding):
+    path = tmp_path / 'bonalu.txt'
+    path.write_bytes(STORY.encode(encoding))
+    entry = build_text_entry(str(path), 'bonalu.txt')
+    index = InvertedIndex()
+    index.add_entry('festivals', 'texts', entry)
+
+    snippet = index.snippet('బోనాలు', entry, 'festivals')
+    data = path.read_bytes()
+    # Offsets and length are bytes of the file when the passage came from a MappedText window
+    assert snippet['length'] == len(data)
+    body_encoding = {'utf-8-sig': 'utf-8', 'utf-16': 'utf-16-le'}.get(encoding, encoding)
+    assert data[snippet['start']:snippet['end']].decode(body_encoding).rstrip() == snippet['text']
+    assert 'బోనాలు పండుగ' in snippet['text']
+
+
+def test_snippet_skips_byte_windows_after_a_same_size_rewrite(tmp_path):
+    path = tmp_path / 'bonalu.txt'
+    path.write_text(STORY, encoding='utf-8')
+    entry = build_text_entry(str(path), 'bonalu.txt')
+    index = InvertedIndex()
+    index.add_entry('festivals', 'texts', entry)
+
+    # Same size, shifted by a byte: stale byte offsets would cut the passage apart
+    path.write_text('x' + STORY[:-1], encoding='utf-8')
+    os.utime(path, ns=(entry['mtime_ns'] + 10 ** 9, entry['mtime_ns'] + 10 ** 9))
+    assert os.path.getsize(path) == entry['size']
+
+    snippet = index.snippet('బోనాలు', entry, 'festivals')
+    # Decoded from the text instead of a byte window, so the length is in characters
+    assert snippet['length'] == len(STORY)
+    assert snippet['text'].startswith('బోనాలు పండుగ హైదరాబాద్')
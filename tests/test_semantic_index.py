@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+import semantic_index
+from semantic_index import SemanticIndex, _CategoryMatrix
+
+TEXTS = {
+    'temple.txt': 'ancient temple with stone carvings and a gopuram',
+    'festival.txt': 'sankranti festival with kites and rangoli',
+    'food.txt': 'pulihora and pesarattu are traditional dishes',
+    'dance.txt': 'kuchipudi dance performed at the temple festival',
+}
+
+
+def text_entry(name):
+    return {'path': name, 'name': name, 'content': TEXTS[name]}
+
+
+@pytest.fixture
+def vectorizer():
+    return TfidfVectorizer().fit(TEXTS.values())
+
+
+def matrix_with(vectorizer, names):
+    matrix = _CategoryMatrix(len(vectorizer.vocabulary_))
+    for name in names:
+        vector = normalize(vectorizer.transform([TEXTS[name]])).tocsr()
+        matrix.add((name, None), text_entry(name), vector)
+    return matrix
+
+
+def query_vector(vectorizer, query):
+    return normalize(vectorizer.transform([query])).tocsr()
+
+
+def test_rows_stay_pending_until_merge(vectorizer):
+    matrix = matrix_with(vectorizer, TEXTS)
+    assert matrix.main.shape[0] == 0
+    assert len(matrix.pending) == len(TEXTS)
+
+    before = matrix.scores(query_vector(vectorizer, 'temple'))
+    matrix.merge()
+    assert matrix.main.shape[0] == len(TEXTS)
+    assert matrix.pending == []
+    np.testing.assert_allclose(matrix.scores(query_vector(vectorizer, 'temple')), before)
+
+
+def test_add_merges_once_enough_rows_are_pending(vectorizer, monkeypatch):
+    monkeypatch.setattr(semantic_index, 'MERGE_MIN_ROWS', 2)
+    matrix = matrix_with(vectorizer, ['temple.txt', 'festival.txt', 'food.txt'])
+    assert matrix.main.shape[0] == 2
+    assert len(matrix.pending) == 1
+
+
+def test_removed_rows_score_zero_and_are_not_returned(vectorizer):
+    matrix = matrix_with(vectorizer, TEXTS)
+    matrix.merge()
+    matrix.remove(('temple.txt', None))
+
+    temple_row = list(TEXTS).index('temple.txt')
+    query = query_vector(vectorizer, 'temple')
+    assert matrix.scores(query)[temple_row] == 0.0
+    assert matrix.batch_scores(query)[0, temple_row] == 0.0
+    assert [matrix.entries[row]['name'] for row, score in matrix.top_k(query, 4) if score > 0] == ['dance.txt']
+
+
+def test_re_adding_an_entry_replaces_its_row(vectorizer):
+    matrix = matrix_with(vectorizer, ['temple.txt', 'food.txt'])
+    matrix.add(('temple.txt', None), text_entry('temple.txt'), query_vector(vectorizer, 'kites'))
+    assert matrix.row_of[('temple.txt', None)] == 2
+    assert matrix.dead == {0}
+
+
+def test_compact_drops_dead_rows_and_renumbers(vectorizer):
+    matrix = matrix_with(vectorizer, TEXTS)
+    matrix.merge()
+    matrix.remove(('festival.txt', None))
+    matrix.remove(('food.txt', None))
+    matrix.compact()
+
+    assert matrix.dead == set()
+    assert [entry['name'] for entry in matrix.entries] == ['temple.txt', 'dance.txt']
+    assert matrix.row_of == {('temple.txt', None): 0, ('dance.txt', None): 1}
+    assert matrix.main.shape[0] == 2
+    scores = matrix.scores(query_vector(vectorizer, 'kuchipudi'))
+    assert scores[0] == 0.0 and scores[1] > 0
+
+
+def test_search_ranks_by_cosine_similarity(vectorizer):
+    index = SemanticIndex(vectorizer, ann_min_rows=None)
+    for name in TEXTS:
+        index.add_entry('culture', 'texts', text_entry(name))
+    index.add_entry('culture', 'images', {'path': 'gopuram.jpg', 'name': 'gopuram.jpg'})
+
+    hits = index.search('culture', 'temple festival', top_k=3)
+    assert [entry['name'] for entry, _ in hits][:1] == ['dance.txt']
+    assert all(score > 0 for _, score in hits)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+    assert index.stats()['culture']['documents'] == len(TEXTS)
+
+    index.remove_entry('culture', 'texts', text_entry('dance.txt'))
+    assert 'dance.txt' not in [entry['name'] for entry, _ in index.search('culture', 'temple festival')]
+    assert index.search('culture', 'unknownword') == []
+    assert index.search('history', 'temple') == []
+
+
+def test_search_batch_matches_single_queries(vectorizer):
+    index = SemanticIndex(vectorizer, ann_min_rows=None)
+    for position, name in enumerate(TEXTS):
+        index.add_entry('a' if position % 2 else 'b', 'texts', text_entry(name))
+
+    queries = ['temple', 'festival kites', 'dishes', 'nothing here']
+    batch = index.search_batch(queries, top_k=2)
+    assert batch == [index.search_categories(query, top_k=2) for query in queries]
+    assert batch[-1] == []
+    assert {category for category, _, _ in index.search_batch(['temple'], ['a'])[0]} <= {'a'}
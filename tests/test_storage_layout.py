@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import sqlite3
+
+from corpus_manifest import CorpusManifest, default_manifest_path
+from local_utils import scan_corpus
+from storage_layout import iter_folder_files, migrate, shard_dir
+from upload_store import store_upload
+
+
+def manifest_rows(base_path):
+    manifest = CorpusManifest(default_manifest_path(base_path))
+    try:
+        files = {path: json.loads(entry) for path, (_, _, entry) in manifest.load_all().items()}
+    finally:
+        manifest.close()
+    with sqlite3.connect(default_manifest_path(base_path)) as conn:
+        hashes = [path for path, in conn.execute("SELECT path FROM content_hashes")]
+    return files, hashes
+
+
+def entry_paths(entry):
+    return {item['path'] for item in (entry if isinstance(entry, list) else [entry])}
+
+
+def test_flat_to_sharded_and_back(tmp_path):
+    base_path = str(tmp_path)
+    folder = os.path.join(base_path, 'culture', 'texts')
+    os.makedirs(folder)
+    with open(os.path.join(folder, 'bonalu.txt'), 'w', encoding='utf-8') as f:
+        f.write('bonalu festival')
+    with open(os.path.join(folder, 'songs.csv'), 'w', encoding='utf-8') as f:
+        f.write('title,lyrics\nbathukamma,song one\nkolatam,song two\n')
+    uploaded = io.BytesIO(b'sankranti kites')
+    uploaded.name = 'kites.txt'
+    upload_path, _ = store_upload(uploaded, 'culture', 'texts', base_path=base_path)
+    scan_corpus(base_path)
+    flat_files = {entry.path for entry in iter_folder_files(folder)}
+
+    assert migrate(base_path, sharded=True) == (3, 0)
+    sharded_files = {entry.path for entry in iter_folder_files(folder)}
+    assert sharded_files == {os.path.join(shard_dir(folder, os.path.basename(path)), os.path.basename(path))
+                             for path in flat_files}
+    files, hashes = manifest_rows(base_path)
+    assert set(files) == sharded_files
+    for path, entry in files.items():
+        assert entry_paths(entry) == {path}
+    assert hashes == [os.path.join(shard_dir(folder, os.path.basename(upload_path)), os.path.basename(upload_path))]
+
+    # The moved files are reused from the manifest, not re-read
+    _, stats = scan_corpus(base_path)
+    assert (stats['rescanned'], stats['reused'], stats['removed']) == (0, 3, 0)
+    assert migrate(base_path, sharded=True) == (0, 0)
+
+    assert migrate(base_path, sharded=False) == (3, 0)
+    assert sorted(os.listdir(folder)) == sorted(os.path.basename(path) for path in flat_files)
+    files, hashes = manifest_rows(base_path)
+    assert set(files) == flat_files
+    assert hashes == [upload_path]
+    _, stats = scan_corpus(base_path)
+    assert (stats['rescanned'], stats['reused']) == (0, 3)
+
+
+def test_dry_run_and_name_clashes(tmp_path):
+    folder = os.path.join(str(tmp_path), 'culture', 'texts')
+    target_dir = shard_dir(folder, 'a.txt')
+    os.makedirs(target_dir)
+    for path in (os.path.join(folder, 'a.txt'), os.path.join(target_dir, 'a.txt'), os.path.join(folder, 'b.txt')):
+        with open(path, 'w') as f:
+            f.write('x')
+
+    assert migrate(str(tmp_path), sharded=True, dry_run=True) == (1, 1)
+    assert sorted(os.listdir(folder)) == sorted(['a.txt', 'b.txt', os.path.relpath(target_dir, folder).split(os.sep)[0]])
+    assert migrate(str(tmp_path), sharded=True) == (1, 1)
+    assert os.path.exists(os.path.join(folder, 'a.txt'))
+    # No manifest was created along the way
+    assert not os.path.exists(default_manifest_path(str(tmp_path)))
@@ -0,0 +1,71 @@
+import os
+
+from local_utils import build_text_entry
+from suggest import NAME_WEIGHT, PrefixSuggester
+
+
+def write_text(path, text, mtime=None):
+    path.write_text(text, encoding='utf-8')
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return build_text_entry(str(path), path.name)
+
+
+def test_suggests_names_and_terms_by_weight(tmp_path):
+    suggester = PrefixSuggester()
+    suggester.add_entry('culture', 'texts', write_text(tmp_path / 'bathukamma.txt', 'bathukamma festival'))
+    suggester.add_entry('culture', 'texts', write_text(tmp_path / 'bonalu.txt', 'bonalu festival of bathukamma'))
+    suggester.add_entry('monuments', 'images', {'path': str(tmp_path / 'fort.jpg'), 'name': 'fort.jpg'})
+
+    # The name weighs NAME_WEIGHT, the term adds one per text containing it
+    assert suggester.suggest('bat') == ['bathukamma']
+    assert suggester.suggest('b') == ['bathukamma', 'bonalu']
+    assert suggester.suggest('fes') == ['festival']
+    assert suggester.suggest('fo', content_type='images') == ['fort']
+    assert suggester.suggest('fo', category='culture') == []
+    assert suggester.suggest('  ') == []
+    assert NAME_WEIGHT > 2
+
+
+def test_removing_a_deleted_file_drops_its_suggestions(tmp_path):
+    suggester = PrefixSuggester()
+    entry = write_text(tmp_path / 'a.txt', 'bathukamma festival')
+    suggester.add_entry('culture', 'texts', entry)
+    os.remove(entry['path'])
+
+    suggester.remove_entry('culture', 'texts', entry)
+    assert suggester.suggest('bat') == []
+    assert suggester.suggest('fes') == []
+    assert suggester.stats()['suggestions'] == 0
+
+
+def test_rewritten_file_replaces_its_suggestions(tmp_path):
+    suggester = PrefixSuggester()
+    suggester.add_entry('culture', 'texts', write_text(tmp_path / 'a.txt', 'charminar festival'))
+    old = write_text(tmp_path / 'b.txt', 'charminar at night', mtime=10 ** 18)
+    suggester.add_entry('monuments', 'texts', old)
+
+    # A watcher sees the rewrite as remove + add, or just a re-add of the same path
+    new = write_text(tmp_path / 'b.txt', 'golconda at night', mtime=2 * 10 ** 18)
+    suggester.remove_entry('monuments', 'texts', old)
+    suggester.add_entry('monuments', 'texts', new)
+    assert suggester.suggest('cha', category='monuments') == []
+    assert suggester.suggest('cha') == ['charminar']
+    assert suggester.suggest('gol') == ['golconda']
+
+    newer = write_text(tmp_path / 'b.txt', 'warangal fort', mtime=3 * 10 ** 18)
+    suggester.add_entry('monuments', 'texts', newer)
+    assert suggester.suggest('gol') == []
+    assert suggester.suggest('war') == ['warangal']
+
+
+def test_shared_terms_survive_removal_of_one_entry(tmp_path):
+    suggester = PrefixSuggester()
+    first = write_text(tmp_path / 'a.txt', 'festival of lights')
+    suggester.add_entry('culture', 'texts', first)
+    suggester.add_entry('culture', 'texts', write_text(tmp_path / 'b.txt', 'festival of kites'))
+    suggester.remove_entry('culture', 'texts', first)
+    assert suggester.suggest('fes') == ['festival']
+    assert suggester.suggest('lig') == []
+    suggester.remove_entry('culture', 'texts', first)
+    assert suggester.suggest('fes') == ['festival']
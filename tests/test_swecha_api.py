@@ -0,0 +1,169 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import swecha_api
+from swecha_api import SwechaAPIClient
+
+
+class FakeSwecha(BaseHTTPRequestHandler):
+    """Answers per path: /ok, /flaky (two 503s first), /busy (always 503), /slow, /hold"""
+    hits = {}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b'{"results": []}', headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self):
+        with self.lock:
+            self.hits[self.path] = self.hits.get(self.path, 0) + 1
+            return self.hits[self.path]
+
+    def do_GET(self):
+        hit = self._count()
+        if self.path == '/flaky' and hit <= 2:
+            return self._reply(503, b'', [('Retry-After', '0.05')])
+        if self.path == '/busy':
+            return self._reply(503, b'')
+        if self.path == '/slow':
+            time.sleep(1.0)
+        if self.path == '/hold':
+            time.sleep(0.3)
+        self._reply(200)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._count()
+        self._reply(503, b'')
+
+
+@pytest.fixture
+def server():
+    FakeSwecha.hits = {}
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeSwecha)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def client(base_url, **kwargs):
+    options = {'connect_timeout': 1.0, 'read_timeout': 0.5, 'max_retries': 3, 'retry_delay': 0.01,
+               'retry_max_delay': 0.2, 'retry_budget': 5.0}
+    return SwechaAPIClient(base_url, **{**options, **kwargs})
+
+
+def test_get_is_retried_after_retry_after(server):
+    api = client(server)
+    started = time.monotonic()
+    assert api._make_request('GET', '/flaky') == {'results': []}
+    assert FakeSwecha.hits['/flaky'] == 3
+    metrics = api.metrics()
+    assert (metrics['requests'], metrics['retries'], metrics['failed_requests']) == (3, 2, 0)
+    assert metrics['retry_sleep_seconds'] == pytest.approx(0.1)
+    assert time.monotonic() - started >= 0.1
+
+
+def test_retries_stop_after_max_retries(server):
+    api = client(server, max_retries=2)
+    assert api._make_request('GET', '/busy') is None
+    assert FakeSwecha.hits['/busy'] == 3
+    assert api.metrics()['failed_requests'] == 1
+
+
+def test_backoff_delay_uses_full_jitter(monkeypatch):
+    api = client('http://127.0.0.1:1', retry_delay=0.5, retry_max_delay=3.0)
+    bounds = []
+    monkeypatch.setattr(swecha_api.random, 'uniform', lambda low, high: bounds.append((low, high)) or 0.0)
+    monkeypatch.setattr(swecha_api.time, 'sleep', lambda seconds: None)
+    for attempt in range(4):
+        assert api._backoff(attempt, time.monotonic() + 10)
+    assert bounds == [(0, 0.5), (0, 1.0), (0, 2.0), (0, 4.0)]
+    # Retry-After wins over the jitter but is capped at retry_max_delay
+    api._backoff(0, time.monotonic() + 10, retry_after='30')
+    assert api.metrics()['retry_sleep_seconds'] == pytest.approx(3.0)
+
+
+def test_retries_stop_at_the_budget(server, monkeypatch):
+    monkeypatch.setattr(swecha_api.random, 'uniform', lambda low, high: high)
+    api = client(server, retry_delay=1.0, retry_max_delay=10.0, retry_budget=0.5)
+    started = time.monotonic()
+    response = api._request_with_retries('GET', f'{server}/busy', idempotent=True)
+    # The first 1 s backoff would pass the budget: the 503 is returned at once
+    assert response.status_code == 503
+    assert FakeSwecha.hits['/busy'] == 1
+    assert api.metrics()['retries'] == 0
+    assert time.monotonic() - started < 0.5
+
+
+def test_post_is_not_retried(server):
+    api = client(server)
+    assert api._make_request('POST', '/upload', json={}) is None
+    assert FakeSwecha.hits['/upload'] == 1
+    assert api.metrics()['retries'] == 0
+
+
+def test_post_marked_idempotent_is_retried(server):
+    api = client(server, max_retries=1)
+    api._make_request('POST', '/upload', idempotent=True, json={})
+    assert FakeSwecha.hits['/upload'] == 2
+
+
+def test_read_timeout_bounds_a_slow_request(server):
+    api = client(server, read_timeout=0.2, max_retries=1)
+    started = time.monotonic()
+    assert api._make_request('GET', '/slow') is None
+    # Two attempts of 0.2 s each plus a short backoff, not the server's 1 s
+    assert time.monotonic() - started < 0.9
+    metrics = api.metrics()
+    assert (metrics['timeouts'], metrics['requests']) == (2, 2)
+
+
+def test_connection_errors_are_counted_and_retried():
+    api = client('http://127.0.0.1:1', max_retries=2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        api._request_with_retries('GET', 'http://127.0.0.1:1/x', idempotent=True)
+    metrics = api.metrics()
+    assert (metrics['connection_errors'], metrics['retries']) == (3, 2)
+    assert api.health_check() is False
+
+
+def test_requests_beyond_the_pool_wait_for_a_connection(server):
+    api = client(server, pool_maxsize=2)
+    threads = [threading.Thread(target=api._make_request, args=('GET', '/hold')) for _ in range(4)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Four 0.3 s requests over two connections run in two rounds
+    assert time.monotonic() - started >= 0.55
+    metrics = api.metrics()
+    assert metrics['pool_maxsize'] == 2
+    assert metrics['pool_waits'] == 2
+    assert metrics['pool_wait_timeouts'] == 0
+    assert FakeSwecha.hits['/hold'] == 4
+
+
+def test_pool_wait_is_bounded_by_the_connect_timeout(server):
+    api = client(server, pool_maxsize=1, connect_timeout=0.1, read_timeout=2.0)
+    holder = threading.Thread(target=api._make_request, args=('GET', '/hold'))
+    holder.start()
+    time.sleep(0.05)
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        api._send('GET', f'{server}/ok')
+    holder.join()
+    assert api.metrics()['pool_wait_timeouts'] == 1
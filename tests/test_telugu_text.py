@@ -0,0 +1,18 @@
+from telugu_text import phonetic_key, romanize
+
+
+def test_romanize_telugu_words():
+    assert romanize('తెలుగు') == 'telugu'
+    assert romanize('చార్మినార్') == 'chaarminaar'
+    assert romanize('హైదరాబాద్ city') == 'haidaraabaad city'
+
+
+def test_romanize_anusvara_before_labials():
+    assert romanize('సంపద') == 'sampada'
+    assert romanize('పండుగ') == 'panduga'
+
+
+def test_phonetic_key_is_script_and_spelling_independent():
+    assert phonetic_key('charminar') == phonetic_key('chaarminaar') == phonetic_key('చార్మినార్')
+    assert phonetic_key('Bathukamma') == phonetic_key('బతుకమ్మ')
+    assert phonetic_key('charminar') != phonetic_key('golconda')
@@ -0,0 +1,95 @@
+import codecs
+
+import pytest
+
+import text_files
+from text_files import MappedText, detect_encoding, detect_file_encoding, encoded_offsets, read_text_file
+
+TELUGU = "చార్మినార్ 1591 లో హైదరాబాద్‌లో నిర్మించబడింది.\nగోల్కొండ కోట కాకతీయుల కాలం నాటిది.\n" * 20
+
+
+@pytest.mark.parametrize("encoding", ['utf-16-le', 'utf-16-be'])
+def test_bomless_telugu_utf16_is_detected(encoding):
+    data = TELUGU.encode(encoding)
+    # Telugu code units hold almost no NUL bytes
+    assert data.count(0) < len(data) // 4
+    assert detect_encoding(data) == encoding
+    # A sample cut in the middle of a code unit
+    assert detect_encoding(data[:101]) == encoding
+
+
+@pytest.mark.parametrize("encoding", ['utf-16-le', 'utf-16-be'])
+def test_bomless_ascii_utf16_is_detected(encoding):
+    assert detect_encoding("Charminar, Hyderabad\n".encode(encoding) * 10) == encoding
+
+
+@pytest.mark.parametrize("data, expected", [
+    (codecs.BOM_UTF8 + TELUGU.encode('utf-8'), 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE + TELUGU.encode('utf-16-le'), 'utf-16'),
+    (codecs.BOM_UTF16_BE + TELUGU.encode('utf-16-be'), 'utf-16'),
+    (TELUGU.encode('utf-8'), 'utf-8'),
+    (b"plain ascii text, nothing special\n" * 20, 'utf-8'),
+    ("Café crème brûlée, naïve façade\n".encode('latin-1') * 20, 'latin-1'),
+    (b"", 'utf-8'),
+])
+def test_detect_encoding(data, expected):
+    assert detect_encoding(data) == expected
+
+
+def test_detect_file_encoding_and_read_bomless_utf16(tmp_path):
+    path = tmp_path / "charminar.txt"
+    path.write_bytes(TELUGU.encode('utf-16-le'))
+    assert detect_file_encoding(str(path)) == 'utf-16-le'
+    assert read_text_file(str(path)) == TELUGU
+
+
+@pytest.fixture(params=['utf-8', 'utf-8-sig', 'utf-16', 'utf-16-le', 'utf-16-be'])
+def encoded_file(request, tmp_path):
+    path = tmp_path / "story.txt"
+    path.write_bytes(TELUGU.encode(request.param))
+    return str(path), request.param
+
+
+@pytest.mark.parametrize("mmap_threshold", [1024 * 1024, 0])
+def test_mapped_text_reads_whole_file(encoded_file, mmap_threshold, monkeypatch):
+    monkeypatch.setattr(text_files, 'MMAP_THRESHOLD_BYTES', mmap_threshold)
+    path, encoding = encoded_file
+    with MappedText(path) as text:
+        assert text.encoding == ('utf-16' if encoding == 'utf-16' else encoding)
+        assert len(text) == len(TELUGU.encode(encoding))
+        assert text.read_text() == TELUGU
+
+
+def test_mapped_text_windows_snap_to_character_boundaries(encoded_file):
+    path, encoding = encoded_file
+    with MappedText(path) as text:
+        # Windows starting inside a multi-byte character never decode to U+FFFD
+        for start in range(0, 40):
+            window = text.decode(start, start + 60)
+            assert '\ufffd' not in window
+            assert window in TELUGU
+        assert text.decode(50, 50) == ""
+        assert text.decode(text.size, None) == ""
+
+
+def test_encoded_offsets_round_trip(encoded_file):
+    path, encoding = encoded_file
+    starts = [0, 11, TELUGU.index("గోల్కొండ"), len(TELUGU) - 1]
+    byte_offsets = encoded_offsets(TELUGU, starts, encoding)
+    assert byte_offsets is not None
+
+    bom_length = {'utf-8-sig': 3, 'utf-16': 2}.get(encoding, 0)
+    # The first character sits right after the BOM
+    assert byte_offsets[0] == bom_length
+
+    with MappedText(path) as text:
+        for char_offset, byte_offset in zip(starts, byte_offsets):
+            assert text.decode(byte_offset, None) == TELUGU[char_offset:]
+        assert text.decode(byte_offsets[1], byte_offsets[2]) == TELUGU[starts[1]:starts[2]]
+
+
+def test_encoded_offsets_rejects_unmappable_text():
+    # Replacement characters stand for bytes that cannot be recovered
+    assert encoded_offsets("bad � byte", [0, 5], 'utf-8') is None
+    assert encoded_offsets(TELUGU, [0, 5], 'latin-1') is None
+    assert encoded_offsets(TELUGU, [0, 5], 'no-such-codec') is None
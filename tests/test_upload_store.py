@@ -0,0 +1,92 @@
+import hashlib
+import io
+import os
+
+from corpus import CulturalCorpus
+from corpus_manifest import CorpusManifest, default_manifest_path
+from upload_store import apply_aliases, backfill_hashes, content_hash_of, store_upload
+
+STORY = 'చార్మినార్ కథ'.encode('utf-8')
+
+
+def upload(data, name):
+    uploaded = io.BytesIO(data)
+    uploaded.name = name
+    return uploaded
+
+
+def leftovers(base_path):
+    return [name for _, _, names in os.walk(base_path) for name in names if name.endswith('.part')]
+
+
+def test_upload_is_stored_under_its_content_hash(tmp_path):
+    path, duplicate = store_upload(upload(STORY, 'Charminar.TXT'), 'monuments', 'texts', base_path=str(tmp_path))
+    sha256 = hashlib.sha256(STORY).hexdigest()
+    assert not duplicate
+    assert os.path.basename(path) == f'{sha256}.txt'
+    assert content_hash_of(os.path.basename(path)) == sha256
+    with open(path, 'rb') as f:
+        assert f.read() == STORY
+    assert leftovers(tmp_path) == []
+
+
+def test_identical_reupload_keeps_one_copy_and_records_the_alias(tmp_path):
+    first, _ = store_upload(upload(STORY, 'charminar.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+    second, duplicate = store_upload(upload(STORY, 'old_city.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+    assert duplicate
+    assert second == first
+    assert os.listdir(os.path.dirname(first)) == [os.path.basename(first)]
+    assert leftovers(tmp_path) == []
+
+    manifest = CorpusManifest(default_manifest_path(str(tmp_path)))
+    try:
+        aliases = manifest.load_aliases()
+    finally:
+        manifest.close()
+    assert aliases == {hashlib.sha256(STORY).hexdigest(): ['charminar.txt', 'old_city.txt']}
+
+
+def test_duplicate_in_another_category_points_at_the_first_copy(tmp_path):
+    first, _ = store_upload(upload(STORY, 'charminar.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+    path, duplicate = store_upload(upload(STORY, 'charminar.txt'), 'folktales', 'texts', base_path=str(tmp_path))
+    assert duplicate
+    assert path == first
+    assert not os.path.exists(os.path.join(str(tmp_path), 'folktales', 'texts', os.path.basename(first)))
+
+
+def test_content_is_stored_again_once_its_copy_was_deleted(tmp_path):
+    first, _ = store_upload(upload(STORY, 'charminar.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+    os.remove(first)
+    path, duplicate = store_upload(upload(STORY, 'charminar.txt'), 'culture', 'texts', base_path=str(tmp_path))
+    assert not duplicate
+    assert os.path.isfile(path)
+    assert path.startswith(os.path.join(str(tmp_path), 'culture', 'texts'))
+
+    _, duplicate = store_upload(upload(STORY, 'again.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+    assert duplicate
+
+
+def test_aliases_become_display_names(tmp_path):
+    path, _ = store_upload(upload(STORY, 'charminar.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+    store_upload(upload(STORY, 'old_city.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+
+    corpus = CulturalCorpus.load(str(tmp_path))
+    [entry] = corpus.snapshot()['monuments']['texts']
+    assert entry['name'] == 'charminar.txt'
+    assert entry['aliases'] == ['charminar.txt', 'old_city.txt']
+
+    sha256 = hashlib.sha256(b'x').hexdigest()
+    row = apply_aliases({'path': f'data/{sha256}.csv', 'name': 'n', 'row': 2}, {sha256: ['songs.csv']})
+    assert row['name'] == 'songs #2.csv'
+    plain = apply_aliases({'path': 'data/story.txt', 'name': 'story.txt'}, {sha256: ['songs.csv']})
+    assert plain == {'path': 'data/story.txt', 'name': 'story.txt'}
+
+
+def test_backfill_registers_existing_files(tmp_path):
+    folder = tmp_path / 'culture' / 'texts'
+    folder.mkdir(parents=True)
+    (folder / 'bonalu.txt').write_bytes(STORY)
+    assert backfill_hashes(str(tmp_path)) == 1
+    path, duplicate = store_upload(upload(STORY, 'copy.txt'), 'monuments', 'texts', base_path=str(tmp_path))
+    assert duplicate
+    assert path == str(folder / 'bonalu.txt')
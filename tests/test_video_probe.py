@@ -0,0 +1,91 @@
+import struct
+
+import pytest
+
+from video_probe import _iter_boxes, probe_mp4_header, probe_video
+
+
+def box(box_type, payload=b'', large=False, to_end=False):
+    if to_end:
+        return struct.pack('>I4s', 0, box_type) + payload
+    if large:
+        return struct.pack('>I4sQ', 1, box_type, 16 + len(payload)) + payload
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def mdhd(timescale, duration, version=0):
+    if version == 1:
+        return box(b'mdhd', bytes([1, 0, 0, 0]) + bytes(16) + struct.pack('>IQ', timescale, duration) + bytes(4))
+    return box(b'mdhd', bytes(4) + bytes(8) + struct.pack('>II', timescale, duration) + bytes(4))
+
+
+def trak(handler, timescale=1000, duration=10000, samples=250, version=0):
+    hdlr = box(b'hdlr', bytes(8) + handler + bytes(12))
+    stsz = box(b'stsz', bytes(4) + struct.pack('>II', 0, samples))
+    minf = box(b'minf', box(b'vmhd', bytes(12)) + box(b'stbl', box(b'stsd', bytes(8)) + stsz))
+    return box(b'trak', box(b'tkhd', bytes(84)) + box(b'mdia', mdhd(timescale, duration, version) + hdlr + minf))
+
+
+def write(tmp_path, *boxes):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(b''.join(boxes))
+    return str(path)
+
+
+FTYP = box(b'ftyp', b'isom' + bytes(4) + b'isomavc1')
+
+
+def test_reads_the_video_track(tmp_path):
+    path = write(tmp_path, FTYP, box(b'moov', box(b'mvhd', bytes(100)) + trak(b'vide')), box(b'mdat', bytes(64)))
+    assert probe_mp4_header(path) == {'fps': 25.0, 'frame_count': 250, 'duration': 10.0}
+
+
+def test_skips_other_tracks_and_reads_version_1_headers(tmp_path):
+    moov = box(b'moov', trak(b'soun', 44100, 441000, 430) + trak(b'vide', 600, 3000, 150, version=1))
+    path = write(tmp_path, FTYP, box(b'mdat', bytes(32)), moov)
+    assert probe_mp4_header(path) == {'fps': 30.0, 'frame_count': 150, 'duration': 5.0}
+
+
+def test_64_bit_box_sizes(tmp_path):
+    path = write(tmp_path, FTYP, box(b'mdat', bytes(40), large=True), box(b'moov', trak(b'vide'), large=True))
+    assert probe_mp4_header(path)['frame_count'] == 250
+
+
+def test_size_zero_box_runs_to_the_end_of_the_file(tmp_path):
+    path = write(tmp_path, FTYP, box(b'moov', trak(b'vide'), to_end=True))
+    assert probe_mp4_header(path)['duration'] == 10.0
+    with open(path, 'rb') as f:
+        boxes = list(_iter_boxes(f, 0, len(FTYP) + 8 + len(trak(b'vide'))))
+    assert [box_type for box_type, _, _ in boxes] == [b'ftyp', b'moov']
+    assert boxes[-1][2] == len(FTYP) + 8 + len(trak(b'vide'))
+
+
+def test_no_video_track_or_no_moov(tmp_path):
+    assert probe_mp4_header(write(tmp_path, FTYP, box(b'moov', trak(b'soun')))) is None
+    assert probe_mp4_header(write(tmp_path, FTYP, box(b'mdat', bytes(16)))) is None
+    assert probe_mp4_header(write(tmp_path, FTYP, box(b'moov', trak(b'vide', duration=0)))) is None
+
+
+@pytest.mark.parametrize('cut', [4, 20, 60, 120, 200])
+def test_truncated_files(tmp_path, cut):
+    data = FTYP + box(b'moov', trak(b'vide'))
+    assert probe_mp4_header(write(tmp_path, data[:len(FTYP) + cut])) is None
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'\x00\x00\x00\x04moov',                                    # size below the header size
+    struct.pack('>I4sQ', 1, b'moov', 8),                         # largesize below the header size
+    struct.pack('>I4sQ', 1, b'moov', 2 ** 62) + bytes(32),       # largesize past the end of the file
+    bytes(range(256)) * 4,                                        # not a box structure at all
+])
+def test_corrupt_input(tmp_path, data):
+    assert probe_mp4_header(write(tmp_path, data)) is None
+
+
+def test_probe_video_falls_back_when_the_header_cannot_be_parsed(tmp_path):
+    path = write(tmp_path, b'not a video')
+    metadata = probe_video(path, fast=True)
+    # OpenCV reports no usable frame rate for an unreadable file
+    assert metadata['fps'] <= 0
+    assert metadata['duration'] == 0
@@ -0,0 +1,200 @@
+import os
+import mmap
+import codecs
+import threading
+from typing import List, Optional, Sequence
+
+# Bytes read from the start of a file to decide its encoding
+ENCODING_SAMPLE_BYTES = 64 * 1024
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD_BYTES = 1024 * 1024
+# Share of undecodable characters above which a sample is not treated as UTF-8
+MAX_UTF8_ERROR_RATIO = 0.01
+# Share of UTF-16 code units whose high byte is one of the two most common
+# ones (e.g. 0x0C for Telugu and 0x00 for spaces and digits) in BOM-less UTF-16
+MIN_UTF16_HIGH_BYTE_SHARE = 0.9
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+_encoding_cache = {}  # (path, size, mtime_ns) -> encoding
+_encoding_cache_lock = threading.Lock()
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Pick an encoding from the first bytes of a file.
+
+    UTF-8 is preferred whenever the sample is (almost) valid UTF-8, so a few
+    corrupt bytes decode as replacement characters instead of the whole
+    Telugu text being mis-decoded as latin-1.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    # Many NUL bytes in alternating positions means BOM-less UTF-16
+    if sample and sample.count(0) > len(sample) // 4:
+        return 'utf-16-le' if sample[1::2].count(0) > sample[0::2].count(0) else 'utf-16-be'
+
+    # Checked before UTF-8: the low bytes of Telugu UTF-16 code units are ASCII
+    utf16 = _detect_utf16(sample)
+    if utf16:
+        return utf16
+
+    # Incremental decoding so a character cut off at the end of the sample is not an error
+    decoded = codecs.getincrementaldecoder('utf-8')(errors='replace').decode(sample, final=False)
+    non_ascii = sum(1 for char in decoded if ord(char) > 127)
+    if non_ascii == 0 or decoded.count('\ufffd') <= non_ascii * MAX_UTF8_ERROR_RATIO:
+        return 'utf-8'
+    return 'latin-1'
+
+
+def _high_byte_share(high_bytes: bytes) -> float:
+    counts = sorted((high_bytes.count(value) for value in set(high_bytes)), reverse=True)
+    return sum(counts[:2]) / len(high_bytes)
+
+
+def _detect_utf16(sample: bytes) -> Optional[str]:
+    """
+    Byte order of BOM-less UTF-16 text outside Latin script, or None. Such
+    text has few NUL bytes (Telugu code units are 0x0C00-0x0C7F), but the
+    high bytes of its code units take one or two values, while its low
+    bytes and the bytes of other encodings vary.
+    """
+    sample = sample[:len(sample) - len(sample) % 2]
+    if len(sample) < 4:
+        return None
+    shares = {'utf-16-le': _high_byte_share(sample[1::2]), 'utf-16-be': _high_byte_share(sample[0::2])}
+    encoding = max(shares, key=shares.get)
+    other = 'utf-16-be' if encoding == 'utf-16-le' else 'utf-16-le'
+    if shares[encoding] < MIN_UTF16_HIGH_BYTE_SHARE or shares[other] >= shares[encoding]:
+        return None
+    try:
+        # A character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder(encoding)(errors='strict').decode(sample, final=False)
+    except UnicodeDecodeError:
+        return None
+    return encoding
+
+
+def detect_file_encoding(file_path: str, size: Optional[int] = None, mtime_ns: Optional[int] = None) -> str:
+    """Encoding of a file, sniffed from a sample once per (path, size, mtime) fingerprint"""
+    if size is None or mtime_ns is None:
+        file_stat = os.stat(file_path)
+        size, mtime_ns = file_stat.st_size, file_stat.st_mtime_ns
+
+    key = (file_path, size, mtime_ns)
+    with _encoding_cache_lock:
+        encoding = _encoding_cache.get(key)
+    if encoding is None:
+        with open(file_path, 'rb') as f:
+            encoding = detect_encoding(f.read(ENCODING_SAMPLE_BYTES))
+        with _encoding_cache_lock:
+            _encoding_cache[key] = encoding
+    return encoding
+
+
+class MappedText:
+    """
+    Read-only view of a text file. Large files are memory-mapped, so reading
+    a window touches only the pages involved; decode() turns just that byte
+    window into text.
+
+    Use as a context manager:
+
+        with MappedText(path) as text:
+            passage = text.decode(start, end)
+    """
+
+    def __init__(self, file_path: str, encoding: Optional[str] = None):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        file_stat = os.fstat(self._file.fileno())
+        self.size, self.mtime_ns = file_stat.st_size, file_stat.st_mtime_ns
+
+        if self.size >= MMAP_THRESHOLD_BYTES:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._buffer = self._file.read()
+        self._view = memoryview(self._buffer)
+
+        self.encoding = encoding or detect_encoding(bytes(self._view[:ENCODING_SAMPLE_BYTES]))
+        self._utf16 = self.encoding.startswith('utf-16')
+        self._utf8 = self.encoding.startswith('utf-8')
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    def _align(self, offset: int) -> int:
+        """Move offset forward to the start of a character"""
+        offset = max(0, min(offset, self.size))
+        if self._utf16:
+            return offset + (offset % 2)
+        if self._utf8:
+            # Skip UTF-8 continuation bytes (0b10xxxxxx)
+            while offset < self.size and (self._view[offset] & 0xC0) == 0x80:
+                offset += 1
+        return offset
+
+    def decode(self, start: int = 0, end: Optional[int] = None) -> str:
+        """Decode the byte window [start, end), snapped to character boundaries"""
+        start = self._align(start)
+        end = self.size if end is None else self._align(end)
+        if end <= start:
+            return ""
+        encoding = self.encoding
+        if start > 0 and encoding in ('utf-8-sig', 'utf-16'):
+            # The BOM only appears at the start of the file
+            encoding = 'utf-8' if encoding == 'utf-8-sig' else self._utf16_body_encoding()
+        return codecs.decode(self._view[start:end], encoding, errors='replace')
+
+    def _utf16_body_encoding(self) -> str:
+        return 'utf-16-le' if bytes(self._view[:2]) == codecs.BOM_UTF16_LE else 'utf-16-be'
+
+    def read_text(self) -> str:
+        """Decode the whole file in a single pass"""
+        return self.decode(0, None)
+
+
+def encoded_offsets(text: str, offsets: Sequence[int], encoding: str) -> Optional[List[int]]:
+    """
+    File byte offsets of ascending character offsets into text, the decoded
+    body of a file in encoding, for MappedText.decode(). None when text does
+    not map back to the file's bytes (it holds replacement characters).
+    """
+    if '\ufffd' in text:
+        return None
+    bom_length = {'utf-8-sig': 3, 'utf-16': 2}.get(encoding, 0)
+    # Both byte orders have the same encoded lengths
+    body_encoding = {'utf-8-sig': 'utf-8', 'utf-16': 'utf-16-le'}.get(encoding, encoding)
+    position, previous, result = bom_length, 0, []
+    try:
+        for offset in offsets:
+            position += len(text[previous:offset].encode(body_encoding))
+            previous = offset
+            result.append(position)
+    except (UnicodeEncodeError, LookupError):
+        return None
+    return result
+
+
+def read_text_file(file_path: str, encoding: Optional[str] = None) -> str:
+    """Read a whole text file with one pass over its bytes, detecting the encoding if not given"""
+    with MappedText(file_path, encoding=encoding) as text:
+        return text.read_text()
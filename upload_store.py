@@ -0,0 +1,126 @@
+import os
+import re
+import hashlib
+import sqlite3
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from corpus_manifest import CorpusManifest, default_manifest_path
+from storage_layout import storage_dir
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Stored uploads are named <sha256 hex>.<ext>
+CONTENT_HASH_NAME = re.compile(r'^([0-9a-f]{64})\.[^.]+$')
+
+
+def content_hash_of(file_name: str) -> Optional[str]:
+    """The SHA-256 a content-addressed file name encodes, or None for other names"""
+    match = CONTENT_HASH_NAME.match(file_name)
+    return match.group(1) if match else None
+
+
+def store_upload(uploaded_file, category: str, content_type: str, original_name: Optional[str] = None,
+                 base_path: str = 'data') -> Tuple[str, bool]:
+    """
+    Stream an uploaded file to disk while hashing it, keeping a single copy
+    per distinct content under data/<category>/<content_type>/<sha256>.<ext>.
+    The name the file arrived with is recorded as an alias.
+
+    Returns: (path, already_archived). For a duplicate, nothing new is
+    written and path is the copy that was stored first (possibly in another
+    category), so callers can skip indexing and the remote upload.
+    """
+    original_name = original_name or uploaded_file.name
+    extension = os.path.splitext(original_name)[1].lower()
+    content_dir = os.path.join(base_path, category, content_type)
+    os.makedirs(content_dir, exist_ok=True)
+
+    # Hash while copying into a temporary file the loader ignores (.part)
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(dir=content_dir, prefix='.upload-', suffix='.part', delete=False) as tmp:
+        while True:
+            chunk = uploaded_file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            tmp.write(chunk)
+        tmp_path = tmp.name
+
+    sha256 = digest.hexdigest()
+    stored_name = f"{sha256}{extension}"
+    path = os.path.join(storage_dir(content_dir, stored_name), stored_name)
+
+    try:
+        manifest = CorpusManifest(default_manifest_path(base_path))
+    except sqlite3.Error as e:
+        # Without the registry, fall back to keeping the file
+        print(f"Upload registry unavailable, storing without deduplication: {e}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return path, False
+
+    try:
+        existing = manifest.register_content(sha256, path, category, content_type)
+        manifest.add_alias(sha256, original_name)
+    finally:
+        manifest.close()
+
+    if existing is not None:
+        os.remove(tmp_path)
+        return existing[0], True
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    return path, False
+
+
+def apply_aliases(entry: Dict, aliases: Dict[str, list]) -> Dict:
+    """Give a content-addressed entry its first upload name as display name, keeping all aliases"""
+    sha256 = content_hash_of(os.path.basename(entry['path']))
+    names = aliases.get(sha256) if sha256 else None
+    if names:
+        if 'row' in entry:
+            base_name, extension = os.path.splitext(names[0])
+            entry['name'] = f"{base_name} #{entry['row']}{extension}"
+        else:
+            entry['name'] = names[0]
+        entry['aliases'] = names
+    return entry
+
+
+def backfill_hashes(base_path: str = 'data') -> int:
+    """
+    Register the content hash of every file already in the archive, so
+    uploads of files that predate the store are also recognised as duplicates.
+    Returns: number of files hashed
+    """
+    from local_utils import CATEGORIES, CONTENT_LOADERS
+    from storage_layout import iter_folder_files
+
+    manifest = CorpusManifest(default_manifest_path(base_path))
+    hashed = 0
+    try:
+        for category in CATEGORIES:
+            for content_type, folder, extensions, _ in CONTENT_LOADERS:
+                for dir_entry in iter_folder_files(os.path.join(base_path, category, folder)):
+                    if not dir_entry.name.lower().endswith(extensions):
+                        continue
+                    digest = hashlib.sha256()
+                    with open(dir_entry.path, 'rb') as f:
+                        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b''):
+                            digest.update(chunk)
+                    manifest.register_content(digest.hexdigest(), dir_entry.path, category, content_type)
+                    hashed += 1
+    finally:
+        manifest.close()
+    return hashed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Register content hashes of existing archive files")
+    parser.add_argument("base_path", nargs="?", default="data")
+    args = parser.parse_args()
+    print(f"Hashed {backfill_hashes(args.base_path)} files")
@@ -0,0 +1,144 @@
+import os
+import struct
+
+import cv2
+
+# Containers whose metadata can be read straight from the ISO-BMFF box headers
+MP4_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+
+
+def probe_video(video_path, fast=False):
+    """
+    Extract video metadata, trying the header-only MP4/MOV parser first when
+    fast=True and falling back to OpenCV
+    Returns: Dictionary with fps, frame_count and duration (seconds)
+    """
+    if fast and video_path.lower().endswith(MP4_EXTENSIONS):
+        metadata = probe_mp4_header(video_path)
+        if metadata is not None:
+            return metadata
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = frame_count / fps if fps > 0 else 0
+    cap.release()
+
+    return {
+        'fps': fps,
+        'frame_count': frame_count,
+        'duration': duration
+    }
+
+
+def _iter_boxes(f, start, end):
+    """Yield (type, payload_start, box_end) for the boxes between start and end"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            # 64-bit size follows the type
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            size = struct.unpack('>Q', large)[0]
+            header_size = 16
+        elif size == 0:
+            # Box extends to the end of its parent
+            size = end - pos
+        if size < header_size:
+            return
+        yield box_type, pos + header_size, pos + size
+        pos += size
+
+
+def _find_box(f, start, end, box_type):
+    for found_type, payload_start, box_end in _iter_boxes(f, start, end):
+        if found_type == box_type:
+            return payload_start, box_end
+    return None
+
+
+def _read_mdhd(f, start):
+    """(timescale, duration) from a media header box payload"""
+    f.seek(start)
+    version = f.read(1)[0]
+    if version == 1:
+        f.seek(start + 4 + 16)
+        timescale, duration = struct.unpack('>IQ', f.read(12))
+    else:
+        f.seek(start + 4 + 8)
+        timescale, duration = struct.unpack('>II', f.read(8))
+    return timescale, duration
+
+
+def _read_video_track(f, trak_start, trak_end):
+    """(timescale, duration, sample_count) for a video track, or None for other tracks"""
+    mdia = _find_box(f, trak_start, trak_end, b'mdia')
+    if mdia is None:
+        return None
+
+    hdlr = _find_box(f, mdia[0], mdia[1], b'hdlr')
+    if hdlr is None:
+        return None
+    f.seek(hdlr[0] + 8)
+    if f.read(4) != b'vide':
+        return None
+
+    mdhd = _find_box(f, mdia[0], mdia[1], b'mdhd')
+    minf = _find_box(f, mdia[0], mdia[1], b'minf')
+    if mdhd is None or minf is None:
+        return None
+    stbl = _find_box(f, minf[0], minf[1], b'stbl')
+    if stbl is None:
+        return None
+
+    # stsz carries the sample count directly; one sample is one frame
+    stsz = _find_box(f, stbl[0], stbl[1], b'stsz')
+    if stsz is None:
+        return None
+    f.seek(stsz[0] + 8)
+    sample_count = struct.unpack('>I', f.read(4))[0]
+
+    timescale, duration = _read_mdhd(f, mdhd[0])
+    return timescale, duration, sample_count
+
+
+def probe_mp4_header(video_path):
+    """
+    Read fps, frame count and duration from the MP4/MOV box headers without
+    initializing a decoder. Only the moov box is read; media data is skipped.
+    Returns: Dictionary like probe_video, or None if the file cannot be parsed
+    (e.g. fragmented MP4 or no video track)
+    """
+    try:
+        file_size = os.path.getsize(video_path)
+        with open(video_path, 'rb') as f:
+            moov = _find_box(f, 0, file_size, b'moov')
+            if moov is None:
+                return None
+
+            for box_type, payload_start, box_end in _iter_boxes(f, moov[0], moov[1]):
+                if box_type != b'trak':
+                    continue
+                track = _read_video_track(f, payload_start, box_end)
+                if track is None:
+                    continue
+
+                timescale, track_duration, frame_count = track
+                if not timescale or not track_duration or not frame_count:
+                    return None
+                duration = track_duration / timescale
+                return {
+                    'fps': frame_count / duration,
+                    'frame_count': frame_count,
+                    'duration': duration
+                }
+    except (OSError, struct.error, IndexError):
+        return None
+    return None